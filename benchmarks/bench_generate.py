@@ -0,0 +1,437 @@
+#! /usr/bin/env python
+
+"""
+License:
+    NASA Open Source Agreement 1.3
+
+Description:
+    Times the elevation generation of each elevation source, across a matrix
+    of AOI sizes, using synthetic elevation sources and inputs.  The results
+    are appended to a JSON lines file, and can be compared with an earlier
+    results file.
+
+Usage:
+    bench_generate.py --help prints the help message
+"""
+
+import os
+import sys
+import imp
+import glob
+import json
+import time
+import shutil
+import socket
+import logging
+import datetime
+import tempfile
+import commands
+from argparse import ArgumentParser
+
+# The synthetic elevation sources are shared with the tests
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, 'tests'))
+import fixtures
+
+
+SCRIPT_FILENAME = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               os.pardir, 'scripts', 'build_elevation_band.py')
+
+DEFAULT_RESULTS_FILENAME = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'results', 'results.jsonl')
+
+# AOI sizes (degrees)
+DEFAULT_SIZES = [0.25, 1.0, 2.0]
+
+# Name, center longitude, center latitude, GLS tiles are provided, and the
+# EPSG code of the map grid (None for UTM).  The GTOPO30 cases are within
+# the latitudes GLS does not cover, and the RAMP case is within Antarctica.
+CASES = [
+    ('gls', -104.5, 40.5, True, None),
+    ('gls_antimeridian', 180.0, -17.0, True, None),
+    ('gls_over_water', -150.0, 30.0, False, None),
+    ('gtopo30_arctic', 10.0, 85.5, False, None),
+    ('gtopo30_antimeridian', 180.0, 85.5, False, None),
+    ('gtopo30_southern_ocean', -40.0, -57.0, False, None),
+    ('ramp', 0.0, -75.0, False, 3031)]
+
+CASE_NAMES = [case[0] for case in CASES]
+
+INPUT_TYPES = ['mtl', 'espa', 'ard']
+
+
+def load_script():
+    """Load build_elevation_band.py as a module"""
+
+    return imp.load_source('build_elevation_band', SCRIPT_FILENAME)
+
+
+def gls_boxes(sizes):
+    """The boxes of the cases needing GLS tiles, covering every size"""
+
+    # Cover the max box padding and the 1 degree tile rounding
+    half_size = max(sizes) / 2.0 + 1.0
+
+    boxes = list()
+    for (name, longitude, latitude, has_gls, epsg) in CASES:
+        if has_gls:
+            boxes.append((latitude - half_size, latitude + half_size,
+                          fixtures.normalize_longitude(longitude - half_size),
+                          fixtures.normalize_longitude(longitude + half_size)))
+
+    return boxes
+
+
+def write_input(scene, input_type, input_dir):
+    """Write the input of a scene
+
+    Returns:
+        <str>: The input filename
+    """
+
+    fixtures.make_dirs(input_dir)
+
+    band_filename = os.path.join(input_dir, 'band1.tif')
+    scene.write_reference_band(band_filename)
+
+    if input_type == 'mtl':
+        input_filename = os.path.join(input_dir, 'scene_MTL.txt')
+        scene.write_mtl(input_filename, band_filename)
+    elif input_type == 'espa':
+        input_filename = os.path.join(input_dir, 'scene.xml')
+        scene.write_espa_xml(input_filename, band_filename)
+    else:
+        input_filename = os.path.join(input_dir, 'scene.xml')
+        scene.write_ard_xml(input_filename, band_filename)
+
+    return input_filename
+
+
+def create_elevation(script, input_type, input_filename):
+    """Create the elevation object for the input"""
+
+    extents = [False] + [None] * 8 + [None]
+
+    if input_type == 'mtl':
+        return script.MTLElevation(input_filename, *extents)
+    elif input_type == 'espa':
+        return script.ESPAXMLElevation(input_filename, *extents)
+
+    return script.ARDXMLElevation(input_filename, *extents)
+
+
+def elevation_source(stages):
+    """Determine the elevation source used from the recorded stages"""
+
+    for source in ('ramp', 'gls', 'gtopo30'):
+        name = 'generate/generate_using_{0}'.format(source)
+        for stage in stages:
+            if stage['name'] == name and stage['status'] == 'success':
+                return source
+
+    return None
+
+
+def stage_totals(stages):
+    """Total the wall time of the stages by name"""
+
+    totals = dict()
+    for stage in stages:
+        totals[stage['name']] = (totals.get(stage['name'], 0.0) +
+                                 stage['wall_seconds'])
+
+    return totals
+
+
+def median(values):
+    """Median of the values"""
+
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2 == 1:
+        return values[middle]
+
+    return (values[middle - 1] + values[middle]) / 2.0
+
+
+def run_case(script, args, case, size, run_dir):
+    """Time the elevation generation of one case and size
+
+    Returns:
+        <dict>: The result of the case
+    """
+
+    logger = logging.getLogger(__name__)
+
+    (name, longitude, latitude, has_gls, epsg) = case
+
+    scene = fixtures.Scene(name, longitude, latitude, size,
+                           resolution=args.resolution, epsg=epsg)
+    (lines, samples) = scene.dimensions()
+
+    input_dir = os.path.join(run_dir, 'input')
+
+    wall_seconds = list()
+    best_stages = None
+    source = None
+    for repeat in range(args.repeat):
+        # The XML inputs are updated by the generation, so are rewritten
+        input_filename = write_input(scene, args.input_type, input_dir)
+
+        elevation = create_elevation(script, args.input_type,
+                                     input_filename)
+        elevation.scratch_root = run_dir
+
+        start_time = time.time()
+        elevation.generate()
+        elapsed = time.time() - start_time
+
+        stages = elevation.metrics.report()['stages']
+        source = elevation_source(stages)
+        if len(wall_seconds) == 0 or elapsed < min(wall_seconds):
+            best_stages = stage_totals(stages)
+        wall_seconds.append(elapsed)
+
+        logger.info('{0} size {1} repeat {2}: {3:.3f} seconds ({4})'
+                    .format(name, size, repeat + 1, elapsed, source))
+
+        for file_name in glob.glob(os.path.join(run_dir, '*_elevation.*')):
+            os.unlink(file_name)
+
+    return {'case': name,
+            'size_degrees': size,
+            'input_type': args.input_type,
+            'lines': lines,
+            'samples': samples,
+            'elevation_source': source,
+            'wall_seconds': wall_seconds,
+            'min_seconds': min(wall_seconds),
+            'median_seconds': median(wall_seconds),
+            'stage_seconds': best_stages}
+
+
+def result_key(result):
+    """Identifies the case of a result for comparison"""
+
+    return (result['case'], result['size_degrees'], result['input_type'])
+
+
+def compare_results(results, baseline_filename):
+    """Log the ratio of each result to the latest matching baseline"""
+
+    logger = logging.getLogger(__name__)
+
+    baseline = dict()
+    with open(baseline_filename, 'r') as baseline_fd:
+        for line in baseline_fd:
+            if line.strip():
+                result = json.loads(line)
+                baseline[result_key(result)] = result
+
+    for result in results:
+        previous = baseline.get(result_key(result))
+        if previous is None:
+            logger.info('{0} size {1}: no baseline'
+                        .format(result['case'], result['size_degrees']))
+            continue
+
+        logger.info('{0} size {1}: {2:.3f} seconds, baseline {3:.3f}'
+                    ' seconds ({4}), ratio {5:.2f}'
+                    .format(result['case'], result['size_degrees'],
+                            result['min_seconds'], previous['min_seconds'],
+                            previous.get('git_commit'),
+                            result['min_seconds'] / previous['min_seconds']))
+
+
+def git_commit():
+    """The commit of the working tree, if known"""
+
+    (status, output) = commands.getstatusoutput(
+        'git -C {0} rev-parse HEAD'
+        .format(os.path.dirname(os.path.abspath(__file__))))
+    if status != 0:
+        return None
+
+    return output.strip()
+
+
+def main():
+    """Provides the main processing for the script"""
+
+    parser = ArgumentParser(description='Benchmark the elevation generation'
+                                        ' with synthetic elevation sources')
+
+    parser.add_argument('--work-dir',
+                        action='store',
+                        dest='work_dir',
+                        default=None,
+                        help='directory for the synthetic sources, inputs,'
+                             ' and outputs, which is kept so the sources are'
+                             ' reused; default is a temporary directory')
+
+    parser.add_argument('--cases',
+                        action='store',
+                        dest='cases',
+                        nargs='+',
+                        choices=CASE_NAMES,
+                        default=CASE_NAMES,
+                        help='cases to run; default is all')
+
+    parser.add_argument('--sizes',
+                        action='store',
+                        dest='sizes',
+                        nargs='+',
+                        type=float,
+                        default=DEFAULT_SIZES,
+                        help='AOI sizes (degrees); default is {0}'
+                             .format(' '.join([str(size)
+                                               for size in DEFAULT_SIZES])))
+
+    parser.add_argument('--input-type',
+                        action='store',
+                        dest='input_type',
+                        choices=INPUT_TYPES,
+                        default='mtl',
+                        help='type of input to generate; default is mtl')
+
+    parser.add_argument('--resolution',
+                        action='store',
+                        dest='resolution',
+                        type=float,
+                        default=30.0,
+                        help='output pixel size (meters); default is 30')
+
+    parser.add_argument('--repeat',
+                        action='store',
+                        dest='repeat',
+                        type=int,
+                        default=3,
+                        help='runs of each case; default is 3')
+
+    parser.add_argument('--gls-samples',
+                        action='store',
+                        dest='gls_samples',
+                        type=int,
+                        default=360,
+                        help='samples and lines of each GLS tile;'
+                             ' default is 360')
+
+    parser.add_argument('--gtopo30-scale',
+                        action='store',
+                        dest='gtopo30_scale',
+                        type=int,
+                        default=10,
+                        help='factor to reduce the GTOPO30 tiles by;'
+                             ' default is 10')
+
+    parser.add_argument('--ramp-scale',
+                        action='store',
+                        dest='ramp_scale',
+                        type=int,
+                        choices=fixtures.RAMP_SCALES,
+                        default=20,
+                        help='factor to reduce the RAMP DEM by;'
+                             ' default is 20')
+
+    parser.add_argument('--results',
+                        action='store',
+                        dest='results_filename',
+                        default=DEFAULT_RESULTS_FILENAME,
+                        help='JSON lines file the results are appended to;'
+                             ' default is {0}'
+                             .format(DEFAULT_RESULTS_FILENAME))
+
+    parser.add_argument('--compare',
+                        action='store',
+                        dest='baseline_filename',
+                        default=None,
+                        help='results file to compare the results with')
+
+    parser.add_argument('--debug',
+                        action='store_true',
+                        dest='debug',
+                        default=False,
+                        help='turn debug logging on')
+
+    args = parser.parse_args()
+
+    logging_level = logging.INFO
+    if args.debug:
+        logging_level = logging.DEBUG
+
+    logging.basicConfig(format=('%(asctime)s.%(msecs)03d %(process)d'
+                                ' %(levelname)-8s'
+                                ' %(filename)s:%(lineno)d:'
+                                '%(funcName)s -- %(message)s'),
+                        datefmt='%Y-%m-%d %H:%M:%S',
+                        level=logging_level,
+                        stream=sys.stdout)
+
+    logger = logging.getLogger(__name__)
+
+    temporary_work_dir = args.work_dir is None
+    work_dir = args.work_dir
+    if temporary_work_dir:
+        work_dir = tempfile.mkdtemp(prefix='espa-elevation-benchmark-')
+    work_dir = os.path.abspath(work_dir)
+
+    try:
+        elevation_dir = os.path.join(work_dir, 'elevation')
+        start_time = time.time()
+        if fixtures.build_elevation_dir(elevation_dir,
+                                        gls_boxes(args.sizes),
+                                        gls_samples=args.gls_samples,
+                                        gtopo30_scale=args.gtopo30_scale,
+                                        ramp_scale=args.ramp_scale):
+            logger.info('Generated synthetic elevation sources in {0:.3f}'
+                        ' seconds'.format(time.time() - start_time))
+
+        os.environ['ESPA_ELEVATION_DIR'] = elevation_dir
+        script = load_script()
+
+        common = {'timestamp': datetime.datetime.utcnow().isoformat(),
+                  'git_commit': git_commit(),
+                  'hostname': socket.gethostname(),
+                  'software_version': script.SOFTWARE_VERSION,
+                  'warp_engine': script.Geo.get_warp_engine(),
+                  'repeat': args.repeat,
+                  'resolution': args.resolution}
+
+        results = list()
+        cwd = os.getcwd()
+        for case in CASES:
+            if case[0] not in args.cases:
+                continue
+
+            for size in args.sizes:
+                run_dir = os.path.join(work_dir, 'runs',
+                                       '{0}-{1}'.format(case[0], size))
+                fixtures.make_dirs(run_dir)
+
+                os.chdir(run_dir)
+                try:
+                    result = run_case(script, args, case, size, run_dir)
+                finally:
+                    os.chdir(cwd)
+
+                result.update(common)
+                results.append(result)
+
+        fixtures.make_dirs(os.path.dirname(
+            os.path.abspath(args.results_filename)))
+        with open(args.results_filename, 'a') as results_fd:
+            for result in results:
+                results_fd.write(json.dumps(result, sort_keys=True))
+                results_fd.write('\n')
+        logger.info('Results appended to {0}'.format(args.results_filename))
+
+        if args.baseline_filename is not None:
+            compare_results(results, args.baseline_filename)
+
+    finally:
+        if temporary_work_dir:
+            shutil.rmtree(work_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,339 @@
+#! /usr/bin/env python
+
+"""
+License:
+    NASA Open Source Agreement 1.3
+
+Description:
+    Times the startup of build_elevation_band.py for each entry path, from
+    --help to planning an input through a worker daemon, and reports the
+    slow to import modules each path imports.  The first run of each path
+    is reported as the cold time and the later runs as the warm times.  The
+    results are appended to a JSON lines file, and can be compared with an
+    earlier results file.
+
+Usage:
+    bench_startup.py --help prints the help message
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import logging
+import datetime
+import tempfile
+import subprocess
+from argparse import ArgumentParser
+
+# The synthetic elevation sources are shared with the tests
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, 'tests'))
+import fixtures
+import bench_generate
+
+
+DEFAULT_RESULTS_FILENAME = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'results', 'startup.jsonl')
+
+# Modules which are slow to import, reported when a path imports them
+SLOW_MODULES = ['numpy', 'osgeo', 'lxml', 'espa', 'sqlite3',
+                'multiprocessing']
+
+# Name, arguments (with {mtl}, {xml}, and {socket} replaced), whether
+# ESPA_ELEVATION_DIR is defined, and whether a worker daemon is running
+ENTRY_PATHS = [
+    ('help', ['--help'], True, False),
+    ('missing_elevation_dir', ['--mtl', '{mtl}'], False, False),
+    ('mtl_plan', ['--mtl', '{mtl}', '--plan', '-'], True, False),
+    ('xml_plan', ['--xml', '{xml}', '--plan', '-'], True, False),
+    ('daemon_xml_plan', ['--server', '{socket}', '--xml', '{xml}',
+                         '--plan', '-'], True, True)]
+
+ENTRY_PATH_NAMES = [entry_path[0] for entry_path in ENTRY_PATHS]
+
+# Runs the script, then writes the slow modules it imported to the file
+# named by the first argument
+MODULES_WRAPPER = '''
+import sys, json, atexit, runpy
+modules_filename = sys.argv.pop(1)
+def report():
+    with open(modules_filename, 'w') as modules_fd:
+        json.dump(sorted(set([name.split('.')[0] for name in sys.modules
+                              if name.split('.')[0] in {0}])), modules_fd)
+atexit.register(report)
+sys.argv = sys.argv[1:]
+runpy.run_path(sys.argv[0], run_name='__main__')
+'''.format(repr(SLOW_MODULES))
+
+
+def run_script(args, environment):
+    """Run the script to completion, discarding its output
+
+    Returns:
+        <float>: The wall time (seconds)
+    """
+
+    with open(os.devnull, 'w') as null_fd:
+        start_time = time.time()
+        subprocess.call([sys.executable, bench_generate.SCRIPT_FILENAME] +
+                        args, stdout=null_fd, stderr=null_fd,
+                        env=environment)
+        return time.time() - start_time
+
+
+def imported_modules(args, environment, work_dir):
+    """Determine the slow modules the script imports for the arguments
+
+    Returns:
+        <list:str>: Names of the slow modules imported
+    """
+
+    modules_filename = os.path.join(work_dir, 'modules.json')
+    with open(os.devnull, 'w') as null_fd:
+        subprocess.call([sys.executable, '-c', MODULES_WRAPPER,
+                         modules_filename, bench_generate.SCRIPT_FILENAME] +
+                        args, stdout=null_fd, stderr=null_fd,
+                        env=environment)
+
+    with open(modules_filename, 'r') as modules_fd:
+        modules = json.load(modules_fd)
+    os.unlink(modules_filename)
+
+    return modules
+
+
+def start_daemon(socket_filename, environment):
+    """Start a worker daemon and wait until it accepts jobs
+
+    Returns:
+        <subprocess.Popen>: The daemon process
+    """
+
+    null_fd = open(os.devnull, 'w')
+    daemon = subprocess.Popen([sys.executable,
+                               bench_generate.SCRIPT_FILENAME,
+                               '--serve', socket_filename],
+                              stdout=null_fd, stderr=null_fd,
+                              env=environment)
+    null_fd.close()
+
+    for attempt in range(100):
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            client.connect(socket_filename)
+            return daemon
+        except socket.error:
+            time.sleep(0.1)
+        finally:
+            client.close()
+
+    daemon.terminate()
+    raise RuntimeError('The worker daemon did not start')
+
+
+def run_entry_path(entry_path, inputs, args, work_dir):
+    """Time the startup of one entry path
+
+    Returns:
+        <dict>: The result of the entry path
+    """
+
+    logger = logging.getLogger(__name__)
+
+    (name, path_args, with_elevation_dir, with_daemon) = entry_path
+
+    path_args = [arg.format(**inputs) for arg in path_args]
+
+    environment = dict(os.environ)
+    if not with_elevation_dir:
+        del environment['ESPA_ELEVATION_DIR']
+
+    daemon = None
+    if with_daemon:
+        daemon = start_daemon(inputs['socket'], environment)
+
+    try:
+        wall_seconds = list()
+        for repeat in range(args.repeat + 1):
+            wall_seconds.append(run_script(path_args, environment))
+
+        # The daemon client imports as a local run would
+        modules = imported_modules(path_args, environment, work_dir)
+    finally:
+        if daemon is not None:
+            daemon.terminate()
+            daemon.wait()
+
+    warm_seconds = wall_seconds[1:]
+    logger.info('{0}: cold {1:.3f} seconds, warm {2:.3f} seconds, imports'
+                ' {3}'.format(name, wall_seconds[0], min(warm_seconds),
+                              ', '.join(modules) or 'none'))
+
+    return {'entry_path': name,
+            'cold_seconds': wall_seconds[0],
+            'warm_seconds': warm_seconds,
+            'min_seconds': min(warm_seconds),
+            'median_seconds': bench_generate.median(warm_seconds),
+            'slow_modules': modules}
+
+
+def compare_results(results, baseline_filename):
+    """Log the ratio of each result to the latest matching baseline"""
+
+    logger = logging.getLogger(__name__)
+
+    baseline = dict()
+    with open(baseline_filename, 'r') as baseline_fd:
+        for line in baseline_fd:
+            if line.strip():
+                result = json.loads(line)
+                baseline[result['entry_path']] = result
+
+    for result in results:
+        previous = baseline.get(result['entry_path'])
+        if previous is None:
+            logger.info('{0}: no baseline'.format(result['entry_path']))
+            continue
+
+        logger.info('{0}: {1:.3f} seconds, baseline {2:.3f} seconds ({3}),'
+                    ' ratio {4:.2f}'
+                    .format(result['entry_path'], result['min_seconds'],
+                            previous['min_seconds'],
+                            previous.get('git_commit'),
+                            result['min_seconds'] / previous['min_seconds']))
+
+        added = sorted(set(result['slow_modules']) -
+                       set(previous['slow_modules']))
+        if len(added) > 0:
+            logger.warning('{0}: now imports {1}'
+                           .format(result['entry_path'], ', '.join(added)))
+
+
+def main():
+    """Provides the main processing for the script"""
+
+    parser = ArgumentParser(description='Benchmark the startup of each entry'
+                                        ' path')
+
+    parser.add_argument('--work-dir',
+                        action='store',
+                        dest='work_dir',
+                        default=None,
+                        help='directory for the synthetic sources and'
+                             ' inputs, which is kept so the sources are'
+                             ' reused; default is a temporary directory')
+
+    parser.add_argument('--entry-paths',
+                        action='store',
+                        dest='entry_paths',
+                        nargs='+',
+                        choices=ENTRY_PATH_NAMES,
+                        default=ENTRY_PATH_NAMES,
+                        help='entry paths to run; default is all')
+
+    parser.add_argument('--repeat',
+                        action='store',
+                        dest='repeat',
+                        type=int,
+                        default=5,
+                        help='warm runs of each entry path; default is 5')
+
+    parser.add_argument('--results',
+                        action='store',
+                        dest='results_filename',
+                        default=DEFAULT_RESULTS_FILENAME,
+                        help='JSON lines file the results are appended to;'
+                             ' default is {0}'
+                             .format(DEFAULT_RESULTS_FILENAME))
+
+    parser.add_argument('--compare',
+                        action='store',
+                        dest='baseline_filename',
+                        default=None,
+                        help='results file to compare the results with')
+
+    parser.add_argument('--debug',
+                        action='store_true',
+                        dest='debug',
+                        default=False,
+                        help='turn debug logging on')
+
+    args = parser.parse_args()
+
+    logging_level = logging.INFO
+    if args.debug:
+        logging_level = logging.DEBUG
+
+    logging.basicConfig(format=('%(asctime)s.%(msecs)03d %(process)d'
+                                ' %(levelname)-8s'
+                                ' %(filename)s:%(lineno)d:'
+                                '%(funcName)s -- %(message)s'),
+                        datefmt='%Y-%m-%d %H:%M:%S',
+                        level=logging_level,
+                        stream=sys.stdout)
+
+    logger = logging.getLogger(__name__)
+
+    if args.repeat < 1:
+        logger.error('--repeat must be at least 1')
+        sys.exit(1)
+
+    temporary_work_dir = args.work_dir is None
+    work_dir = args.work_dir
+    if temporary_work_dir:
+        work_dir = tempfile.mkdtemp(prefix='espa-elevation-benchmark-')
+    work_dir = os.path.abspath(work_dir)
+
+    try:
+        # The same sources as bench_generate.py, so a work directory can be
+        # shared
+        elevation_dir = os.path.join(work_dir, 'elevation')
+        fixtures.build_elevation_dir(
+            elevation_dir,
+            bench_generate.gls_boxes(bench_generate.DEFAULT_SIZES))
+        os.environ['ESPA_ELEVATION_DIR'] = elevation_dir
+
+        (name, longitude, latitude, has_gls, epsg) = bench_generate.CASES[0]
+        scene = fixtures.Scene(name, longitude, latitude, 1.0)
+        input_dir = os.path.join(work_dir, 'startup', 'input')
+        inputs = {
+            'mtl': bench_generate.write_input(scene, 'mtl', input_dir),
+            'xml': bench_generate.write_input(scene, 'espa', input_dir),
+            'socket': os.path.join(work_dir, 'startup', 'daemon.sock')}
+
+        common = {'timestamp': datetime.datetime.utcnow().isoformat(),
+                  'git_commit': bench_generate.git_commit(),
+                  'hostname': socket.gethostname(),
+                  'python_version': sys.version.split()[0],
+                  'repeat': args.repeat}
+
+        results = list()
+        for entry_path in ENTRY_PATHS:
+            if entry_path[0] not in args.entry_paths:
+                continue
+
+            result = run_entry_path(entry_path, inputs, args, work_dir)
+            result.update(common)
+            results.append(result)
+
+        fixtures.make_dirs(os.path.dirname(
+            os.path.abspath(args.results_filename)))
+        with open(args.results_filename, 'a') as results_fd:
+            for result in results:
+                results_fd.write(json.dumps(result, sort_keys=True))
+                results_fd.write('\n')
+        logger.info('Results appended to {0}'.format(args.results_filename))
+
+        if args.baseline_filename is not None:
+            compare_results(results, args.baseline_filename)
+
+    finally:
+        if temporary_work_dir:
+            shutil.rmtree(work_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -10,21 +10,84 @@ Usage:
 
 import os
 import sys
+import copy
 import commands
 import logging
-import glob
+import fnmatch
 import math
 import datetime
+import json
+import shutil
+import fcntl
+import hashlib
+import contextlib
+import shlex
+import tempfile
+import re
+import importlib
+import functools
+import threading
+import time
+import socket
+import signal
+import SocketServer
 from argparse import ArgumentParser
 
 
-import numpy as np
-from lxml import objectify as objectify
-from osgeo import gdal, osr
+class LazyImport(object):
+    """Imports a module, or an attribute of one, on first use
 
+    Many runs (--help, configuration errors, jobs sent to a worker daemon,
+    and MTL inputs) need few or none of the slow to import modules, so they
+    are only imported by the code paths using them.
+    """
+
+    def __init__(self, module_name, attribute_name=None):
+        """Class initialization
+
+        Args:
+            module_name <str>: Name of the module to import
+            attribute_name <str>: Attribute of the module to provide, if None
+                                  the module itself
+        """
+        super(LazyImport, self).__init__()
+
+        self._module_name = module_name
+        self._attribute_name = attribute_name
+        self._target = None
+
+    def _resolve(self):
+        """Imports the module, the first time"""
+
+        if self._target is None:
+            target = importlib.import_module(self._module_name)
+            if self._attribute_name is not None:
+                target = getattr(target, self._attribute_name)
+            self._target = target
+
+        return self._target
+
+    def __getattr__(self, name):
+        """Provides the attributes of the module"""
+
+        return getattr(self._resolve(), name)
+
+    def __call__(self, *args, **kwargs):
+        """Calls the attribute of the module"""
+
+        return self._resolve()(*args, **kwargs)
+
+
+np = LazyImport('numpy')
+etree = LazyImport('lxml.etree')
+objectify = LazyImport('lxml.objectify')
+gdal = LazyImport('osgeo.gdal')
+osr = LazyImport('osgeo.osr')
+sqlite3 = LazyImport('sqlite3')
+ThreadPool = LazyImport('multiprocessing.pool', 'ThreadPool')
 
-from espa import Metadata
-from espa import ENVIHeader
+Metadata = LazyImport('espa', 'Metadata')
+ENVIHeader = LazyImport('espa', 'ENVIHeader')
 
 
 SOFTWARE_VERSION = 'ELEVATION_2.3.1'
@@ -32,6 +95,169 @@ SOFTWARE_VERSION = 'ELEVATION_2.3.1'
 # Environment variable for the location of the elevation sources
 ESPA_ELEVATION_DIR = 'ESPA_ELEVATION_DIR'
 
+# Environment variable for selecting the warp engine
+ESPA_ELEVATION_WARP_ENGINE = 'ESPA_ELEVATION_WARP_ENGINE'
+
+# Warp using the GDAL Python bindings (requires GDAL >= 2.1) or by executing
+# the GDAL command line tools
+WARP_ENGINE_API = 'api'
+WARP_ENGINE_CLI = 'cli'
+WARP_ENGINES = [WARP_ENGINE_API, WARP_ENGINE_CLI]
+
+# Environment variable for selecting the warp resource profile
+ESPA_ELEVATION_WARP_PROFILE = 'ESPA_ELEVATION_WARP_PROFILE'
+
+# Resources used by every warp.  The memory is in megabytes, the threads are
+# the gdalwarp NUM_THREADS option, the cache is GDAL_CACHEMAX in megabytes,
+# VSI_CACHE enables caching of the source file reads, the error threshold is
+# in pixels (0 uses the exact transformer), and the working type is the data
+# type the resampling is computed in.  None leaves the GDAL default.
+WARP_PROFILE_DEFAULT = 'default'
+WARP_PROFILES = {
+    # Matches the historical -wm 2048 -multi
+    WARP_PROFILE_DEFAULT: {'memory': 2048,
+                           'threads': None,
+                           'cache_max': None,
+                           'vsi_cache': False,
+                           'error_threshold': None,
+                           'working_type': None},
+    # Many jobs sharing a node, one compute thread each
+    'shared': {'memory': 512,
+               'threads': 1,
+               'cache_max': 256,
+               'vsi_cache': False,
+               'error_threshold': None,
+               'working_type': None},
+    # A single large job using the whole node
+    'exclusive': {'memory': 4096,
+                  'threads': 'ALL_CPUS',
+                  'cache_max': 2048,
+                  'vsi_cache': True,
+                  'error_threshold': None,
+                  'working_type': 'Float32'},
+    # Exact transformation, for validating the approximated warps
+    'exact': {'memory': 2048,
+              'threads': 'ALL_CPUS',
+              'cache_max': None,
+              'vsi_cache': False,
+              'error_threshold': 0,
+              'working_type': 'Float64'}
+}
+
+# Environment variable for selecting how tiles are mosaicked
+ESPA_ELEVATION_MOSAIC_FORMAT = 'ESPA_ELEVATION_MOSAIC_FORMAT'
+
+# Mosaic into a virtual raster referencing the tiles, or materialize the
+# mosaic as an ENVI file
+MOSAIC_FORMAT_VRT = 'VRT'
+MOSAIC_FORMAT_ENVI = 'ENVI'
+MOSAIC_FORMATS = [MOSAIC_FORMAT_VRT, MOSAIC_FORMAT_ENVI]
+
+# Environment variable for the directory to create scratch directories in
+ESPA_ELEVATION_SCRATCH_ROOT = 'ESPA_ELEVATION_SCRATCH_ROOT'
+
+# Scratch root which selects tmpfs when the intermediate files fit
+SCRATCH_ROOT_AUTO = 'auto'
+TMPFS_DIR = '/dev/shm'
+
+# Estimated intermediate size, as a multiple of the Int16 output size
+SCRATCH_SIZE_FACTOR = 3
+
+# Environment variable for where the intermediate rasters are kept
+ESPA_ELEVATION_INTERMEDIATE_STORAGE = 'ESPA_ELEVATION_INTERMEDIATE_STORAGE'
+
+# Keep the intermediate rasters in the scratch directory, in the GDAL
+# in-memory filesystem (/vsimem/), or in memory when they are estimated to
+# fit within the memory limit
+INTERMEDIATE_STORAGE_DISK = 'disk'
+INTERMEDIATE_STORAGE_MEMORY = 'memory'
+INTERMEDIATE_STORAGE_AUTO = 'auto'
+INTERMEDIATE_STORAGES = [INTERMEDIATE_STORAGE_DISK,
+                         INTERMEDIATE_STORAGE_MEMORY,
+                         INTERMEDIATE_STORAGE_AUTO]
+
+# Default limit of the estimated in-memory intermediate size
+DEFAULT_INTERMEDIATE_MEMORY_LIMIT = '2G'
+
+# Default number of lines processed at a time for the GEOID adjustment
+DEFAULT_GEOID_BLOCK_LINES = 1024
+
+# Warp the GEOID to every output pixel, or evaluate it on a sparse grid of
+# output pixels and upsample
+GEOID_MODE_WARP = 'warp'
+GEOID_MODE_GRID = 'grid'
+GEOID_MODES = [GEOID_MODE_WARP, GEOID_MODE_GRID]
+
+# Default spacing in output pixels of the sparse GEOID grid
+DEFAULT_GEOID_GRID_STEP = 64
+
+# Default number of tiles staged concurrently
+DEFAULT_STAGING_WORKERS = 4
+
+# Formats of the elevation product
+OUTPUT_FORMAT_ENVI = 'envi'
+OUTPUT_FORMAT_COG = 'cog'
+OUTPUT_FORMATS = [OUTPUT_FORMAT_ENVI, OUTPUT_FORMAT_COG]
+
+# Tile size and lowest overview size of the cloud optimized GeoTIFF
+COG_BLOCK_SIZE = 512
+
+# GDAL configuration options while reading the GTOPO30 archives.  Seeking
+# within the compressed archives requires an index, which GDAL would
+# otherwise try to write beside the read-only source archives.
+GTOPO30_CONFIG_OPTIONS = {'CPL_VSIL_GZIP_WRITE_PROPERTIES': 'NO'}
+
+# Environment variables for the node-local cache of the elevation sources
+ESPA_ELEVATION_CACHE_DIR = 'ESPA_ELEVATION_CACHE_DIR'
+ESPA_ELEVATION_CACHE_SIZE = 'ESPA_ELEVATION_CACHE_SIZE'
+
+# Environment variable for the size of the cache of warped GEOID grids, which
+# is kept below ESPA_ELEVATION_CACHE_DIR
+ESPA_ELEVATION_GEOID_CACHE_SIZE = 'ESPA_ELEVATION_GEOID_CACHE_SIZE'
+
+# Environment variable for the size of the cache of elevation products, which
+# is kept below ESPA_ELEVATION_CACHE_DIR
+ESPA_ELEVATION_PRODUCT_CACHE_SIZE = 'ESPA_ELEVATION_PRODUCT_CACHE_SIZE'
+
+# Environment variable for the directory of elevation stores pre-warped to
+# standard output grids
+ESPA_ELEVATION_GRID_STORE_DIR = 'ESPA_ELEVATION_GRID_STORE_DIR'
+
+# Tolerance in pixels when aligning an output grid with a grid store
+GRID_STORE_ALIGNMENT_TOLERANCE = 0.001
+
+# Environment variable naming a local copy of the ESPA metadata schema, as
+# used by the espa library
+ESPA_SCHEMA = 'ESPA_SCHEMA'
+
+# Environment variable for how the XML is validated once the elevation band
+# is appended
+ESPA_ELEVATION_XML_VALIDATION = 'ESPA_ELEVATION_XML_VALIDATION'
+
+# Validate the whole XML, or only the appended elevation band
+XML_VALIDATION_FULL = 'full'
+XML_VALIDATION_BAND = 'band'
+XML_VALIDATIONS = [XML_VALIDATION_FULL, XML_VALIDATION_BAND]
+
+XSD_NAMESPACE = 'http://www.w3.org/2001/XMLSchema'
+XSI_SCHEMA_LOCATION = ('{http://www.w3.org/2001/XMLSchema-instance}'
+                       'schemaLocation')
+
+# Environment variable for the Unix socket of a worker daemon, which runs the
+# jobs of this command when defined
+ESPA_ELEVATION_SERVER = 'ESPA_ELEVATION_SERVER'
+
+# Seconds the worker daemon waits for a job before checking for termination
+SERVER_POLL_SECONDS = 0.5
+
+# Prefix of the environment variables a client sends with each job, which
+# the worker daemon applies to that job in place of its own
+JOB_ENVIRONMENT_PREFIX = 'ESPA_'
+
+# Environment variable for the file holding the index of the GLS tiles, which
+# defaults to below ESPA_ELEVATION_CACHE_DIR when that is defined
+ESPA_ELEVATION_GLS_INDEX = 'ESPA_ELEVATION_GLS_INDEX'
+
 
 class GeoError(Exception):
     """Exception to capture errors from the Geo class"""
@@ -99,18 +325,221 @@ class Geo(object):
 
         return proj4
 
+    @staticmethod
+    def is_same_srs(srs_a, srs_b):
+        """Determine if two proj4 projection strings are equivalent
+
+        Args:
+            srs_a <str>: Proj4 projection string
+            srs_b <str>: Proj4 projection string
+
+        Returns:
+            <bool>: True if the projections are the same
+        """
+
+        if srs_a == srs_b:
+            return True
+
+        osr_a = osr.SpatialReference()
+        osr_b = osr.SpatialReference()
+        if (osr_a.ImportFromProj4(srs_a) != 0 or
+                osr_b.ImportFromProj4(srs_b) != 0):
+            return False
+
+        return bool(osr_a.IsSame(osr_b))
+
+    @staticmethod
+    def get_warp_engine():
+        """Determine the engine to use for warping
+
+        The engine is taken from the environment, defaulting to the GDAL
+        Python bindings.  The command line tools are used when requested or
+        when the bindings are too old to provide the warp API.
+
+        Returns:
+            <str>: WARP_ENGINE_API or WARP_ENGINE_CLI
+        """
+
+        logger = logging.getLogger(__name__)
+
+        engine = os.environ.get(ESPA_ELEVATION_WARP_ENGINE, WARP_ENGINE_API)
+        if engine not in WARP_ENGINES:
+            raise GeoError('Unsupported warp engine [{0}] specified by {1}'
+                           .format(engine, ESPA_ELEVATION_WARP_ENGINE))
+
+        if engine == WARP_ENGINE_API and not hasattr(gdal, 'Warp'):
+            logger.warning('GDAL Python bindings do not support warping,'
+                           ' using the command line tools')
+            engine = WARP_ENGINE_CLI
+
+        return engine
+
+    @staticmethod
+    def get_warp_profile(profile_name=None):
+        """Determine the resources to use for warping
+
+        Args:
+            profile_name <str>: Name of the profile, if None the profile is
+                                taken from the environment
+
+        Returns:
+            <dict>: The warp profile
+        """
+
+        if profile_name is None:
+            profile_name = os.environ.get(ESPA_ELEVATION_WARP_PROFILE,
+                                          WARP_PROFILE_DEFAULT)
+        if profile_name not in WARP_PROFILES:
+            raise GeoError('Unsupported warp profile [{0}] specified'
+                           .format(profile_name))
+
+        profile = dict(WARP_PROFILES[profile_name])
+        profile['name'] = profile_name
+
+        return profile
+
+    @staticmethod
+    @contextlib.contextmanager
+    def config_options(options):
+        """Applies GDAL configuration options to the GDAL API
+
+        The previous settings are restored afterwards.
+
+        Args:
+            options <dict>: Values of the configuration options, by name
+        """
+
+        previous = dict((name, gdal.GetConfigOption(name))
+                        for name in options)
+
+        for (name, value) in options.items():
+            gdal.SetConfigOption(name, value)
+
+        try:
+            yield
+        finally:
+            for (name, value) in previous.items():
+                gdal.SetConfigOption(name, value)
+
+    @staticmethod
+    def config_arguments(options):
+        """Generates the GDAL command line arguments for configuration options
+
+        Args:
+            options <dict>: Values of the configuration options, by name, or
+                            None for no options
+
+        Returns:
+            <list:str>: The --config arguments
+        """
+
+        arguments = list()
+        if options is not None:
+            for name in sorted(options):
+                arguments.extend(['--config', name, options[name]])
+
+        return arguments
+
+    @staticmethod
+    @contextlib.contextmanager
+    def warp_resources(profile):
+        """Applies the cache settings of a warp profile to the GDAL API
+
+        The previous settings are restored afterwards.
+
+        Args:
+            profile <dict>: The warp profile
+        """
+
+        previous_cache_max = gdal.GetCacheMax()
+        previous_vsi_cache = gdal.GetConfigOption('VSI_CACHE')
+
+        if profile['cache_max'] is not None:
+            gdal.SetCacheMax(profile['cache_max'] * 1024 * 1024)
+        if profile['vsi_cache']:
+            gdal.SetConfigOption('VSI_CACHE', 'TRUE')
+
+        try:
+            yield
+        finally:
+            gdal.SetCacheMax(previous_cache_max)
+            gdal.SetConfigOption('VSI_CACHE', previous_vsi_cache)
+
+    @staticmethod
+    def remove_file(filename):
+        """Removes a file, which may be in the GDAL in-memory filesystem
+
+        Args:
+            filename <str>: Path to the file
+        """
+
+        if filename.startswith('/vsimem/'):
+            if gdal.Unlink(filename) != 0:
+                raise GeoError('GDAL failed to remove ({0})'
+                               .format(filename))
+        else:
+            os.unlink(filename)
+
+    @staticmethod
+    def get_dataset_name(source):
+        """Provides the filename for a source which may be an open dataset
+
+        Args:
+            source <str or gdal.Dataset>: Filename or open GDAL dataset
+
+        Returns:
+            <str>: The filename of the source
+        """
+
+        if isinstance(source, basestring):
+            return source
+
+        return source.GetDescription()
+
+    @staticmethod
+    def progress_callback(description):
+        """Creates a GDAL progress callback which logs every 10 percent
+
+        Args:
+            description <str>: Text to identify the operation in the log
+
+        Returns:
+            <function>: Callback suitable for the GDAL utility functions
+        """
+
+        logger = logging.getLogger(__name__)
+
+        reported = [-1]
+
+        def callback(complete, message, user_data):
+            """Log the progress reported by GDAL"""
+
+            percent = int(complete * 100) // 10 * 10
+            if percent > reported[0]:
+                reported[0] = percent
+                logger.debug('{0} {1}%'.format(description, percent))
+
+            # Non-zero tells GDAL to continue
+            return 1
+
+        return callback
+
     @staticmethod
     def warp(resampling_method=None,
              resolution_x=None,
              resolution_y=None,
              target_srs=None,
+             source_srs=None,
              image_extents=None,
              destination_no_data=None,
              output_data_type=None,
              output_format=None,
              source_data=None,
-             output_filename=None):
-        """Generates a gdalwarp command line and executes it
+             output_filename=None,
+             engine=None,
+             profile=None,
+             config_options=None):
+        """Warps the source data using either the GDAL API or gdalwarp
 
         Args:
             resampling_method <str>: gdalwarp defined
@@ -118,28 +547,178 @@ class Geo(object):
             resolution_y <float>: Resoultion to make the output
             target_srs <str>: Target projection (gdal compliant proj4
                               projection string)
+            source_srs <str>: Projection to assume for the source data,
+                              when the source data does not provide one
             images_extents <dict>: Contains the min and max subset window
             destination_no_data <float>: No data value for the output
             output_data_type <str>: gdalwarp defined
             output_format <str>: gdalwarp defined
-            source_data <str>: Path to the source data
+            source_data <str, gdal.Dataset, or list>: Path(s) to the source
+                                                      data or open datasets
             output_filename <str>: Path to the output filename
+            engine <str>: WARP_ENGINE_API or WARP_ENGINE_CLI, if None the
+                          engine is determined from the environment
+            profile <dict>: Warp resources from Geo.get_warp_profile, if
+                            None the profile is determined from the
+                            environment
+            config_options <dict>: GDAL configuration options for the warp,
+                                   by name
+        """
+
+        # Add resolution
+        if ((resolution_x is not None and resolution_y is None) or
+                (resolution_x is None and resolution_y is not None)):
+            raise GeoError('Must specify both X and Y resolution for warping')
+
+        # Add the source data
+        if source_data is None:
+            raise GeoError('Must provide source data')
+
+        if type(source_data) is not list:
+            source_data = [source_data]
+
+        # Add the output filename
+        if output_filename is None:
+            raise GeoError('Must provide the output filename')
+
+        if engine is None:
+            engine = Geo.get_warp_engine()
+
+        if profile is None:
+            profile = Geo.get_warp_profile()
+
+        if engine == WARP_ENGINE_API:
+            Geo._warp_using_api(resampling_method, resolution_x, resolution_y,
+                                target_srs, source_srs, image_extents,
+                                destination_no_data, output_data_type,
+                                output_format, source_data, output_filename,
+                                profile, config_options)
+        else:
+            Geo._warp_using_cli(resampling_method, resolution_x, resolution_y,
+                                target_srs, source_srs, image_extents,
+                                destination_no_data, output_data_type,
+                                output_format, source_data, output_filename,
+                                profile, config_options)
+
+    @staticmethod
+    def _warp_using_api(resampling_method, resolution_x, resolution_y,
+                        target_srs, source_srs, image_extents,
+                        destination_no_data,
+                        output_data_type, output_format, source_data,
+                        output_filename, profile, config_options):
+        """Warps in-process using gdal.Warp
+
+        See Geo.warp for the arguments.  Open datasets in the source data
+        are used directly, which avoids re-opening them.
+        """
+
+        logger = logging.getLogger(__name__)
+
+        options = dict()
+        options['warpMemoryLimit'] = profile['memory']
+        options['multithread'] = True
+
+        if profile['threads'] is not None:
+            options['warpOptions'] = ['NUM_THREADS={0}'
+                                      .format(profile['threads'])]
+
+        if profile['error_threshold'] is not None:
+            options['errorThreshold'] = profile['error_threshold']
+
+        if profile['working_type'] is not None:
+            options['workingType'] = gdal.GetDataTypeByName(
+                profile['working_type'])
+
+        if resampling_method is not None:
+            options['resampleAlg'] = resampling_method
+
+        if resolution_x is not None and resolution_y is not None:
+            options['xRes'] = resolution_x
+            options['yRes'] = resolution_y
+
+        if target_srs is not None:
+            options['dstSRS'] = target_srs
+
+        if source_srs is not None:
+            options['srcSRS'] = source_srs
+
+        if image_extents is not None:
+            options['outputBounds'] = (image_extents['min_x'],
+                                       image_extents['min_y'],
+                                       image_extents['max_x'],
+                                       image_extents['max_y'])
+
+        if destination_no_data is not None:
+            options['dstNodata'] = destination_no_data
+
+        if output_data_type is not None:
+            options['outputType'] = gdal.GetDataTypeByName(output_data_type)
+
+        if output_format is not None:
+            options['format'] = output_format
+
+        options['callback'] = Geo.progress_callback(
+            'WARP {0}'.format(output_filename))
+
+        logger.info('EXECUTING WARP [{0}] -> [{1}] WITH PROFILE {2}'
+                    .format(', '.join([Geo.get_dataset_name(source)
+                                       for source in source_data]),
+                            output_filename, profile['name']))
+
+        with Geo.warp_resources(profile), \
+                Geo.config_options(config_options or dict()):
+            gdal.ErrorReset()
+            warp_options = gdal.WarpOptions(**options)
+            output_ds = gdal.Warp(output_filename, source_data,
+                                  options=warp_options)
+            if output_ds is None:
+                raise GeoError('GDAL failed to warp ({0}): {1}'
+                               .format(output_filename,
+                                       gdal.GetLastErrorMsg()))
+
+            # Flush and close the output
+            del output_ds
+
+    @staticmethod
+    def _warp_using_cli(resampling_method, resolution_x, resolution_y,
+                        target_srs, source_srs, image_extents,
+                        destination_no_data,
+                        output_data_type, output_format, source_data,
+                        output_filename, profile, config_options):
+        """Generates a gdalwarp command line and executes it
+
+        See Geo.warp for the arguments.
         """
 
         logger = logging.getLogger(__name__)
 
         # Base Command
-        cmd = ['gdalwarp', '-wm', '2048', '-multi', '-overwrite']
+        cmd = ['gdalwarp', '-wm', str(profile['memory']), '-multi',
+               '-overwrite']
+
+        # Add the resources of the profile
+        if profile['threads'] is not None:
+            cmd.extend(['-wo', 'NUM_THREADS={0}'.format(profile['threads'])])
+
+        if profile['cache_max'] is not None:
+            cmd.extend(['--config', 'GDAL_CACHEMAX',
+                        str(profile['cache_max'])])
+
+        if profile['vsi_cache']:
+            cmd.extend(['--config', 'VSI_CACHE', 'TRUE'])
+
+        cmd.extend(Geo.config_arguments(config_options))
+
+        if profile['error_threshold'] is not None:
+            cmd.extend(['-et', str(profile['error_threshold'])])
+
+        if profile['working_type'] is not None:
+            cmd.extend(['-wt', profile['working_type']])
 
         # Add resampling
         if resampling_method is not None:
             cmd.extend(['-r', resampling_method])
 
-        # Add resolution
-        if ((resolution_x is not None and resolution_y is None) or
-                (resolution_x is None and resolution_y is not None)):
-            raise GeoError('Must specify both X and Y resolution for warping')
-
         if resolution_x is not None and resolution_y is not None:
             cmd.extend(['-tr', str(resolution_x), str(resolution_y)])
 
@@ -147,6 +726,10 @@ class Geo(object):
         if target_srs is not None:
             cmd.extend(['-t_srs', ''.join(['"', target_srs, '"'])])
 
+        # Add source projection
+        if source_srs is not None:
+            cmd.extend(['-s_srs', ''.join(['"', source_srs, '"'])])
+
         # Add image extents
         if image_extents is not None:
             cmd.extend(['-te',
@@ -168,17 +751,7 @@ class Geo(object):
             cmd.extend(['-of', output_format])
 
         # Add the source data
-        if source_data is None:
-            raise GeoError('Must provide source data')
-
-        if type(source_data) is list:
-            cmd.extend(source_data)
-        else:
-            cmd.append(source_data)
-
-        # Add the output filename
-        if output_filename is None:
-            raise GeoError('Must provide the output filename')
+        cmd.extend([Geo.get_dataset_name(source) for source in source_data])
 
         cmd.append(output_filename)
 
@@ -193,1216 +766,4252 @@ class Geo(object):
             if len(output) > 0:
                 logger.info(output)
 
-
-class MathError(Exception):
-    """Exception to capture errors from the Math class"""
-    pass
-
-
-class Math(object):
-    """Provides methods for mathematical algorithms"""
-
     @staticmethod
-    def point_in_polygon(vertices, x_c, y_c):
-        """Determines if a given point is within a closed polygon
-
-        Algorithm:
-            Based on W. Randolph Franklin's algorithm:
-                http://www.ecse.rpi.edu
-                /Homepages/wrf/Research/Short_Notes/pnpoly.html
+    def build_vrt(source_data, output_filename, vrt_no_data=None,
+                  hide_no_data=False, output_srs=None, engine=None,
+                  config_options=None):
+        """Builds a virtual raster (VRT) mosaic of the source data
 
-            See also the Wikipedia page:
-                http://eni.wikipedia.org
-                /wiki/Point_in_polygon
+        No pixel data is copied, the VRT only references the sources.
 
         Args:
-            vertices <list:x,list:y>: Contains a list of X and Y closed
-                                      polygon vertices
-            x_c <float>: X coordinate to test against the polygon
-            y_c <float>: Y coordinate to test against the polygon
-
-        Notes:
-            Derived from Landsat IAS code, which is based on above algorithm.
-            A closed list is expected.  Where v[N] = v[0]
-            The polygon is always expected to be clock-wise segments.
+            source_data <list>: Paths to the source data or open datasets
+            output_filename <str>: Path to the output VRT filename
+            vrt_no_data <float>: No data value for the VRT band, which is
+                                 also used to fill areas without sources
+            hide_no_data <bool>: Do not report the no data value for the VRT
+                                 band, so the fill is treated as valid data
+            output_srs <str>: Projection to assign to the VRT, when the
+                              source data does not provide one
+            engine <str>: WARP_ENGINE_API or WARP_ENGINE_CLI, if None the
+                          engine is determined from the environment
+            config_options <dict>: GDAL configuration options for building
+                                   the VRT, by name
         """
 
-        count = len(vertices)
-        if count < 4:
-            raise MathError('Insufficient Line Segments')
+        logger = logging.getLogger(__name__)
 
-        # Convert to x and y lists
-        (x_v, y_v) = map(list, zip(*vertices))
+        if engine is None:
+            engine = Geo.get_warp_engine()
+
+        if engine == WARP_ENGINE_API:
+            logger.info('EXECUTING BUILD VRT [{0}] -> [{1}]'
+                        .format(', '.join([Geo.get_dataset_name(source)
+                                           for source in source_data]),
+                                output_filename))
+
+            options = dict()
+            if vrt_no_data is not None:
+                options['VRTNodata'] = vrt_no_data
+            options['hideNodata'] = hide_no_data
+            if output_srs is not None:
+                options['outputSRS'] = output_srs
+
+            with Geo.config_options(config_options or dict()):
+                gdal.ErrorReset()
+                output_ds = gdal.BuildVRT(output_filename, source_data,
+                                          **options)
+                if output_ds is None:
+                    raise GeoError('GDAL failed to build VRT ({0}): {1}'
+                                   .format(output_filename,
+                                           gdal.GetLastErrorMsg()))
+
+                # Flush and close the output
+                del output_ds
+            return
 
-        if x_v[0] != x_v[count - 1] and y_v[0] != y_v[count - 1]:
-            raise MathError('Not A Closed Polygon Vertex List')
+        # Set up the base command
+        cmd = ['gdalbuildvrt', '-overwrite']
+        cmd.extend(Geo.config_arguments(config_options))
 
-        # Start off by saying outside the polygon
-        inside_polygon = False
+        if vrt_no_data is not None:
+            cmd.extend(['-vrtnodata', str(vrt_no_data)])
 
-        # Test each segment
-        for index in xrange(count - 1):
-            if (((x_v[index] > x_c) != (x_v[index + 1] > x_c)) and
-                    (y_c < ((y_v[index + 1] - y_v[index]) *
-                            (x_c - x_v[index]) /
-                            (x_v[index + 1] - x_v[index]) +
-                            y_v[index]))):
+        if hide_no_data:
+            cmd.append('-hidenodata')
 
-                inside_polygon = not inside_polygon
+        if output_srs is not None:
+            cmd.extend(['-a_srs', ''.join(['"', output_srs, '"'])])
 
-        return inside_polygon
+        # Provide the sources through a file, so the command line length
+        # does not grow with the number of sources
+        file_list_name = '{0}.list'.format(output_filename)
+        with open(file_list_name, 'w') as list_fd:
+            for source in source_data:
+                list_fd.write('{0}\n'.format(Geo.get_dataset_name(source)))
+        cmd.extend(['-input_file_list', file_list_name])
+
+        cmd.append(output_filename)
+
+        # Convert to a string for the execution
+        cmd = ' '.join(cmd)
+
+        output = ''
+        try:
+            logger.info('EXECUTING BUILD VRT COMMAND [{0}]'.format(cmd))
+            output = execute_cmd(cmd)
+        finally:
+            os.unlink(file_list_name)
+            if len(output) > 0:
+                logger.info(output)
 
     @staticmethod
-    def longitude_norm(longitude):
-        """Calculates the "canonical longitude" for the longitude value
+    def translate(source, output_filename, output_format=None, bounds=None,
+                  window=None, creation_options=None, no_data=None,
+                  engine=None, config_options=None):
+        """Copies the source, optionally subsetting or re-georeferencing it
 
-        Args:
-            longitude <float>: Decimal degrees for the longitude
+        Equivalent to gdal_translate with -of, -a_ullr, -srcwin, -co, and
+        -a_nodata.  With the VRT output format no pixel data is copied.
 
-        Returns:
-            result <float>: Equivalent longitude value in the range
-                            (-180.0, 180.0) degrees
+        Args:
+            source <str or gdal.Dataset>: Path to the source or open dataset
+            output_filename <str>: Path to the output filename
+            output_format <str>: gdal_translate defined
+            bounds <list:float>: Upper left X, upper left Y, lower right X,
+                                 and lower right Y to assign
+            window <list:int>: X offset, Y offset, X size, and Y size of the
+                               source pixel window to copy
+            creation_options <list:str>: NAME=VALUE options for the output
+                                         format
+            no_data <float>: No data value to assign to the output
+            engine <str>: WARP_ENGINE_API or WARP_ENGINE_CLI, if None the
+                          engine is determined from the environment
+            config_options <dict>: GDAL configuration options for the
+                                   translation, by name
         """
 
-        result = longitude
+        logger = logging.getLogger(__name__)
 
-        while result < -180.0:
-            result += 360.0
+        if engine is None:
+            engine = Geo.get_warp_engine()
+
+        if engine == WARP_ENGINE_API:
+            logger.info('EXECUTING TRANSLATE [{0}] -> [{1}]'
+                        .format(Geo.get_dataset_name(source),
+                                output_filename))
+
+            options = dict()
+            if output_format is not None:
+                options['format'] = output_format
+            if bounds is not None:
+                options['outputBounds'] = bounds
+            if window is not None:
+                options['srcWin'] = window
+            if creation_options is not None:
+                options['creationOptions'] = creation_options
+            if no_data is not None:
+                options['noData'] = no_data
+
+            with Geo.config_options(config_options or dict()):
+                gdal.ErrorReset()
+                output_ds = gdal.Translate(output_filename, source,
+                                           **options)
+                if output_ds is None:
+                    raise GeoError('GDAL failed to translate ({0}): {1}'
+                                   .format(output_filename,
+                                           gdal.GetLastErrorMsg()))
+
+                # Flush and close the output
+                del output_ds
+            return
 
-        while result >= 180.0:
-            result -= 360.0
-
-        return result
+        # Set up the base command
+        cmd = ['gdal_translate']
+        cmd.extend(Geo.config_arguments(config_options))
 
+        if output_format is not None:
+            cmd.extend(['-of', output_format])
 
-def execute_cmd(cmd):
-    """Execute a command line
+        # Add updated coordinates to the command
+        if bounds is not None:
+            cmd.append('-a_ullr')
+            cmd.extend([str(value) for value in bounds])
 
-    The specified command line is executed and the terminal output is returned
-    or an exception is raised.
+        # Add the source window to the command
+        if window is not None:
+            cmd.append('-srcwin')
+            cmd.extend([str(value) for value in window])
 
-    Returns:
-        output (str): The stdout and/or stderr from the executed command.
-    """
+        if creation_options is not None:
+            for creation_option in creation_options:
+                cmd.extend(['-co', creation_option])
 
-    output = ''
+        if no_data is not None:
+            cmd.extend(['-a_nodata', str(no_data)])
 
-    (status, output) = commands.getstatusoutput(cmd)
+        # Add source and destination files to the command
+        cmd.extend([Geo.get_dataset_name(source), output_filename])
 
-    if status < 0:
-        message = 'Application terminated by signal [{0}]'.format(cmd)
-        if len(output) > 0:
-            message = ' Stdout/Stderr is: '.join([message, output])
-        raise Exception(message)
+        # Convert to a string for the execution
+        cmd = ' '.join(cmd)
 
-    if status != 0:
-        message = 'Application failed to execute [{0}]'.format(cmd)
-        if len(output) > 0:
-            message = ' Stdout/Stderr is: '.join([message, output])
-        raise Exception(message)
+        output = ''
+        try:
+            logger.info('EXECUTING TRANSLATE COMMAND [{0}]'.format(cmd))
+            output = execute_cmd(cmd)
+        finally:
+            if len(output) > 0:
+                logger.info(output)
 
-    if os.WEXITSTATUS(status) != 0:
-        message = ('Application [{0}] returned error code [{1}]'
-                   .format(cmd, os.WEXITSTATUS(status)))
-        if len(output) > 0:
-            message = ' Stdout/Stderr is: '.join([message, output])
-        raise Exception(message)
+    @staticmethod
+    def get_overview_levels(lines, samples, block_size):
+        """Determine the overview levels down to about one block
 
-    return output
+        Overviews are added until the smallest one fits within a block.
 
+        Args:
+            lines <int>: Number of lines of the full resolution image
+            samples <int>: Number of samples of the full resolution image
+            block_size <int>: Tile size of the image
 
-class RAMPCoverageError(Exception):
-    """Exception to capture RAMP data not covering the input data"""
-    pass
+        Returns:
+            <list:int>: The decimation factor of each overview
+        """
 
+        levels = list()
+        level = 2
+        while max(lines, samples) // (level // 2) > block_size:
+            levels.append(level)
+            level *= 2
 
-class GLSOverWaterError(Exception):
-    """Exception to capture when GLS data is over water"""
-    pass
+        return levels
 
+    @staticmethod
+    def build_overviews(source_filename, levels, resampling_method,
+                        engine=None):
+        """Builds external overviews (.ovr) of the source
 
-class BaseElevation(object):
-    """Defines the base class object for elevation generation/processing"""
+        Equivalent to gdaladdo -ro, so the source is not modified.
 
-    def __init__(self, elevation_filename):
-        """Class initialization
         Args:
-        elevation_filename - allows the user to specify the output filename
-                             for the elevation band; if None then the default
-                             filename is used
+            source_filename <str>: Path to the source
+            levels <list:int>: The decimation factor of each overview
+            resampling_method <str>: gdaladdo defined
+            engine <str>: WARP_ENGINE_API or WARP_ENGINE_CLI, if None the
+                          engine is determined from the environment
         """
-        super(BaseElevation, self).__init__()
 
-        self.xml_filename = None
-        self.number_of_lines = None
-        self.number_of_samples = None
-        self.pixel_units = None
+        logger = logging.getLogger(__name__)
 
-        # Grab what we need from the environment first
-        if ESPA_ELEVATION_DIR not in os.environ:
-            raise RuntimeError('{0} environment variable not defined'
-                               .format(ESPA_ELEVATION_DIR))
-        self.espa_elevation_dir = os.environ.get(ESPA_ELEVATION_DIR)
+        if engine is None:
+            engine = Geo.get_warp_engine()
+
+        if engine == WARP_ENGINE_API:
+            logger.info('EXECUTING BUILD OVERVIEWS [{0}] {1}'
+                        .format(source_filename, levels))
+
+            gdal.ErrorReset()
+            source_ds = gdal.Open(source_filename, gdal.GA_ReadOnly)
+            if source_ds is None:
+                raise GeoError('GDAL failed to open ({0}): {1}'
+                               .format(source_filename,
+                                       gdal.GetLastErrorMsg()))
+
+            status = source_ds.BuildOverviews(
+                resampling_method.upper(), levels,
+                callback=Geo.progress_callback(
+                    'OVERVIEWS {0}'.format(source_filename)))
+            del source_ds
+            if status != 0:
+                raise GeoError('GDAL failed to build overviews ({0}): {1}'
+                               .format(source_filename,
+                                       gdal.GetLastErrorMsg()))
+            return
+
+        cmd = ['gdaladdo', '-ro', '-r', resampling_method, source_filename]
+        cmd.extend([str(level) for level in levels])
 
-        # Padding to add to the max box (degrees)
-        self.maxbox_padding = 0.2
+        # Convert to a string for the execution
+        cmd = ' '.join(cmd)
 
-        # Latitude coordinate limits
-        self.north_latitude_limit = 90.0
-        self.south_latitude_limit = -90.0
-        # Longitude coordinate limits
-        self.east_longitude_limit = 180.0
-        self.west_longitude_limit = -180.0
+        output = ''
+        try:
+            logger.info('EXECUTING BUILD OVERVIEWS COMMAND [{0}]'.format(cmd))
+            output = execute_cmd(cmd)
+        finally:
+            if len(output) > 0:
+                logger.info(output)
 
-        # GLS latitude coordinate limits
-        self.glsdem_north_limit = 83.0
-        self.glsdem_south_limit = -53.0
 
-        # RAMP lat coordinate limits
-        # Defines when we start to use RAMP data
-        self.ramp_south_limit = -60.0
+class MathError(Exception):
+    """Exception to capture errors from the Math class"""
+    pass
 
-        # WGS84 GEOID Adjustment Information
-        self.wgs84_dir = 'geoid'
-        self.wgs84_header_name = 'geoid.hdr'
-        self.wgs84_image_name = 'geoid.img'
 
-        self.wgs84_header_path = os.path.join(self.espa_elevation_dir,
-                                              self.wgs84_dir,
-                                              self.wgs84_header_name)
-        self.wgs84_image_path = os.path.join(self.espa_elevation_dir,
-                                             self.wgs84_dir,
-                                             self.wgs84_image_name)
+class Math(object):
+    """Provides methods for mathematical algorithms"""
 
-        # RAMP Information
-        self.ramp_dir = 'ramp'
-        self.ramp_header_name = 'ramp200dem_wgs_v2.hdr'
-        self.ramp_image_name = 'ramp200dem_wgs_v2.img'
+    @staticmethod
+    def point_in_polygon(vertices, x_c, y_c):
+        """Determines if a given point is within a closed polygon
 
-        self.ramp_header_path = os.path.join(self.espa_elevation_dir,
-                                             self.ramp_dir,
-                                             self.ramp_header_name)
-        self.ramp_image_path = os.path.join(self.espa_elevation_dir,
-                                            self.ramp_dir,
-                                            self.ramp_image_name)
+        Algorithm:
+            Based on W. Randolph Franklin's algorithm:
+                http://www.ecse.rpi.edu
+                /Homepages/wrf/Research/Short_Notes/pnpoly.html
 
-        # GLS Information
-        self.gls_dir = 'gls'
-        self.gls_projection_template = 'gls_projection.prj'
+            See also the Wikipedia page:
+                http://eni.wikipedia.org
+                /wiki/Point_in_polygon
 
-        # GTOPT30 Information
-        self.gtopo30_dir = 'gtopo30'
-        self.gtopo30_dems_regexp = '[EW]???[NS]??.DEM'
-        self.gtopo30_files_regexp = '[EW]???[NS]??.*'
-        self.gtopo30_padding = 1.0  # Degrees, since we are in geographic
+        Args:
+            vertices <list:x,list:y>: Contains a list of X and Y closed
+                                      polygon vertices
+            x_c <float>: X coordinate to test against the polygon
+            y_c <float>: Y coordinate to test against the polygon
 
-        # Elevation format and naming. If the output elevation filename was
-        # specified then use it otherwise use the default filename.
-        self.elevation_format = 'ENVI'
-        self.elevation_type_int16 = 'Int16'
-        if elevation_filename is None:
-            self.elevation_image_name_fmt = '{0}_elevation.img'
-            self.elevation_header_name_fmt = '{0}_elevation.hdr'
-        else:
-            self.elevation_image_name_fmt = elevation_filename
-            self.elevation_header_name_fmt = elevation_filename.  \
-                                            replace('.img', '.hdr')
+        Notes:
+            Derived from Landsat IAS code, which is based on above algorithm.
+            A closed list is expected.  Where v[N] = v[0]
+            The polygon is always expected to be clock-wise segments.
+        """
 
-        # Landsat uses bi-linear for all elevation warping
-        self.elevation_resampling_method = 'bilinear'
+        count = len(vertices)
+        if count < 4:
+            raise MathError('Insufficient Line Segments')
 
-        # MOSAIC Filenames
-        self.mosaic_header_name = 'espa-mosaic-elevation.hdr'
-        self.mosaic_image_name = 'espa-mosaic-elevation.img'
+        # Convert to x and y lists
+        (x_v, y_v) = map(list, zip(*vertices))
 
-        # GDAL AUX files to remove
-        self.gdal_aux_regexp = '*.img.aux.xml'
+        if x_v[0] != x_v[count - 1] and y_v[0] != y_v[count - 1]:
+            raise MathError('Not A Closed Polygon Vertex List')
 
-        # Initialize the following to something bad
-        self.bounding_north_latitude = -9999.0
-        self.bounding_south_latitude = 9999.0
-        self.bounding_east_longitude = -9999.0
-        self.bounding_west_longitude = 9999.0
+        # Start off by saying outside the polygon
+        inside_polygon = False
 
-        self.min_x_extent = None
-        self.max_y_extent = None
-        self.max_x_extent = None
-        self.min_y_extent = None
-        self.grid_origin = 'undefined'
+        # Test each segment
+        for index in xrange(count - 1):
+            if (((x_v[index] > x_c) != (x_v[index + 1] > x_c)) and
+                    (y_c < ((y_v[index + 1] - y_v[index]) *
+                            (x_c - x_v[index]) /
+                            (x_v[index + 1] - x_v[index]) +
+                            y_v[index]))):
 
-        self.pixel_resolution_x = None
-        self.pixel_resolution_y = None
+                inside_polygon = not inside_polygon
 
-        self.target_srs = None
+        return inside_polygon
 
-        self.elevation_header_name = None
-        self.elevation_image_name = None
+    @staticmethod
+    def longitude_norm(longitude):
+        """Calculates the "canonical longitude" for the longitude value
 
-    def parse_metadata(self):
-        """Implement this to parse the metadata file"""
-        raise NotImplementedError('Please Implement Me In {0}'
-                                  .format(str(type(self))))
+        Args:
+            longitude <float>: Decimal degrees for the longitude
 
-    def mosaic_tiles(self, tiles):
-        """MOSAIC the specified tiles into one file"""
+        Returns:
+            result <float>: Equivalent longitude value in the range
+                            (-180.0, 180.0) degrees
+        """
 
-        '''
-        Set the no data value to 0 so we fill-in with sea-level,
-        because missing tiles in GLS will be water(ocean)
-        NOTE - This is abusing GDAL, which does not correctly
-               output ENVI headers.  The header fixing code, should
-               be taking care of it.
-        '''
-        Geo.warp(destination_no_data=0,
-                 output_data_type=self.elevation_type_int16,
-                 output_format=self.elevation_format,
-                 source_data=tiles,
-                 output_filename=self.mosaic_image_name)
+        result = longitude
 
-    def mosaic_cleanup(self):
-        """Remove the MOSAIC files"""
+        while result < -180.0:
+            result += 360.0
 
-        os.unlink(self.mosaic_header_name)
-        os.unlink(self.mosaic_image_name)
+        while result >= 180.0:
+            result -= 360.0
 
-    def warp_to_source_data(self, source_name):
-        """Warp to the source data"""
+        return result
 
-        image_extents = {'min_x': self.min_x_extent,
-                         'min_y': self.min_y_extent,
-                         'max_x': self.max_x_extent,
-                         'max_y': self.max_y_extent}
+    @staticmethod
+    def linear_interpolation_weights(positions, count):
+        """Determines linear interpolation indexes and weights
 
-        Geo.warp(resampling_method=self.elevation_resampling_method,
-                 resolution_x=self.pixel_resolution_x,
-                 resolution_y=self.pixel_resolution_y,
-                 target_srs=self.target_srs,
-                 image_extents=image_extents,
-                 output_data_type=self.elevation_type_int16,
-                 output_format=self.elevation_format,
-                 source_data=source_name,
-                 output_filename=self.elevation_image_name)
+        Args:
+            positions <ndarray:int>: Ascending positions with known values,
+                                     which must span 0 through count - 1
+            count <int>: Number of consecutive positions to interpolate
 
-    def shift_longitude(self, dem_name, shifted_dem_name, offset):
-        """Shift the longitude of the DEM data"""
+        Returns:
+            <ndarray:int>: For each position, the index of the known value
+                           at or before it
+            <ndarray:float32>: For each position, the weight of the known
+                               value after it
+        """
 
-        logger = logging.getLogger(__name__)
+        targets = np.arange(count)
 
-        # Set up the base command
-        cmd = ['gdal_translate', '-a_ullr']
+        indexes = np.searchsorted(positions, targets, side='right') - 1
+        indexes = np.clip(indexes, 0, len(positions) - 2)
 
-        # Get the current locations
-        dem_src = gdal.Open(dem_name)
-        ulx, xres, xskew, uly, yskew, yres = dem_src.GetGeoTransform()
+        weights = ((targets - positions[indexes]).astype(np.float32) /
+                   (positions[indexes + 1] - positions[indexes]))
 
-        # Compute the adjusted longitude locations
-        lrx = ulx + (dem_src.RasterXSize * xres)
-        lry = uly + (dem_src.RasterYSize * yres)
-        new_ulx = ulx + offset
-        new_lrx = lrx + offset
+        return (indexes, weights)
 
-        # Close the dataset
-        dem_src = None
+    @staticmethod
+    def bilinear_sample(data, transform, map_x, map_y):
+        """Bilinear interpolation of raster data at map coordinates
 
-        # Add updated coordinates to the command
-        cmd.extend([str(new_ulx), str(uly), str(new_lrx), str(lry)])
-
-        # Add source and destination files to the command
-        cmd.extend([dem_name, shifted_dem_name])
-
-        # Convert to a string for the execution
-        cmd = ' '.join(cmd)
-
-        output = ''
-        try:
-            logger.info('EXECUTING TRANSLATE COMMAND [{0}]'.format(cmd))
-            output = execute_cmd(cmd)
-        finally:
-            if len(output) > 0:
-                logger.info(output)
-
-    def _verify_ramp_overlap(self,
-                             ramp_lines,
-                             ramp_samples,
-                             ramp_transform,
-                             map_ul_x, map_ul_y,
-                             map_ur_x, map_ur_y,
-                             map_lr_x, map_lr_y,
-                             map_ll_x, map_ll_y,
-                             map_center_x, map_center_y):
-        """Verify that the input data is covered by the RAMP DEM
+        The same pixel-center convention as GDAL bilinear resampling is used,
+        and coordinates beyond the data are clamped to the edge pixels.
 
         Args:
-            ramp_lines <int>:
-            ramp_samples <int>:
-            ramp_transform <2x3:float>: GDAL Affine transformation matrix
-                                        [0] - Map X of upper left corner
-                                        [1] - Pixel size in X direction
-                                        [2] - Y rotation
-                                        [3] - Map Y of upper left corner
-                                        [4] - X rotation
-                                        [5] - Pixel size in Y direction
-            map_ul_x <float>: Upper left image X in projection coordinates
-            map_ul_y <float>: Upper left iMage Y in projection coordinates
-            map_ur_x <float>: Upper right image X in projection coordinates
-            map_ur_y <float>: Upper right image Y in projection coordinates
-            map_lr_x <float>: Lower right image X in projection coordinates
-            map_lr_y <float>: Lower right image Y in projection coordinates
-            map_ll_x <float>: Lower left image X in projection coordinates
-            map_ll_y <float>: Lower left image Y in projection coordinates
-            map_center_x <float>: Center image X in projection coordinates
-            map_center_y <float>: Center image Y in projection coordinates
+            data <ndarray>: 2D raster data
+            transform <2x3:float>: GDAL Affine transformation matrix for the
+                                   data, without rotation
+            map_x <ndarray:float>: Map X coordinates to sample at
+            map_y <ndarray:float>: Map Y coordinates to sample at
 
         Returns:
-            Generates RAMPCoverageError exception if image is not contained
-            enough by the RAMP DEM.
+            <ndarray:float>: The interpolated values
         """
 
-        logger = logging.getLogger(__name__)
+        (lines, samples) = data.shape
 
-        # Setup the X and Y polygons values
-        vertices = list()
+        pixel_x = (map_x - transform[0]) / transform[1] - 0.5
+        pixel_y = (map_y - transform[3]) / transform[5] - 0.5
+        pixel_x = np.clip(pixel_x, 0, samples - 1)
+        pixel_y = np.clip(pixel_y, 0, lines - 1)
 
-        # UL (X, Y)
-        (ramp_x, ramp_y) = Geo.convert_imageXY_to_mapXY(0.0, 0.0,
-                                                        ramp_transform)
-        vertices.append([ramp_x, ramp_y])
+        x_0 = np.clip(np.floor(pixel_x).astype(np.int64), 0, samples - 2)
+        y_0 = np.clip(np.floor(pixel_y).astype(np.int64), 0, lines - 2)
+        x_weight = pixel_x - x_0
+        y_weight = pixel_y - y_0
 
-        # UR (X, Y)
-        (ramp_x, ramp_y) = Geo.convert_imageXY_to_mapXY(ramp_samples-1, 0.0,
-                                                        ramp_transform)
-        vertices.append([ramp_x, ramp_y])
+        top = (data[y_0, x_0] * (1.0 - x_weight) +
+               data[y_0, x_0 + 1] * x_weight)
+        bottom = (data[y_0 + 1, x_0] * (1.0 - x_weight) +
+                  data[y_0 + 1, x_0 + 1] * x_weight)
 
-        # LR (X, Y)
-        (ramp_x, ramp_y) = Geo.convert_imageXY_to_mapXY(ramp_samples-1,
-                                                        ramp_lines-1,
-                                                        ramp_transform)
-        vertices.append([ramp_x, ramp_y])
+        return top * (1.0 - y_weight) + bottom * y_weight
 
-        # LL (X, Y)
-        (ramp_x, ramp_y) = Geo.convert_imageXY_to_mapXY(0.0, ramp_lines-1,
-                                                        ramp_transform)
-        vertices.append([ramp_x, ramp_y])
 
-        # Close the polygon
-        vertices.append(vertices[0])
+def parse_byte_size(value):
+    """Convert a byte size with an optional K, M, G, or T suffix to bytes
 
-        logger.debug('Vertices: {0}'.format(str(vertices)))
+    Args:
+        value <str>: The size, e.g. 500000000, 512M, or 20G
 
-        # No longer needed
-        del ramp_transform
+    Returns:
+        <int>: The number of bytes
+    """
 
-        # Determine how many points are within the RAMP DEM and error
-        # accordingly
-        points_in_polygon = 0
-        if Math.point_in_polygon(vertices, map_ul_x, map_ul_y):
-            points_in_polygon += 1
+    multipliers = {'K': 1024,
+                   'M': 1024 ** 2,
+                   'G': 1024 ** 3,
+                   'T': 1024 ** 4}
 
-        if Math.point_in_polygon(vertices, map_ur_x, map_ur_y):
-            points_in_polygon += 1
+    text = str(value).strip().upper()
+    if text.endswith('B'):
+        text = text[:-1]
 
-        if Math.point_in_polygon(vertices, map_lr_x, map_lr_y):
-            points_in_polygon += 1
+    multiplier = 1
+    if len(text) > 0 and text[-1] in multipliers:
+        multiplier = multipliers[text[-1]]
+        text = text[:-1]
 
-        if Math.point_in_polygon(vertices, map_ll_x, map_ll_y):
-            points_in_polygon += 1
+    try:
+        return int(float(text) * multiplier)
+    except ValueError:
+        raise ValueError('Invalid byte size [{0}]'.format(value))
 
-        if Math.point_in_polygon(vertices, map_center_x, map_center_y):
-            points_in_polygon += 1
 
-        if points_in_polygon < 3:
-            raise RAMPCoverageError('Insufficient overlap:'
-                                    ' Only found {0} points within'
-                                    ' data when at least 3 are'
-                                    ' required'.format(points_in_polygon))
+class FileCacheError(Exception):
+    """Exception to capture errors from the FileCache class"""
+    pass
 
-    def generate_using_ramp(self):
-        """Retrieve the RAMP DEM data"""
 
-        logger = logging.getLogger(__name__)
+class FileCache(object):
+    """Provides a size-capped least-recently-used cache of files
 
-        # Link the RAMP data to the current directory
-        if not os.path.exists(self.ramp_image_name):
-            # Should only need to test for one of them
-            os.symlink(self.ramp_header_path, self.ramp_header_name)
-            os.symlink(self.ramp_image_path, self.ramp_image_name)
+    Entries are files stored below the cache directory by a relative name,
+    and may be shared by concurrent processes.  Each entry has two lock
+    files beside it:
+        <entry>.fill.lock - Held exclusively while the entry is populated
+        <entry>.use.lock  - Held shared while a process uses the entry, and
+                            its modification time records the last use
 
-        # Open the RAMP dataset
-        ramp_ds = gdal.Open(self.ramp_image_name)
+    Entries in use by any process are never evicted.  Hits, misses, and
+    evictions are counted for this instance and accumulated across all
+    processes in the statistics file of the cache directory.
+    """
 
-        # Create the RAMP SRS
-        ramp_srs = osr.SpatialReference()
-        ramp_srs.ImportFromWkt(ramp_ds.GetProjection())
-        logger.debug('RAMP WKT: {0}'.format(ramp_ds.GetProjection()))
+    FILL_LOCK_EXTENSION = '.fill.lock'
+    USE_LOCK_EXTENSION = '.use.lock'
+    TEMP_EXTENSION = '.tmp'
+    DIRECTORY_LOCK_NAME = 'cache.lock'
+    STATISTICS_NAME = 'cache-statistics.json'
 
-        # Create the Geographic SRS
-        latlon_srs = ramp_srs.CloneGeogCS()
+    def __init__(self, cache_dir, max_bytes):
+        """Class initialization
 
-        # Create the coordinate transformation
-        ll_to_ramp = osr.CoordinateTransformation(latlon_srs, ramp_srs)
+        Args:
+            cache_dir <str>: Directory to hold the cached files
+            max_bytes <int>: Maximum total size of the cached files
+        """
+        super(FileCache, self).__init__()
 
-        # Find the center of the max box
-        center_latitude = ((self.bounding_north_latitude +
-                            self.bounding_south_latitude) / 2.0)
-        center_longitude = ((self.bounding_east_longitude +
-                             self.bounding_west_longitude) / 2.0)
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_bytes = max_bytes
 
-        # Find the max box and center in map coordinates
-        (map_ul_x, map_ul_y, height) = (
-            ll_to_ramp.TransformPoint(self.bounding_west_longitude,
-                                      self.bounding_north_latitude))
-        (map_ur_x, map_ur_y, height) = (
-            ll_to_ramp.TransformPoint(self.bounding_east_longitude,
-                                      self.bounding_north_latitude))
-        (map_lr_x, map_lr_y, height) = (
-            ll_to_ramp.TransformPoint(self.bounding_east_longitude,
-                                      self.bounding_south_latitude))
-        (map_ll_x, map_ll_y, height) = (
-            ll_to_ramp.TransformPoint(self.bounding_west_longitude,
-                                      self.bounding_south_latitude))
-        (map_center_x, map_center_y, height) = (
-            ll_to_ramp.TransformPoint(center_longitude, center_latitude))
-        logger.debug('map_ul_x, map_ul_y: {0}, {1}'
-                     .format(map_ul_x, map_ul_y))
-        logger.debug('map_ur_x, map_ur_y: {0}, {1}'
-                     .format(map_ur_x, map_ur_y))
-        logger.debug('map_lr_x, map_lr_y: {0}, {1}'
-                     .format(map_lr_x, map_lr_y))
-        logger.debug('map_ll_x, map_ll_y: {0}, {1}'
-                     .format(map_ll_x, map_ll_y))
-        logger.debug('map_center_x, map_center_y: {0}, {1}'
-                     .format(map_center_x, map_center_y))
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
 
-        # Get the RAMP transform
-        ramp_transform = ramp_ds.GetGeoTransform()
+        # Shared use locks held by this process, by relative name
+        self.use_locks = dict()
 
-        # Get the lines and samples from the RAMP band data
-        ramp_band = ramp_ds.GetRasterBand(1)
-        logger.debug('Lines, Samples: {0}, {1}'
-                     .format(ramp_band.YSize, ramp_band.XSize))
+        # Protects the counters and use locks from concurrent threads
+        self.mutex = threading.Lock()
 
-        # This causes an exception if they do not overlap
-        self._verify_ramp_overlap(ramp_band.YSize, ramp_band.XSize,
-                                  ramp_transform,
-                                  map_ul_x, map_ul_y,
-                                  map_ur_x, map_ur_y,
-                                  map_lr_x, map_lr_y,
-                                  map_ll_x, map_ll_y,
-                                  map_center_x, map_center_y)
+        FileCache.make_dirs(self.cache_dir)
 
-        # Cleanup memory before warping
-        del ll_to_ramp
-        del latlon_srs
-        del ramp_transform
-        del ramp_band
-        del ramp_srs
-        del ramp_ds
+    @staticmethod
+    def make_dirs(path):
+        """Create the directory tree, tolerating concurrent creation"""
 
-        # Warp to the source data
-        self.warp_to_source_data(self.ramp_image_name)
+        try:
+            os.makedirs(path)
+        except OSError:
+            if not os.path.isdir(path):
+                raise
 
-        # Remove the symlink to the RAMP DEM
-        os.unlink(self.ramp_header_name)
-        os.unlink(self.ramp_image_name)
+    @staticmethod
+    def link_or_copy(source_path, destination_path):
+        """Hard link the source when possible, otherwise copy it"""
 
-    def get_gtopo30_tile_list(self):
-        """Generate the list of GTOPO30 DEM tiles"""
+        try:
+            os.link(source_path, destination_path)
+        except OSError:
+            shutil.copyfile(source_path, destination_path)
 
-        logger = logging.getLogger(__name__)
+    def get_path(self, relative_name):
+        """Provides the cache path for the relative name"""
 
-        # GTOPO30 tile information
-        NORTH_LON_LOCATIONS = np.array([-180.0, -140.0, -100.0, -60.0, -20.0,
-                                        20.0, 60.0, 100.0, 140.0])
+        return os.path.join(self.cache_dir, relative_name)
 
-        SOUTH_LON_LOCATIONS = np.array([-180.0, -120.0, -60.0,
-                                        0.0, 60.0, 120.0])
+    def _open_lock(self, lock_path):
+        """Opens (creating if needed) a lock file"""
 
-        LAT_LOCATIONS = np.array([90.0, 40.0, -10.0, -60.0])
+        FileCache.make_dirs(os.path.dirname(lock_path))
 
-        GTOPO30_TILE_SET_CUTOFF_LATITUDE = -60.0
+        return os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o666)
 
-        '''
-        The tiles do not necessarily go all the way to the boundary.  For
-        example, the w100n90 tile only goes to -99.995833333334 longitude.
-        Thus, if our UL longitude falls between -99.995833333334 and -100.0
-        then we will need to use w140n90 to get the far left edge.  To
-        account for this we'll artificially pad the East and West boundaries
-        by 1 degree.
+    @contextlib.contextmanager
+    def lock(self, relative_name):
+        """Holds the exclusive fill lock for the relative name
 
-        Note: this does not seem to cause problems on the North and South
-        borders, so we will no worry about them.
-        '''
-        ul_lon = Math.longitude_norm(self.bounding_west_longitude -
-                                     self.gtopo30_padding)
-        lr_lon = Math.longitude_norm(self.bounding_east_longitude +
-                                     self.gtopo30_padding)
-        logger.debug('ul_lon = {0}'.format(ul_lon))
-        logger.debug('lr_lon = {0}'.format(lr_lon))
+        Used to single-flight the population of an entry between processes.
+        """
 
-        '''
-        There is a condition which could cause problems on the North and South
-        boundaries as well.  This is if a scene comes very near the edge, but
-        does not quite get there.  It could be that adding 1.5 to nrows before
-        taking the ceiling (see calculation of nrows in get_gtopo30_data.c)
-        causes the nrows to be large enough that we need data from the tile to
-        the South, even though the scene stopped just before that tile.  To
-        address this we will grow North and South by 1 degree as we did in the
-        East and West directions above.  Note, the same problem can occur in
-        the East and West directions, but was already addressed when adding
-        one to the longitudes above.
-        '''
-        ul_lat = min((self.bounding_north_latitude + self.gtopo30_padding),
-                     self.north_latitude_limit)
-        lr_lat = max((self.bounding_south_latitude - self.gtopo30_padding),
-                     self.south_latitude_limit)
-        logger.debug('ul_lat = {0}'.format(ul_lat))
-        logger.debug('lr_lat = {0}'.format(lr_lat))
+        lock_fd = self._open_lock(self.get_path(relative_name) +
+                                  self.FILL_LOCK_EXTENSION)
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(lock_fd)
 
-        # Determine the unique latitudes where the input data resides
-        lat_list = list(set([min(LAT_LOCATIONS[np.where(ul_lat < LAT_LOCATIONS)]),
-                             min(LAT_LOCATIONS[np.where(lr_lat < LAT_LOCATIONS)])]))
-        logger.debug('lat_list = {0}'.format(lat_list))
+    def _acquire_use_lock(self, relative_name):
+        """Holds a shared use lock on the entry and records the use
 
-        tile_list = list()
-        # Determine the unique longitudes where the input data resides
-        for lat in lat_list:
-            lon_list = list()
-            if lat > GTOPO30_TILE_SET_CUTOFF_LATITUDE:
-                lon_list.append(
-                    max(NORTH_LON_LOCATIONS[
-                        np.where(ul_lon > NORTH_LON_LOCATIONS)]))
-                lon_list.append(
-                    max(NORTH_LON_LOCATIONS[
-                        np.where(lr_lon > NORTH_LON_LOCATIONS)]))
-            else:
-                lon_list.append(
-                    max(SOUTH_LON_LOCATIONS[
-                        np.where(ul_lon > SOUTH_LON_LOCATIONS)]))
-                lon_list.append(
-                    max(SOUTH_LON_LOCATIONS[
-                        np.where(lr_lon > SOUTH_LON_LOCATIONS)]))
-            lon_list = list(set(lon_list))
-            logger.debug('lon_list = {0}'.format(lon_list))
+        Returns:
+            <bool>: True if the entry exists, otherwise the lock is not held
+        """
 
-            n_s = 'n'
-            if lat < 0:
-                n_s = 's'
+        with self.mutex:
+            if relative_name in self.use_locks:
+                return True
 
-            for lon in lon_list:
-                e_w = 'e'
-                if lon <= 0:
-                    e_w = 'w'
+        path = self.get_path(relative_name)
+        lock_path = path + self.USE_LOCK_EXTENSION
 
-                # Already know if north/south, east/west so we just need
-                # the positive value for the filename
-                abs_lat = abs(lat)
-                abs_lon = abs(lon)
+        lock_fd = self._open_lock(lock_path)
+        fcntl.flock(lock_fd, fcntl.LOCK_SH)
 
-                tile_list.append('{0}{1:03}{2}{3:02}'
-                                 .format(e_w, int(abs_lon), n_s, int(abs_lat)))
+        # It may have been evicted before the lock was acquired
+        if not os.path.isfile(path):
+            os.close(lock_fd)
+            return False
 
-        return tile_list
+        os.utime(lock_path, None)
+        with self.mutex:
+            if relative_name in self.use_locks:
+                # Another thread acquired it first
+                os.close(lock_fd)
+            else:
+                self.use_locks[relative_name] = lock_fd
 
-    def get_gtopo30_dems(self):
-        """Retrieves the GTOPO30 DEM archives and extracts them"""
+        return True
 
-        logger = logging.getLogger(__name__)
+    def lookup(self, relative_name):
+        """Provides the cached path for the relative name
 
-        elevation_dir = os.path.join(self.espa_elevation_dir, self.gtopo30_dir)
+        The entry is held in use until release() is called.
 
-        # Determine the GTOPO30 tiles
-        tile_list = self.get_gtopo30_tile_list()
-        logger.info('GTOPO30 Tile Names: {0}'.format(', '.join(tile_list)))
+        Returns:
+            <str>: The cached path, or None if the entry is not cached
+        """
 
-        for tile in tile_list:
-            tile_arch = '{0}.tar.gz'.format(tile)
-            tile_path = os.path.join(elevation_dir, tile_arch)
+        if self._acquire_use_lock(relative_name):
+            with self.mutex:
+                self.hits += 1
+            return self.get_path(relative_name)
 
-            output = ''
-            try:
-                cmd = 'cp {0} .'.format(tile_path)
-                output = execute_cmd(cmd)
-            finally:
-                if len(output) > 0:
-                    logger.info(output)
+        with self.mutex:
+            self.misses += 1
+        return None
 
-            output = ''
-            try:
-                cmd = 'tar -xvf {0}'.format(tile_arch)
-                output = execute_cmd(cmd)
-            finally:
-                if len(output) > 0:
-                    logger.info(output)
+    def _publish(self, relative_name, create):
+        """Creates an entry, replacing any existing entry
 
-            os.unlink(tile_arch)
+        The entry is created under a temporary name and atomically renamed,
+        so other processes never see a partial entry.  The entry is held in
+        use until release() is called.
 
-        # Grab the tile DEM filenames from the extracted archives
-        tile_elevation_list = glob.glob(self.gtopo30_dems_regexp)
-        logger.info('GTOPO30 DEM Files: {0}'
-                    .format(', '.join(tile_elevation_list)))
+        Args:
+            relative_name <str>: Name of the entry
+            create <function>: Called with the path to create the file at
 
-        return tile_elevation_list
+        Returns:
+            <str>: The cached path
+        """
 
-    def generate_using_gtopo30(self):
-        """Generate the DEM using GTOPO30 data"""
+        path = self.get_path(relative_name)
+        temp_path = '{0}.{1}{2}'.format(path, os.getpid(),
+                                        self.TEMP_EXTENSION)
+
+        FileCache.make_dirs(os.path.dirname(path))
+
+        try:
+            create(temp_path)
+
+            # Atomically publish the entry
+            os.rename(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+
+        if not self._acquire_use_lock(relative_name):
+            raise FileCacheError('Cached file disappeared ({0})'
+                                 .format(path))
+
+        self.evict()
+
+        return path
+
+    def add(self, relative_name, source_path, link=True):
+        """Adds a file to the cache, replacing any existing entry
+
+        A hard link is used when requested and the source is on the same
+        file system, otherwise the source is copied.  The entry is held in
+        use until release() is called.
+
+        Args:
+            relative_name <str>: Name of the entry
+            source_path <str>: The file to add
+            link <bool>: Whether the entry may share the source's inode,
+                         only when neither will be modified
+
+        Returns:
+            <str>: The cached path
+        """
 
         logger = logging.getLogger(__name__)
 
-        # Retrieve the GTOPO30 tiles
-        tile_elevation_list = self.get_gtopo30_dems()
+        if link:
+            create = (lambda temp_path:
+                      FileCache.link_or_copy(source_path, temp_path))
+        else:
+            create = (lambda temp_path:
+                      shutil.copyfile(source_path, temp_path))
 
-        # If the image crosses the 180 meridian, shift the west tile
-        # longitudes to use the 0..360 range so the mosaic is not confused
-        start_longitude = int(math.floor(self.bounding_west_longitude))
-        end_longitude = int(math.floor(self.bounding_east_longitude))
+        path = self._publish(relative_name, create)
+        logger.debug('Cached {0} as {1}'.format(source_path, path))
 
-        if start_longitude > 0 and end_longitude < 0:
+        return path
 
-            for tile in tile_elevation_list:
-                hemisphere = tile[:1]
-                if hemisphere == "W":
+    def get_or_create(self, relative_name, create):
+        """Provides the cached path, creating the entry on a miss
 
-                    # Name the shifted output file
-                    shifted_tile = tile + '_shifted'
+        Concurrent processes missing on the same entry wait for a single
+        process to create it.
 
-                    # Shift the longitude values
-                    self.shift_longitude(tile, shifted_tile, 360)
+        Args:
+            relative_name <str>: Name of the entry
+            create <function>: Called with the path to create the file at
 
-                    # Copy destination file back to source file
-                    output = ''
-                    try:
-                        cmd = 'cp {0} {1}'.format(shifted_tile, tile)
-                        output = execute_cmd(cmd)
-                    finally:
-                        if len(output) > 0:
-                            logger.info(output)
+        Returns:
+            <str>: The cached path
+        """
 
-        # MOSAIC the tiles together
-        self.mosaic_tiles(tile_elevation_list)
+        path = self.lookup(relative_name)
+        if path is not None:
+            return path
 
-        # Warp to the source data
-        self.warp_to_source_data(self.mosaic_image_name)
+        with self.lock(relative_name):
+            # Another process may have created it while we waited
+            if self._acquire_use_lock(relative_name):
+                return self.get_path(relative_name)
 
-        # Cleanup intermediate data
-        self.mosaic_cleanup()
+            return self._publish(relative_name, create)
 
-        remove_list = glob.glob(self.gtopo30_files_regexp)
-        for file_name in remove_list:
-            os.unlink(file_name)
+    def fetch(self, source_path, relative_name):
+        """Read-through lookup of a source file
 
-    def generate_using_gls(self):
-        """Retrieve the GLS DEM data"""
+        Populates the cache from the source on a miss.  Concurrent processes
+        missing on the same entry wait for a single copy.
 
-        logger = logging.getLogger(__name__)
+        Returns:
+            <str>: The cached path
+        """
 
-        elevation_dir = os.path.join(self.espa_elevation_dir, self.gls_dir)
+        return self.get_or_create(relative_name,
+                                  lambda temp_path:
+                                  FileCache.link_or_copy(source_path,
+                                                         temp_path))
 
-        '''
-        GLS tiles are named with a format like n47w118 where the lat/long
-        in the file name are the lower-left corner of the tile.  Each tile
-        covers a 1-degree by 1-degree area. */
-        '''
-        start_latitude = int(math.floor(self.bounding_north_latitude))
-        end_latitude = int(math.floor(self.bounding_south_latitude))
-        start_longitude = int(math.floor(self.bounding_west_longitude))
-        end_longitude = int(math.floor(self.bounding_east_longitude))
-        logger.debug('Start Latitude: {0}'.format(start_latitude))
-        logger.debug('End Latitude: {0}'.format(end_latitude))
-        logger.debug('Start Longitude: {0}'.format(start_longitude))
-        logger.debug('End Longitude: {0}'.format(end_longitude))
+    def _entries(self):
+        """Provides (last use, size, relative name) for the cached files"""
 
-        tile_list = list()
+        entries = list()
 
-        # Build the list of longitudes to process, taking into account that
-        # there could be a 180 meridian crossing.
-        longitude_list = list()
-        if start_longitude > 0 and end_longitude < 0:
-            # The start and end longitudes are on different sides of the
-            # antimeridian.  Note: there are no e180 GLS tiles, only some
-            # w180 tiles, so don't look for e180.
-            for lon in xrange(start_longitude, 179 + 1):
-                longitude_list.append(lon)
-            for lon in xrange(-180, end_longitude + 1):
-                longitude_list.append(lon)
-        else:
-            for lon in xrange(start_longitude, end_longitude + 1):
-                longitude_list.append(lon)
+        for (dir_path, dir_names, file_names) in os.walk(self.cache_dir):
+            for file_name in file_names:
+                if (file_name.endswith('.lock') or
+                        file_name.endswith(self.TEMP_EXTENSION) or
+                        file_name == self.STATISTICS_NAME):
+                    continue
 
-        for lat in xrange(end_latitude, start_latitude + 1):
-            logger.debug('Latitude: {0}'.format(lat))
-            n_s = 'n'
-            if lat < 0:
-                n_s = 's'
+                path = os.path.join(dir_path, file_name)
+                try:
+                    size = os.path.getsize(path)
+                    last_use = os.path.getmtime(path)
+                    lock_path = path + self.USE_LOCK_EXTENSION
+                    if os.path.exists(lock_path):
+                        last_use = max(last_use,
+                                       os.path.getmtime(lock_path))
+                except OSError:
+                    # Evicted by another process
+                    continue
 
-            for lon in longitude_list:
-                logger.debug('Longitude: {0}'.format(lon))
+                entries.append((last_use, size,
+                                os.path.relpath(path, self.cache_dir)))
 
-                e_w = 'e'
-                if lon < 0:
-                    e_w = 'w'
+        return entries
 
-                # Already know if north/south, east/west so we just need
-                # the positive value for the filename
-                abs_lat = abs(lat)
-                abs_lon = abs(lon)
+    def evict(self):
+        """Evict least-recently-used entries until within the size limit
 
-                tile_list.append('{0}{1:02}{2}{3:03}'
-                                 .format(n_s, abs_lat, e_w, abs_lon))
+        Entries in use by any process are skipped.
+        """
 
-        tile_count = len(tile_list)
-        if tile_count == 0:
-            raise RuntimeError('Unable to determine tiles while retrieving'
-                               ' required GLS DEM tile list')
+        logger = logging.getLogger(__name__)
 
-        '''
-        Generate lists of the BIL, HDR, and PRJ filenames as well as
-        determining any missing tiles
-        '''
-        missing_count = 0
-        bil_list = list()
-        hdr_list = list()
-        prj_list = list()
-        prj_path = os.path.join(elevation_dir, self.gls_projection_template)
-        logger.debug('PRJ Path: {0}'.format(prj_path))
-        for tile in tile_list:
-            bil_name = '{0}.bil'.format(tile)
-            hdr_name = '{0}.hdr'.format(tile)
-            prj_name = '{0}.prj'.format(tile)
+        directory_lock = os.path.join(self.cache_dir,
+                                      self.DIRECTORY_LOCK_NAME)
+        lock_fd = self._open_lock(directory_lock)
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
 
-            bil_path = os.path.join(elevation_dir, bil_name)
-            hdr_path = os.path.join(elevation_dir, hdr_name)
-            logger.debug('BIL Path: {0}'.format(bil_path))
-            logger.debug('HDR Path: {0}'.format(hdr_path))
+            entries = sorted(self._entries())
+            total_bytes = sum([size for (last_use, size, name) in entries])
 
-            if (os.path.isfile(bil_path) and
-                    os.path.isfile(hdr_path)):
+            for (last_use, size, relative_name) in entries:
+                if total_bytes <= self.max_bytes:
+                    break
 
-                # Link them to the current directory
-                os.symlink(bil_path, bil_name)
-                os.symlink(hdr_path, hdr_name)
-                os.symlink(prj_path, prj_name)
+                if relative_name in self.use_locks:
+                    continue
 
-                bil_list.append(bil_name)
-                hdr_list.append(hdr_name)
-                prj_list.append(prj_name)
+                path = self.get_path(relative_name)
+                use_fd = self._open_lock(path + self.USE_LOCK_EXTENSION)
+                try:
+                    fcntl.flock(use_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except IOError:
+                    # In use by another process
+                    os.close(use_fd)
+                    continue
 
-            else:
-                logger.debug('Missing Tile: {0}'.format(bil_name))
-                missing_count += 1
+                try:
+                    os.unlink(path)
+                    total_bytes -= size
+                    self.evictions += 1
+                    logger.debug('Evicted {0}'.format(path))
+                except OSError:
+                    pass
+                finally:
+                    os.close(use_fd)
 
-        logger.debug('Expected Tile Count: {0}'.format(tile_count))
-        logger.debug('Missing Tile Count: {0}'.format(missing_count))
+            if total_bytes > self.max_bytes:
+                logger.warning('Cache {0} exceeds its size limit, {1} bytes'
+                               ' are in use'.format(self.cache_dir,
+                                                    total_bytes))
+        finally:
+            os.close(lock_fd)
 
-        # Check if we are missing all the tiles, which indicates over water
-        if missing_count >= tile_count:
-            # Cleanup the tile links
-            for file_name in bil_list:
-                os.unlink(file_name)
-            for file_name in hdr_list:
-                os.unlink(file_name)
-            for file_name in prj_list:
-                os.unlink(file_name)
-            raise GLSOverWaterError('GLS DEM is over water')
+    def release(self):
+        """Release the entries held in use and record the statistics
 
-        logger.info('GLS DEM Files: {0}'.format(', '.join(bil_list)))
+        Returns:
+            <dict>: The hit, miss, and eviction counts for this instance
+        """
 
-        # If the image crosses the 180 meridian, shift the west tile
-        # longitudes to use the 0..360 range so the mosaic is not confused
-        if start_longitude > 0 and end_longitude < 0:
+        logger = logging.getLogger(__name__)
 
-            for tile in bil_list:
-                hemisphere = tile[3:4]
-                if hemisphere == "w":
+        for lock_fd in self.use_locks.values():
+            os.close(lock_fd)
+        self.use_locks = dict()
+
+        statistics = {'hits': self.hits,
+                      'misses': self.misses,
+                      'evictions': self.evictions}
+        logger.info('Cache {0} statistics: {1} hits, {2} misses,'
+                    ' {3} evictions'.format(self.cache_dir, self.hits,
+                                            self.misses, self.evictions))
+
+        # Accumulate the statistics for all processes using the cache
+        statistics_path = os.path.join(self.cache_dir, self.STATISTICS_NAME)
+        directory_lock = os.path.join(self.cache_dir,
+                                      self.DIRECTORY_LOCK_NAME)
+        lock_fd = self._open_lock(directory_lock)
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
 
-                    # Name the shifted output file
-                    shifted_tile = tile + '_shifted'
+            totals = dict()
+            if os.path.isfile(statistics_path):
+                try:
+                    with open(statistics_path, 'r') as stats_fd:
+                        totals = json.load(stats_fd)
+                except ValueError:
+                    logger.warning('Resetting unreadable cache statistics'
+                                   ' ({0})'.format(statistics_path))
 
-                    # Shift the longitude values
-                    self.shift_longitude(tile, shifted_tile, 360)
+            for key in statistics:
+                totals[key] = totals.get(key, 0) + statistics[key]
 
-                    # Remove symbolic link to original DEM data since we
-                    # want to replace it with updated data
-                    os.unlink(tile)
+            temp_path = '{0}.{1}{2}'.format(statistics_path, os.getpid(),
+                                            self.TEMP_EXTENSION)
+            with open(temp_path, 'w') as stats_fd:
+                json.dump(totals, stats_fd, indent=4, sort_keys=True)
+            os.rename(temp_path, statistics_path)
+        finally:
+            os.close(lock_fd)
 
-                    # Move destination file back to source file
-                    output = ''
-                    try:
-                        cmd = 'mv {0} {1}'.format(shifted_tile, tile)
-                        output = execute_cmd(cmd)
-                    finally:
-                        if len(output) > 0:
-                            logger.info(output)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
 
-        # MOSAIC the tiles together
-        self.mosaic_tiles(bil_list)
+        return statistics
 
-        # Warp to the source data
-        self.warp_to_source_data(self.mosaic_image_name)
 
-        # Cleanup intermediate data
-        self.mosaic_cleanup()
+class RunMetrics(object):
+    """Records the wall and CPU time of the processing stages and commands
 
-        for file_name in bil_list:
-            os.unlink(file_name)
-        for file_name in hdr_list:
-            os.unlink(file_name)
-        for file_name in prj_list:
-            os.unlink(file_name)
+    Stages nest, and are named by their path from the outermost stage.  The
+    CPU time of a stage is process-wide, including every thread and any
+    concurrent run, and the CPU time of the commands executed during the
+    stage is reported separately.  While a run is recorded its instance is
+    the active one of the threads performing it, so execute_cmd can record
+    the commands it executes.
+    """
 
-    def adjust_elevation_to_wgs84(self):
-        """Adjusts the warped elevation to the WGS84 GEOID"""
+    # The instance recording the run of each thread
+    local = threading.local()
 
-        geoid_header_name = 'espa-geoid.hdr'
-        geoid_image_name = 'espa-geoid.img'
+    def __init__(self):
+        """Class initialization"""
+        super(RunMetrics, self).__init__()
 
-        # Link the WGS84 GEOID data to the current directory
-        if not os.path.exists(self.wgs84_image_name):
-            # Should only need to test for one of them
-            os.symlink(self.wgs84_header_path, self.wgs84_header_name)
-            os.symlink(self.wgs84_image_path, self.wgs84_image_name)
+        self.stages = list()
+        self.commands = list()
 
-        image_extents = {'min_x': self.min_x_extent,
-                         'min_y': self.min_y_extent,
-                         'max_x': self.max_x_extent,
-                         'max_y': self.max_y_extent}
+        # Names of the stages in progress in each thread
+        self.thread_state = threading.local()
 
-        # Warp the GEOID to the elevation/product projection
-        Geo.warp(resampling_method=self.elevation_resampling_method,
-                 resolution_x=self.pixel_resolution_x,
-                 resolution_y=self.pixel_resolution_y,
-                 target_srs=self.target_srs,
-                 image_extents=image_extents,
-                 output_data_type=self.elevation_type_int16,
-                 output_format=self.elevation_format,
-                 source_data=self.wgs84_image_name,
-                 output_filename=geoid_image_name)
+        # Protects the stages and commands from concurrent threads
+        self.mutex = threading.Lock()
 
-        # Remove the symlink to the WGS84 GEOID
-        os.unlink(self.wgs84_header_name)
-        os.unlink(self.wgs84_image_name)
+    @staticmethod
+    def get_active():
+        """Provides the instance recording the run of the calling thread
 
-        # Open the WGS84 and elevation datasets
-        geoid_ds = gdal.Open(geoid_image_name)
-        elevation_ds = gdal.Open(self.elevation_image_name)
+        Returns:
+            <RunMetrics>: The active instance, or None if not recording
+        """
 
-        # Get the WGS84 and elevation band information
-        geoid_band = geoid_ds.GetRasterBand(1)
-        elevation_band = elevation_ds.GetRasterBand(1)
+        return getattr(RunMetrics.local, 'active', None)
 
-        # Verify they are the same size, otherwise something broke
-        if (geoid_band.XSize != elevation_band.XSize or
-                geoid_band.YSize != elevation_band.YSize):
-            raise Exception('The size of the GEOID and elevation do not match')
+    @contextlib.contextmanager
+    def activate(self, stage_names=None):
+        """Makes this the active instance of the calling thread while enclosed
 
-        # Read the data from both into memory
-        geoid_data = geoid_band.ReadAsArray(0, 0,
-                                            geoid_band.XSize,
-                                            geoid_band.YSize).astype(np.int16)
-        elevation_data = (elevation_band
-                          .ReadAsArray(0, 0,
-                                       elevation_band.XSize,
-                                       elevation_band.YSize).astype(np.int16))
+        Args:
+            stage_names <list:str>: Stages in progress in the thread handing
+                                    work to this thread, which the stages of
+                                    this thread are named within
+        """
 
-        # Use numpy math to add the datasets together
-        new_data = (elevation_data + geoid_data).astype(np.int16)
+        previous = RunMetrics.get_active()
+        RunMetrics.local.active = self
+        if stage_names is not None:
+            self.thread_state.stage_names = list(stage_names)
 
-        # Write the updated data to the elevation filename
-        with open(self.elevation_image_name, 'wb') as img_fd:
-            new_data.tofile(img_fd)
+        try:
+            yield
+        finally:
+            RunMetrics.local.active = previous
 
-        # Cleanup memory
-        del new_data
-        del elevation_data
-        del elevation_band
-        del elevation_ds
-        del geoid_data
-        del geoid_band
-        del geoid_ds
+    def get_stage_names(self):
+        """Provides the names of the stages in progress in the calling thread
 
-        # Remove the warped GEOID data
-        os.unlink(geoid_header_name)
-        os.unlink(geoid_image_name)
+        Returns:
+            <list:str>: The stage names, from the outermost stage
+        """
 
-    def append_band(self, metadata, band):
-        """Implement this to add the band object to the metadata object"""
-        raise NotImplementedError('Please Implement Me In {0}'
-                                  .format(str(type(self))))
+        if not hasattr(self.thread_state, 'stage_names'):
+            self.thread_state.stage_names = list()
 
-    def add_elevation_band_to_xml(self, elevation_source):
-        """Adds the elevation band to the ESPA Metadata XML file"""
+        return self.thread_state.stage_names
 
-        metadata = Metadata(xml_filename=self.xml_filename)
+    @staticmethod
+    def cpu_times():
+        """Provides the CPU time used by this process and its children
 
-        # Create an element maker
-        em = objectify.ElementMaker(annotate=False,
-                                    namespace=None,
-                                    nsmap=None)
+        Returns:
+            <float>: User and system seconds of this process
+            <float>: User and system seconds of the waited for children
+        """
 
-        # Create a band element
-        band = em.band()
+        times = os.times()
 
-        # Set attributes for the band element
-        band.set('product', 'elevation')
-        band.set('source', elevation_source)
-        band.set('name', 'elevation')
-        band.set('category', 'image')
-        band.set('data_type', 'INT16')
-        band.set('nlines', str(self.number_of_lines))
-        band.set('nsamps', str(self.number_of_samples))
-        # Our current sources for elevation do not contain fill and we
-        # populate the entire bounds of the image with elevation values
-        # Setting to -9999 for consistency with our other INT16 products
-        band.set('fill_value', '-9999')
+        return (times[0] + times[1], times[2] + times[3])
 
-        # Add elements to the band object
-        band.short_name = em.element('ELEVATION')
-        band.long_name = em.element('elevation')
-        band.file_name = em.element(self.elevation_image_name)
+    @contextlib.contextmanager
+    def stage(self, stage_name):
+        """Records the time taken by the enclosed processing stage"""
 
-        # Create a pixel size element
-        band.pixel_size = em.element()
-        # Add attrbutes to the pixel size object
-        band.pixel_size.set('x', str(self.pixel_resolution_x))
-        band.pixel_size.set('y', str(self.pixel_resolution_x))
-        band.pixel_size.set('units', self.pixel_units)
+        stage_names = self.get_stage_names()
+        stage_names.append(stage_name)
+        name = '/'.join(stage_names)
 
-        band.resample_method = em.element('bilinear')
-        band.data_units = em.element('meters')
+        start_time = time.time()
+        (start_cpu, start_child_cpu) = RunMetrics.cpu_times()
+        status = 'success'
+        try:
+            yield
+        except Exception:
+            status = 'failure'
+            raise
+        finally:
+            (end_cpu, end_child_cpu) = RunMetrics.cpu_times()
+            with self.mutex:
+                self.stages.append({'name': name,
+                                    'status': status,
+                                    'wall_seconds': time.time() - start_time,
+                                    'process_cpu_seconds': end_cpu - start_cpu,
+                                    'process_child_cpu_seconds':
+                                        end_child_cpu - start_child_cpu})
+            stage_names.pop()
+
+    def record_command(self, cmd, wall_seconds, cpu_seconds, exit_status):
+        """Records a command which was executed
 
-        # Set the software version
-        band.app_version = em.element(SOFTWARE_VERSION)
+        Args:
+            cmd <str>: The command line
+            wall_seconds <float>: Elapsed time of the command
+            cpu_seconds <float>: User and system time of the command, which
+                                 also includes any other commands completing
+                                 concurrently
+            exit_status <int>: Exit status, or the negated terminating
+                               signal
+        """
 
-        # Get the production date and time in string format
-        # Strip the microseconds and add a Z
-        date_now = ('{0}Z'.format(datetime.datetime.now()
-                                  .strftime('%Y-%m-%dT%H:%M:%S')))
-        band.production_date = em.element(date_now)
+        with self.mutex:
+            self.commands.append({'command': cmd,
+                                  'stage': '/'.join(self.get_stage_names()),
+                                  'wall_seconds': wall_seconds,
+                                  'cpu_seconds': cpu_seconds,
+                                  'exit_status': exit_status})
 
-        # Append the band to the XML
-        self.append_band(metadata, band)
+    def report(self):
+        """Provides the recorded stages and commands
 
-        # Validate the XML
-        metadata.validate()
+        Returns:
+            <dict>: The stages and commands, in the order they completed
+        """
 
-        # Write it to the XML file
-        metadata.write(xml_filename=self.xml_filename)
+        with self.mutex:
+            return {'stages': list(self.stages),
+                    'commands': list(self.commands)}
 
-        # Memory cleanup
-        del metadata
 
-    def generate(self):
-        """Generates the elevation"""
+def measured_stage(method):
+    """Records the calls of a BaseElevation method as a processing stage"""
 
-        logger = logging.getLogger(__name__)
+    @functools.wraps(method)
+    def measured_method(self, *args, **kwargs):
+        """Call the method within a stage named after it"""
 
-        self.parse_metadata()
+        with self.metrics.stage(method.__name__):
+            return method(self, *args, **kwargs)
 
-        # Just a bunch of debug reporting follows
-        logger.debug('bounding_north_latitude = {0}'
-                     .format(self.bounding_north_latitude))
-        logger.debug('bounding_south_latitude = {0}'
-                     .format(self.bounding_south_latitude))
-        logger.debug('bounding_east_longitude = {0}'
-                     .format(self.bounding_east_longitude))
-        logger.debug('bounding_west_longitude = {0}'
-                     .format(self.bounding_west_longitude))
+    return measured_method
 
-        logger.debug('min_x_extent = {0}'.format(self.min_x_extent))
-        logger.debug('max_y_extent = {0}'.format(self.max_y_extent))
-        logger.debug('max_x_extent = {0}'.format(self.max_x_extent))
-        logger.debug('min_y_extent = {0}'.format(self.min_y_extent))
 
-        logger.debug('pixel_resolution_x = {0}'
-                     .format(self.pixel_resolution_x))
-        logger.debug('pixel_resolution_y = {0}'
-                     .format(self.pixel_resolution_y))
+class ResidentSources(object):
+    """Keeps source datasets and coordinate transformations between jobs
 
-        logger.debug('elevation_header_name = {0}'
-                     .format(self.elevation_header_name))
-        logger.debug('elevation_image_name = {0}'
-                     .format(self.elevation_image_name))
+    Only enabled by the worker daemon, where the RAMP DEM, the WGS84 GEOID,
+    their coordinate transformations, and the GDAL block cache of the open
+    datasets stay resident from one job to the next.  Otherwise each job
+    creates its own.
+    """
 
-        logger.debug('espa_elevation_dir = {0}'
-                     .format(self.espa_elevation_dir))
+    enabled = False
 
-        # Pad the max box coordinate values
-        self.bounding_north_latitude += self.maxbox_padding
-        self.bounding_south_latitude -= self.maxbox_padding
+    # Resident objects, by key
+    resident = dict()
 
-        self.bounding_east_longitude += self.maxbox_padding
-        self.bounding_west_longitude -= self.maxbox_padding
+    # Protects the resident objects from concurrent threads
+    mutex = threading.Lock()
 
-        elevation_source = 'gtopo30'
-        # Retrieve the tiles, mosaic, and warp to the source data
-        if self.bounding_north_latitude <= self.ramp_south_limit:
-            try:
-                logger.info('Attempting to use RAMP DEM')
-                self.generate_using_ramp()
-                '''
-                According to Landsat the RAMP DEM does not need adjusting to
-                the WGS84 GEOID
-                '''
-                elevation_source = 'ramp'
-            except RAMPCoverageError:
-                logger.exception('RAMP DEM failed to cover input data'
-                                 ' defaulting to GTOPO30')
-                self.generate_using_gtopo30()
-                self.adjust_elevation_to_wgs84()
+    @staticmethod
+    def get(key, create):
+        """Provides the resident object for the key, creating it if needed
+
+        Args:
+            key <tuple>: Identifies the object
+            create <function>: Called to create the object
 
-        elif ((self.bounding_north_latitude <= self.glsdem_south_limit and
-               self.bounding_north_latitude > self.ramp_south_limit and
-               self.bounding_south_latitude <= self.glsdem_south_limit and
-               self.bounding_south_latitude > self.ramp_south_limit) or
-              (self.bounding_north_latitude >= self.glsdem_north_limit and
-               self.bounding_south_latitude >= self.glsdem_north_limit)):
+        Returns:
+            The object, which is only kept when it is not None
+        """
 
-            logger.info('Using GTOPO30 DEM')
-            self.generate_using_gtopo30()
-            self.adjust_elevation_to_wgs84()
+        if not ResidentSources.enabled:
+            return create()
+
+        with ResidentSources.mutex:
+            if key not in ResidentSources.resident:
+                value = create()
+                if value is None:
+                    return None
+                ResidentSources.resident[key] = value
+
+            return ResidentSources.resident[key]
+
+    @staticmethod
+    def open_dataset(filename):
+        """Opens a source dataset read-only
+
+        Args:
+            filename <str>: Path to the source dataset
+
+        Returns:
+            <gdal.Dataset>: The dataset, or None if it could not be opened
+        """
+
+        return ResidentSources.get(('dataset', filename),
+                                   lambda: gdal.Open(filename))
 
+    @staticmethod
+    def clear():
+        """Closes the resident datasets and drops the transformations"""
+
+        with ResidentSources.mutex:
+            ResidentSources.resident.clear()
+
+
+class MetadataSchemaError(Exception):
+    """Exception to capture errors from the MetadataSchemas class"""
+    pass
+
+
+class MetadataSchemas(object):
+    """Validates the metadata XML with schemas compiled once per process
+
+    Loading and compiling the schema dominates validating the XML, so each
+    compiled schema is kept, and a worker daemon reuses them for every job.
+    The band schema additionally declares the band element globally, so an
+    appended band can be validated on its own.
+    """
+
+    # Compiled schemas, by schema location and whether for a band
+    schemas = dict()
+
+    # Protects the compiled schemas from concurrent threads
+    mutex = threading.Lock()
+
+    @staticmethod
+    def get_location(xml_object):
+        """Determines the schema of the XML
+
+        ESPA_SCHEMA is used when it names the same schema the XML does, or
+        when the XML does not name one.
+
+        Args:
+            xml_object <objectify.ObjectifiedElement>: Root of the XML
+
+        Returns:
+            <str>: Filename or URL of the schema, or None if unknown
+        """
+
+        namespace = etree.QName(xml_object).namespace
+        locations = xml_object.get(XSI_SCHEMA_LOCATION, '').split()
+        location = dict(zip(locations[::2], locations[1::2])).get(namespace)
+
+        local_location = os.environ.get(ESPA_SCHEMA)
+        if local_location and (location is None or
+                               os.path.basename(local_location) ==
+                               os.path.basename(location)):
+            return local_location
+
+        return location
+
+    @staticmethod
+    def declare_band_element(schema_doc):
+        """Declares the band element globally in the schema
+
+        Args:
+            schema_doc <etree.ElementTree>: The parsed schema
+        """
+
+        root = schema_doc.getroot()
+
+        element_tag = '{{{0}}}element'.format(XSD_NAMESPACE)
+        for declaration in root.iterchildren(element_tag):
+            if declaration.get('name') == 'band':
+                return
+
+        for declaration in root.iterdescendants(element_tag):
+            if declaration.get('name') == 'band':
+                break
         else:
-            print('nbound: ', self.bounding_north_latitude)
-            print('sbound: ', self.bounding_south_latitude)
-            print('wbound: ', self.bounding_west_longitude)
-            print('ebound: ', self.bounding_east_longitude)
-            try:
-                logger.info('Attempting to use GLS DEM')
-                self.generate_using_gls()
-                elevation_source = 'gls'
-            except GLSOverWaterError:
-                logger.exception('GLS DEM over water defaulting to GTOPO30')
-                self.generate_using_gtopo30()
+            raise MetadataSchemaError('The band element is not declared in'
+                                      ' the schema')
 
-            self.adjust_elevation_to_wgs84()
+        declaration = copy.deepcopy(declaration)
+        for attribute in ['minOccurs', 'maxOccurs', 'form']:
+            declaration.attrib.pop(attribute, None)
+        root.append(declaration)
+
+    @staticmethod
+    def get(location, band_only=False):
+        """Provides the compiled schema, compiling it the first time
 
-        # Cleanup the GDAL generated auxiliary files
-        remove_list = glob.glob(self.gdal_aux_regexp)
-        for file_name in remove_list:
-            os.unlink(file_name)
+        Args:
+            location <str>: Filename or URL of the schema
+            band_only <bool>: Whether the schema validates a band element
 
-        # Update the ENVI header
-        # Specify the data type, because we were using Float32, but the final
-        # was written as Int16.
-        envi_header = ENVIHeader(self.elevation_header_name)
-        envi_header.update_envi_header(band_names='band 1 - elevation',
-                                       data_type=2,
-                                       no_data_value=-9999)
+        Returns:
+            <etree.XMLSchema>: The compiled schema
+        """
 
-        # Only add the elevation band to the XML file
-        try:
-            # Determine if we are processing using the XML
-            getattr(self, 'xml_filename')
-        except AttributeError:
-            pass
+        logger = logging.getLogger(__name__)
+
+        key = (location, band_only)
+        with MetadataSchemas.mutex:
+            if key not in MetadataSchemas.schemas:
+                logger.debug('Compiling schema {0}'.format(location))
+
+                # Schemas given by URL are fetched over the network
+                parser = etree.XMLParser(no_network=False)
+                try:
+                    schema_doc = etree.parse(location, parser)
+                    if band_only:
+                        MetadataSchemas.declare_band_element(schema_doc)
+                    schema = etree.XMLSchema(schema_doc)
+                except (etree.XMLSyntaxError,
+                        etree.XMLSchemaParseError, IOError) as error:
+                    raise MetadataSchemaError('Unable to load schema {0}: {1}'
+                                              .format(location, str(error)))
+
+                MetadataSchemas.schemas[key] = schema
+
+            return MetadataSchemas.schemas[key]
+
+    @staticmethod
+    def qualify(xml_object, element):
+        """Places an element created without a namespace in that of the XML
+
+        Such elements take the default namespace of the XML when written, so
+        are given it in the tree, and validate as they will read back.
+
+        Args:
+            xml_object <objectify.ObjectifiedElement>: Root of the XML
+            element <objectify.ObjectifiedElement>: The element to qualify
+        """
+
+        namespace = etree.QName(xml_object).namespace
+        if namespace is None or xml_object.nsmap.get(None) != namespace:
+            return
+
+        for child in element.iter():
+            if (isinstance(child.tag, basestring) and
+                    not child.tag.startswith('{')):
+                child.tag = '{{{0}}}{1}'.format(namespace, child.tag)
+
+    @staticmethod
+    def assert_valid(schema, element):
+        """Validates the element in place
+
+        Args:
+            schema <etree.XMLSchema>: The compiled schema
+            element <etree.Element>: The element to validate
+        """
+
+        if not schema.validate(element):
+            raise MetadataSchemaError('XML does not validate: {0}'
+                                      .format(str(schema.error_log
+                                                  .last_error)))
+
+    @staticmethod
+    def validate(metadata):
+        """Validates the whole XML
+
+        Args:
+            metadata <Metadata>: The parsed XML
+        """
+
+        location = MetadataSchemas.get_location(metadata.xml_object)
+        if location is None:
+            # Leave it to the espa library
+            metadata.validate()
+            return
+
+        MetadataSchemas.assert_valid(MetadataSchemas.get(location),
+                                     metadata.xml_object.getroottree())
+
+    @staticmethod
+    def validate_band(metadata, band):
+        """Validates only a band element of the XML
+
+        Args:
+            metadata <Metadata>: The parsed XML
+            band <objectify.ObjectifiedElement>: The band element
+        """
+
+        location = MetadataSchemas.get_location(metadata.xml_object)
+        if location is None:
+            # Leave it to the espa library
+            metadata.validate()
+            return
+
+        MetadataSchemas.assert_valid(MetadataSchemas.get(location, True),
+                                     band)
+
+
+def execute_cmd(cmd):
+    """Execute a command line
+
+    The specified command line is executed and the terminal output is returned
+    or an exception is raised.
+
+    Returns:
+        output (str): The stdout and/or stderr from the executed command.
+    """
+
+    output = ''
+
+    start_time = time.time()
+    (start_cpu, start_child_cpu) = RunMetrics.cpu_times()
+
+    (status, output) = commands.getstatusoutput(cmd)
+
+    metrics = RunMetrics.get_active()
+    if metrics is not None:
+        (end_cpu, end_child_cpu) = RunMetrics.cpu_times()
+        if os.WIFSIGNALED(status):
+            exit_status = -os.WTERMSIG(status)
         else:
-            # We are processing using XML so add the band
-            self.add_elevation_band_to_xml(elevation_source)
+            exit_status = os.WEXITSTATUS(status)
+        metrics.record_command(cmd, time.time() - start_time,
+                               end_child_cpu - start_child_cpu, exit_status)
 
+    if status < 0:
+        message = 'Application terminated by signal [{0}]'.format(cmd)
+        if len(output) > 0:
+            message = ' Stdout/Stderr is: '.join([message, output])
+        raise Exception(message)
 
-class XMLElevation(BaseElevation):
-    """Defines the class object for XML based elevation generation
+    if status != 0:
+        message = 'Application failed to execute [{0}]'.format(cmd)
+        if len(output) > 0:
+            message = ' Stdout/Stderr is: '.join([message, output])
+        raise Exception(message)
 
-       If user_extents is True, then the user-specified min/max x and y
-       geographic extents will be used, instead of the scene extents. However
-       the scene projection and resolution will be used.
+    if os.WEXITSTATUS(status) != 0:
+        message = ('Application [{0}] returned error code [{1}]'
+                   .format(cmd, os.WEXITSTATUS(status)))
+        if len(output) > 0:
+            message = ' Stdout/Stderr is: '.join([message, output])
+        raise Exception(message)
+
+    return output
+
+
+class RAMPCoverageError(Exception):
+    """Exception to capture RAMP data not covering the input data"""
+    pass
+
+
+class GLSOverWaterError(Exception):
+    """Exception to capture when GLS data is over water"""
+    pass
+
+
+class GLSTileIndex(object):
+    """Provides an index of the tiles available in the GLS directory
+
+    The index is built from a single listing of the GLS directory and is
+    rebuilt whenever the modification time of the directory changes, which
+    happens when tiles are added or removed.  It is kept in a SQLite
+    database so the tiles within a box are found with one query.  When an
+    index filename is provided the index persists between processes,
+    otherwise it is kept in memory for the life of the process.
     """
 
-    def __init__(self, xml_filename, user_extents, minx, maxx, miny,
-                 maxy, nbound_lat, sbound_lat, wbound_lon, ebound_lon,
-                 elev_filename):
-        """Class initialization"""
-        super(XMLElevation, self).__init__(elev_filename)
+    TILE_REGEXP = re.compile(r'^([ns])(\d\d)([ew])(\d\d\d)\.bil$')
 
-        self.xml_filename = xml_filename
-        self.user_extents = user_extents
-        if user_extents:
-            self.min_x_extent = minx
-            self.max_x_extent = maxx
-            self.min_y_extent = miny
-            self.max_y_extent = maxy
-            self.bounding_north_latitude = nbound_lat
-            self.bounding_south_latitude = sbound_lat
-            self.bounding_west_longitude = wbound_lon
-            self.bounding_east_longitude = ebound_lon
+    # In-memory indexes, by GLS directory
+    memory_indexes = dict()
 
-    def parse_metadata(self):
-        """Parse the input metadata file
+    def __init__(self, gls_dir, index_filename=None):
+        """Class initialization
 
-        Search for the desired fields in the metadata file, and set the
-        associated class variables with the values read for that field.
+        Args:
+            gls_dir <str>: The directory containing the GLS tiles
+            index_filename <str>: Optional SQLite file to persist the index
+        """
+        super(GLSTileIndex, self).__init__()
 
-        Notes:
-          It is expected the input metadata file is an ESPA *.xml file and
-          follows the format of those files.  Level-1, TOA reflectance, or
-          surface reflectance products are supported as input.  Band 1 from
-          those products will be used.
+        self.gls_dir = os.path.abspath(gls_dir)
+        self.index_filename = index_filename
+
+    @staticmethod
+    def tile_location(tile_name):
+        """Determine the lower-left corner of a tile from its name
+
+        Returns:
+            <int>: Latitude of the tile
+            <int>: Longitude of the tile
         """
 
-        metadata = Metadata(xml_filename=self.xml_filename)
-        metadata.parse(xml_filename=self.xml_filename)
+        match = GLSTileIndex.TILE_REGEXP.match('{0}.bil'.format(tile_name))
+        if match is None:
+            raise ValueError('Invalid GLS tile name [{0}]'.format(tile_name))
 
-        global_metadata = self.get_global_metadata(metadata)
+        (n_s, abs_lat, e_w, abs_lon) = match.groups()
 
-        # Read the scene extents if they weren't specified by the user
-        if not self.user_extents:
-            self.bounding_north_latitude = float(global_metadata
-                                                 .bounding_coordinates.north)
-            self.bounding_south_latitude = float(global_metadata
-                                                 .bounding_coordinates.south)
-            self.bounding_east_longitude = float(global_metadata
-                                                 .bounding_coordinates.east)
-            self.bounding_west_longitude = float(global_metadata
-                                                 .bounding_coordinates.west)
+        latitude = int(abs_lat)
+        if n_s == 's':
+            latitude = -latitude
+        longitude = int(abs_lon)
+        if e_w == 'w':
+            longitude = -longitude
 
-            for corner_point in (global_metadata
-                                 .projection_information.corner_point):
-                if corner_point.attrib['location'] == 'UL':
-                    self.min_x_extent = float(corner_point.attrib['x'])
-                    self.max_y_extent = float(corner_point.attrib['y'])
-                if corner_point.attrib['location'] == 'LR':
-                    self.max_x_extent = float(corner_point.attrib['x'])
-                    self.min_y_extent = float(corner_point.attrib['y'])
+        return (latitude, longitude)
 
-            self.grid_origin = global_metadata.projection_information.grid_origin
+    def _create(self, connection, directory_mtime):
+        """Populate a new index from a listing of the GLS directory"""
 
-        # Read the rest of the scene metadata
-        product_id = None
-        for element in global_metadata.getchildren():
-            if 'product_id' in element.tag:
-                product_id = element.text
-            elif 'scene_id' in element.tag:
-                product_id = element.text
-        if product_id is None:
-            raise RuntimeError('Un-Supported Metadata XML')
+        logger = logging.getLogger(__name__)
 
-        self.elevation_header_name = (self.elevation_header_name_fmt
-                                      .format(product_id))
-        self.elevation_image_name = (self.elevation_image_name_fmt
-                                     .format(product_id))
+        file_names = set(os.listdir(self.gls_dir))
+
+        rows = list()
+        for file_name in file_names:
+            if self.TILE_REGEXP.match(file_name) is None:
+                continue
+
+            tile_name = file_name[:-len('.bil')]
+            hdr_name = '{0}.hdr'.format(tile_name)
+            if hdr_name not in file_names:
+                continue
+
+            (latitude, longitude) = GLSTileIndex.tile_location(tile_name)
+            rows.append((tile_name, latitude, longitude,
+                         os.path.join(self.gls_dir, file_name),
+                         os.path.join(self.gls_dir, hdr_name)))
+
+        connection.execute('CREATE TABLE metadata'
+                           ' (gls_dir TEXT, directory_mtime REAL)')
+        connection.execute('CREATE TABLE tiles'
+                           ' (name TEXT PRIMARY KEY, latitude INTEGER,'
+                           ' longitude INTEGER, bil_path TEXT,'
+                           ' hdr_path TEXT)')
+        connection.execute('CREATE INDEX tiles_location'
+                           ' ON tiles (latitude, longitude)')
+        connection.execute('INSERT INTO metadata VALUES (?, ?)',
+                           (self.gls_dir, directory_mtime))
+        connection.executemany('INSERT INTO tiles VALUES (?, ?, ?, ?, ?)',
+                               rows)
+        connection.commit()
+
+        logger.info('Indexed {0} GLS tiles in {1}'
+                    .format(len(rows), self.gls_dir))
 
-        if str(metadata.xml_object.tag).endswith('espa_metadata'):
-            bands = metadata.xml_object.bands.band
-        elif str(metadata.xml_object.tag).endswith('ard_metadata'):
-            bands = metadata.xml_object.tile_metadata.bands.band
+    @staticmethod
+    def _is_current(connection, gls_dir, directory_mtime):
+        """Determine if an index is for the current GLS directory"""
 
-        ref_band = self.get_reference_band(bands)
-        # Make sure an appropriate band was found in the XML file
-        if ref_band is None:
-            raise RuntimeError('Supported bands not found in XML file')
+        try:
+            row = connection.execute('SELECT gls_dir, directory_mtime'
+                                     ' FROM metadata').fetchone()
+        except sqlite3.DatabaseError:
+            return False
 
-        self.target_srs = Geo.get_proj4_projection_string(str(ref_band.file_name))
-        self.pixel_resolution_x = float(ref_band.pixel_size.attrib['x'])
-        self.pixel_resolution_y = float(ref_band.pixel_size.attrib['y'])
-        self.pixel_units = ref_band.pixel_size.attrib['units']
-        self.number_of_lines = ref_band.attrib['nlines']
-        self.number_of_samples = ref_band.attrib['nsamps']
+        return (row is not None and row[0] == gls_dir and
+                row[1] == directory_mtime)
 
-        # Adjust the coordinates for image extents from the XML if they are
-        # in center of pixel, as we need to supply the warping with actual
-        # extents
-        if not self.user_extents and self.grid_origin == 'CENTER':
-            self.min_x_extent = (self.min_x_extent -
-                                 self.pixel_resolution_x * 0.5)
+    def connect(self):
+        """Provides a connection to a current index, building it if needed
+
+        Returns:
+            <sqlite3.Connection>: Connection to the index
+        """
+
+        directory_mtime = os.path.getmtime(self.gls_dir)
+
+        if self.index_filename is None:
+            connection = GLSTileIndex.memory_indexes.get(self.gls_dir)
+            if (connection is None or
+                    not GLSTileIndex._is_current(connection, self.gls_dir,
+                                                 directory_mtime)):
+                connection = sqlite3.connect(':memory:')
+                self._create(connection, directory_mtime)
+                GLSTileIndex.memory_indexes[self.gls_dir] = connection
+
+            return connection
+
+        if os.path.isfile(self.index_filename):
+            connection = sqlite3.connect(self.index_filename)
+            if GLSTileIndex._is_current(connection, self.gls_dir,
+                                        directory_mtime):
+                return connection
+            connection.close()
+
+        # Build under a temporary name and atomically replace, so other
+        # processes never see a partial index
+        FileCache.make_dirs(os.path.dirname(
+            os.path.abspath(self.index_filename)))
+        temp_filename = '{0}.{1}.tmp'.format(self.index_filename,
+                                             os.getpid())
+        connection = sqlite3.connect(temp_filename)
+        try:
+            self._create(connection, directory_mtime)
+        finally:
+            connection.close()
+        os.rename(temp_filename, self.index_filename)
+
+        return sqlite3.connect(self.index_filename)
+
+    def find_tiles(self, south_latitude, north_latitude, longitude_ranges):
+        """Find the tiles within a box
+
+        Args:
+            south_latitude <int>: Southern-most tile latitude
+            north_latitude <int>: Northern-most tile latitude
+            longitude_ranges <list:(int, int)>: Western-most and eastern-most
+                                                tile longitudes of each range
+
+        Returns:
+            <dict>: (BIL path, HDR path) of the tiles found, by tile name
+        """
+
+        connection = self.connect()
+
+        conditions = ' OR '.join(['longitude BETWEEN ? AND ?'] *
+                                 len(longitude_ranges))
+        parameters = [south_latitude, north_latitude]
+        for longitude_range in longitude_ranges:
+            parameters.extend(longitude_range)
+
+        rows = connection.execute('SELECT name, bil_path, hdr_path'
+                                  ' FROM tiles'
+                                  ' WHERE latitude BETWEEN ? AND ?'
+                                  ' AND ({0})'.format(conditions),
+                                  parameters).fetchall()
+
+        if self.index_filename is not None:
+            connection.close()
+
+        return dict([(str(name), (str(bil_path), str(hdr_path)))
+                     for (name, bil_path, hdr_path) in rows])
+
+
+class GridStores(object):
+    """Provides the catalog of elevation stores pre-warped to output grids
+
+    Each store is an ENVI elevation, already adjusted to the WGS84 GEOID,
+    covering a standard output grid such as an ARD region or a UTM zone.
+    An output grid which is aligned with, and inside of, a store is cut
+    from it with a window read instead of being warped.  The catalog is
+    kept in the store directory and is updated atomically as stores are
+    built.
+    """
+
+    CATALOG_NAME = 'catalog.json'
+    LOCK_NAME = 'catalog.lock'
+
+    def __init__(self, store_dir):
+        """Class initialization
+
+        Args:
+            store_dir <str>: Directory holding the stores and the catalog
+        """
+        super(GridStores, self).__init__()
+
+        self.store_dir = os.path.abspath(store_dir)
+        self.catalog_filename = os.path.join(self.store_dir,
+                                             self.CATALOG_NAME)
+
+    def get_path(self, filename):
+        """Provides the path of a store file"""
+
+        return os.path.join(self.store_dir, filename)
+
+    def load(self):
+        """Reads the stores from the catalog
+
+        Returns:
+            <list:dict>: The stores, empty if there is no catalog
+        """
+
+        if not os.path.isfile(self.catalog_filename):
+            return list()
+
+        with open(self.catalog_filename, 'r') as catalog_fd:
+            return json.load(catalog_fd)['stores']
+
+    def add(self, store):
+        """Adds or replaces a store in the catalog
+
+        Args:
+            store <dict>: The store description
+        """
+
+        FileCache.make_dirs(self.store_dir)
+
+        lock_fd = os.open(self.get_path(self.LOCK_NAME),
+                          os.O_RDWR | os.O_CREAT, 0o666)
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
+
+            stores = [existing for existing in self.load()
+                      if existing['name'] != store['name']]
+            stores.append(store)
+
+            temp_filename = '{0}.{1}.tmp'.format(self.catalog_filename,
+                                                 os.getpid())
+            with open(temp_filename, 'w') as catalog_fd:
+                json.dump({'software_version': SOFTWARE_VERSION,
+                           'stores': stores},
+                          catalog_fd, indent=4, sort_keys=True)
+            os.rename(temp_filename, self.catalog_filename)
+        finally:
+            os.close(lock_fd)
+
+    @staticmethod
+    def get_window(store, extents, resolution_x, resolution_y):
+        """Determine the window of a store matching the output extents
+
+        Args:
+            store <dict>: The store description
+            extents <dict>: Contains the min and max output extents
+            resolution_x <float>: Output resolution
+            resolution_y <float>: Output resolution
+
+        Returns:
+            <list:int>: X offset, Y offset, X size, and Y size of the window,
+                        or None if the output grid is not aligned with, or
+                        inside of, the store
+        """
+
+        (store_x, store_y) = store['resolution']
+        if (abs(store_x - resolution_x) > 1e-9 * store_x or
+                abs(store_y - resolution_y) > 1e-9 * store_y):
+            return None
+
+        window = list()
+        for pixels in ((extents['min_x'] - store['extents']['min_x']) /
+                       store_x,
+                       (store['extents']['max_y'] - extents['max_y']) /
+                       store_y,
+                       (extents['max_x'] - extents['min_x']) / store_x,
+                       (extents['max_y'] - extents['min_y']) / store_y):
+            if abs(pixels - round(pixels)) > GRID_STORE_ALIGNMENT_TOLERANCE:
+                return None
+            window.append(int(round(pixels)))
+
+        (x_offset, y_offset, x_size, y_size) = window
+        if (x_offset < 0 or y_offset < 0 or
+                x_offset + x_size > store['samples'] or
+                y_offset + y_size > store['lines']):
+            return None
+
+        return window
+
+    def find(self, target_srs, extents, resolution_x, resolution_y,
+             primary_source, geoid_mode):
+        """Find a store which the output grid can be cut from
+
+        Stores are matched on the elevation source selected for their max
+        box, which is the source attempted first, since the source used may
+        have been GTOPO30 after a fallback.
+
+        Args:
+            target_srs <str>: Output projection
+            extents <dict>: Contains the min and max output extents
+            resolution_x <float>: Output resolution
+            resolution_y <float>: Output resolution
+            primary_source <str>: Elevation source selected for the output
+            geoid_mode <str>: How the GEOID adjustment is determined
+
+        Returns:
+            <dict>: The store, or None
+            <list:int>: The window of the store, or None
+        """
+
+        for store in self.load():
+            if (store['software_version'] != SOFTWARE_VERSION or
+                    store.get('primary_source') != primary_source or
+                    store['geoid_mode'] != geoid_mode):
+                continue
+
+            window = GridStores.get_window(store, extents,
+                                           resolution_x, resolution_y)
+            if window is None:
+                continue
+
+            if not Geo.is_same_srs(store['target_srs'], target_srs):
+                continue
+
+            return (store, window)
+
+        return (None, None)
+
+
+class BaseElevation(object):
+    """Defines the base class object for elevation generation/processing"""
+
+    def __init__(self, elevation_filename):
+        """Class initialization
+        Args:
+        elevation_filename - allows the user to specify the output filename
+                             for the elevation band; if None then the default
+                             filename is used
+        """
+        super(BaseElevation, self).__init__()
+
+        self.xml_filename = None
+        self.number_of_lines = None
+        self.number_of_samples = None
+        self.pixel_units = None
+
+        # Grab what we need from the environment first
+        if ESPA_ELEVATION_DIR not in os.environ:
+            raise RuntimeError('{0} environment variable not defined'
+                               .format(ESPA_ELEVATION_DIR))
+        self.espa_elevation_dir = os.environ.get(ESPA_ELEVATION_DIR)
+
+        # Wall and CPU time of the processing stages
+        self.metrics = RunMetrics()
+
+        # Optional node-local cache in front of the elevation sources
+        self.source_cache = None
+        cache_dir = os.environ.get(ESPA_ELEVATION_CACHE_DIR)
+        if cache_dir:
+            if ESPA_ELEVATION_CACHE_SIZE not in os.environ:
+                raise RuntimeError('{0} environment variable must be defined'
+                                   ' when using {1}'
+                                   .format(ESPA_ELEVATION_CACHE_SIZE,
+                                           ESPA_ELEVATION_CACHE_DIR))
+            cache_size = parse_byte_size(
+                os.environ.get(ESPA_ELEVATION_CACHE_SIZE))
+            self.source_cache = FileCache(os.path.join(cache_dir, 'sources'),
+                                          cache_size)
+
+        # Optional cache of GEOID grids warped to output grids
+        self.geoid_cache = None
+        if cache_dir and ESPA_ELEVATION_GEOID_CACHE_SIZE in os.environ:
+            cache_size = parse_byte_size(
+                os.environ.get(ESPA_ELEVATION_GEOID_CACHE_SIZE))
+            self.geoid_cache = FileCache(os.path.join(cache_dir,
+                                                      'geoid-grids'),
+                                         cache_size)
+
+        # Optional cache of elevation products generated for output grids
+        self.product_cache = None
+        if cache_dir and ESPA_ELEVATION_PRODUCT_CACHE_SIZE in os.environ:
+            cache_size = parse_byte_size(
+                os.environ.get(ESPA_ELEVATION_PRODUCT_CACHE_SIZE))
+            self.product_cache = FileCache(os.path.join(cache_dir,
+                                                        'products'),
+                                           cache_size)
+
+        # Optional elevation stores pre-warped to standard output grids
+        self.grid_stores = None
+        grid_store_dir = os.environ.get(ESPA_ELEVATION_GRID_STORE_DIR)
+        if grid_store_dir:
+            self.grid_stores = GridStores(grid_store_dir)
+
+        # Padding to add to the max box (degrees)
+        self.maxbox_padding = 0.2
+
+        # Latitude coordinate limits
+        self.north_latitude_limit = 90.0
+        self.south_latitude_limit = -90.0
+        # Longitude coordinate limits
+        self.east_longitude_limit = 180.0
+        self.west_longitude_limit = -180.0
+
+        # GLS latitude coordinate limits
+        self.glsdem_north_limit = 83.0
+        self.glsdem_south_limit = -53.0
+
+        # RAMP lat coordinate limits
+        # Defines when we start to use RAMP data
+        self.ramp_south_limit = -60.0
+
+        # WGS84 GEOID Adjustment Information
+        self.wgs84_dir = 'geoid'
+        self.wgs84_header_name = 'geoid.hdr'
+        self.wgs84_image_name = 'geoid.img'
+
+        self.wgs84_header_path = os.path.join(self.espa_elevation_dir,
+                                              self.wgs84_dir,
+                                              self.wgs84_header_name)
+        self.wgs84_image_path = os.path.join(self.espa_elevation_dir,
+                                             self.wgs84_dir,
+                                             self.wgs84_image_name)
+
+        # RAMP Information
+        self.ramp_dir = 'ramp'
+        self.ramp_header_name = 'ramp200dem_wgs_v2.hdr'
+        self.ramp_image_name = 'ramp200dem_wgs_v2.img'
+
+        self.ramp_header_path = os.path.join(self.espa_elevation_dir,
+                                             self.ramp_dir,
+                                             self.ramp_header_name)
+        self.ramp_image_path = os.path.join(self.espa_elevation_dir,
+                                            self.ramp_dir,
+                                            self.ramp_image_name)
+
+        # The warp only reads a window of the RAMP DEM, padded by the margin
+        # (pixels) for resampling
+        self.ramp_window_name = 'espa-ramp-window.vrt'
+        self.ramp_window_margin = 16
+        # Points along each edge of the max box when determining the window
+        self.ramp_edge_points = 32
+
+        # GLS Information
+        self.gls_dir = 'gls'
+        self.gls_projection_template = 'gls_projection.prj'
+        self.gls_index_filename = os.environ.get(ESPA_ELEVATION_GLS_INDEX)
+        if not self.gls_index_filename and cache_dir:
+            self.gls_index_filename = os.path.join(cache_dir,
+                                                   'gls-index.sqlite')
+        if not self.gls_index_filename:
+            self.gls_index_filename = None
+
+        # GTOPT30 Information
+        self.gtopo30_dir = 'gtopo30'
+        self.gtopo30_dems_regexp = '[EW]???[NS]??.DEM'
+        self.gtopo30_padding = 1.0  # Degrees, since we are in geographic
+
+        # Elevation format and naming. If the output elevation filename was
+        # specified then use it otherwise use the default filename.
+        self.elevation_format = 'ENVI'
+        self.elevation_type_int16 = 'Int16'
+        self.output_format = OUTPUT_FORMAT_ENVI
+        self.cog_intermediate_header_name = 'espa-elevation.hdr'
+        self.cog_intermediate_image_name = 'espa-elevation.img'
+        if elevation_filename is None:
+            self.elevation_image_name_fmt = '{0}_elevation.img'
+            self.elevation_header_name_fmt = '{0}_elevation.hdr'
+        else:
+            self.elevation_image_name_fmt = elevation_filename
+            self.elevation_header_name_fmt = elevation_filename.  \
+                                            replace('.img', '.hdr')
+
+        # Intermediate files are kept in a unique directory for each job
+        self.scratch_root = os.curdir
+        self.scratch_dir = None
+
+        # Intermediate rasters may instead be kept in memory
+        self.intermediate_storage = INTERMEDIATE_STORAGE_DISK
+        self.intermediate_memory_limit = parse_byte_size(
+            DEFAULT_INTERMEDIATE_MEMORY_LIMIT)
+        self.memory_dir = None
+
+        # Number of lines processed at a time when adjusting to WGS84
+        self.geoid_block_lines = DEFAULT_GEOID_BLOCK_LINES
+
+        # How the GEOID adjustment is determined for each output pixel
+        self.geoid_mode = GEOID_MODE_WARP
+        self.geoid_grid_step = DEFAULT_GEOID_GRID_STEP
+
+        # Maximum number of tiles staged concurrently
+        self.staging_workers = DEFAULT_STAGING_WORKERS
+
+        # Landsat uses bi-linear for all elevation warping
+        self.elevation_resampling_method = 'bilinear'
+
+        # Warp in-process when possible, otherwise use the command line
+        self.warp_engine = Geo.get_warp_engine()
+
+        # Memory, threads, cache, and accuracy of every warp
+        self.warp_profile = Geo.get_warp_profile()
+
+        # Validate the input XML before processing, and how the XML is
+        # validated once the elevation band is appended
+        self.validate_input = False
+        self.xml_validation = os.environ.get(ESPA_ELEVATION_XML_VALIDATION,
+                                             XML_VALIDATION_FULL)
+        if self.xml_validation not in XML_VALIDATIONS:
+            raise RuntimeError('Unsupported XML validation [{0}] specified'
+                               ' by {1}'.format(self.xml_validation,
+                                                ESPA_ELEVATION_XML_VALIDATION))
+
+        # MOSAIC format and filenames
+        self.mosaic_format = os.environ.get(ESPA_ELEVATION_MOSAIC_FORMAT,
+                                            MOSAIC_FORMAT_VRT)
+        if self.mosaic_format not in MOSAIC_FORMATS:
+            raise RuntimeError('Unsupported mosaic format [{0}] specified'
+                               ' by {1}'.format(self.mosaic_format,
+                                                ESPA_ELEVATION_MOSAIC_FORMAT))
+        self.mosaic_header_name = 'espa-mosaic-elevation.hdr'
+        self.mosaic_image_name = 'espa-mosaic-elevation.img'
+        self.mosaic_vrt_name = 'espa-mosaic-elevation.vrt'
+
+        # GDAL AUX files to remove
+        self.gdal_aux_extension = '.aux.xml'
+
+        # Initialize the following to something bad
+        self.bounding_north_latitude = -9999.0
+        self.bounding_south_latitude = 9999.0
+        self.bounding_east_longitude = -9999.0
+        self.bounding_west_longitude = 9999.0
+
+        self.min_x_extent = None
+        self.max_y_extent = None
+        self.max_x_extent = None
+        self.min_y_extent = None
+        self.grid_origin = 'undefined'
+
+        self.pixel_resolution_x = None
+        self.pixel_resolution_y = None
+
+        self.target_srs = None
+
+        self.elevation_header_name = None
+        self.elevation_image_name = None
+
+    def parse_metadata(self):
+        """Implement this to parse the metadata file"""
+        raise NotImplementedError('Please Implement Me In {0}'
+                                  .format(str(type(self))))
+
+    def get_source_path(self, source_path):
+        """Provides the path to read an elevation source file from
+
+        When the source cache is configured the file is read through it,
+        otherwise the source path is returned unchanged.
+
+        Args:
+            source_path <str>: Path to a file below the elevation directory
+
+        Returns:
+            <str>: The path to use for reading the source file
+        """
+
+        if self.source_cache is None:
+            return source_path
+
+        relative_name = os.path.relpath(source_path, self.espa_elevation_dir)
+
+        return self.source_cache.fetch(source_path, relative_name)
+
+    @measured_stage
+    def mosaic_tiles(self, tiles, source_srs=None, config_options=None):
+        """MOSAIC the specified tiles into one file
+
+        Args:
+            tiles <list>: Paths to the tiles
+            source_srs <str>: Projection of the tiles, when the tiles do not
+                              provide one
+            config_options <dict>: GDAL configuration options for reading
+                                   the tiles, by name
+
+        Returns:
+            <str>: The MOSAIC filename to warp from
+        """
+
+        if self.mosaic_format == MOSAIC_FORMAT_VRT:
+            '''
+            Fill areas without tiles with 0 (sea-level), because missing
+            tiles in GLS will be water(ocean).  The no data value is hidden
+            so the fill is warped as valid elevation, the same as the
+            materialized ENVI mosaic.
+            '''
+            mosaic_name = self.intermediate_path(self.mosaic_vrt_name)
+            Geo.build_vrt(tiles, mosaic_name,
+                          vrt_no_data=0,
+                          hide_no_data=True,
+                          output_srs=source_srs,
+                          engine=self.warp_engine,
+                          config_options=config_options)
+
+            return mosaic_name
+
+        '''
+        Set the no data value to 0 so we fill-in with sea-level,
+        because missing tiles in GLS will be water(ocean)
+        NOTE - This is abusing GDAL, which does not correctly
+               output ENVI headers.  The header fixing code, should
+               be taking care of it.
+        '''
+        mosaic_name = self.intermediate_path(self.mosaic_image_name)
+        Geo.warp(source_srs=source_srs,
+                 destination_no_data=0,
+                 output_data_type=self.elevation_type_int16,
+                 output_format=MOSAIC_FORMAT_ENVI,
+                 source_data=tiles,
+                 output_filename=mosaic_name,
+                 engine=self.warp_engine,
+                 profile=self.warp_profile,
+                 config_options=config_options)
+
+        return mosaic_name
+
+    def mosaic_cleanup(self):
+        """Remove the MOSAIC files"""
+
+        if self.mosaic_format == MOSAIC_FORMAT_VRT:
+            Geo.remove_file(self.intermediate_path(self.mosaic_vrt_name))
+        else:
+            Geo.remove_file(self.intermediate_path(self.mosaic_header_name))
+            Geo.remove_file(self.intermediate_path(self.mosaic_image_name))
+
+    @measured_stage
+    def warp_to_source_data(self, source_data, config_options=None):
+        """Warp to the source data
+
+        Args:
+            source_data <str or gdal.Dataset>: Path to the source data or an
+                                               already open dataset
+            config_options <dict>: GDAL configuration options for reading
+                                   the source data, by name
+        """
+
+        image_extents = {'min_x': self.min_x_extent,
+                         'min_y': self.min_y_extent,
+                         'max_x': self.max_x_extent,
+                         'max_y': self.max_y_extent}
+
+        Geo.warp(resampling_method=self.elevation_resampling_method,
+                 resolution_x=self.pixel_resolution_x,
+                 resolution_y=self.pixel_resolution_y,
+                 target_srs=self.target_srs,
+                 image_extents=image_extents,
+                 output_data_type=self.elevation_type_int16,
+                 output_format=self.elevation_format,
+                 source_data=source_data,
+                 output_filename=self.elevation_image_name,
+                 engine=self.warp_engine,
+                 profile=self.warp_profile,
+                 config_options=config_options)
+
+    def shift_longitude(self, dem_name, shifted_dem_name, offset,
+                        config_options=None):
+        """Shift the longitude of the DEM data
+
+        The shifted DEM is a VRT which overrides the georeferencing of the
+        original DEM, so no pixel data is copied.
+
+        Args:
+            dem_name <str>: Path to the DEM
+            shifted_dem_name <str>: Path to the shifted VRT to create
+            offset <float>: Degrees to add to the longitudes
+            config_options <dict>: GDAL configuration options for reading
+                                   the DEM, by name
+        """
+
+        # Get the current locations
+        dem_src = gdal.Open(dem_name)
+        ulx, xres, xskew, uly, yskew, yres = dem_src.GetGeoTransform()
+
+        # Compute the adjusted longitude locations
+        lrx = ulx + (dem_src.RasterXSize * xres)
+        lry = uly + (dem_src.RasterYSize * yres)
+        new_ulx = ulx + offset
+        new_lrx = lrx + offset
+
+        # Translate using the already open dataset
+        Geo.translate(dem_src, shifted_dem_name,
+                      output_format='VRT',
+                      bounds=[new_ulx, uly, new_lrx, lry],
+                      engine=self.warp_engine,
+                      config_options=config_options)
+
+        # Close the dataset
+        dem_src = None
+
+    def _verify_ramp_overlap(self,
+                             ramp_lines,
+                             ramp_samples,
+                             ramp_transform,
+                             map_ul_x, map_ul_y,
+                             map_ur_x, map_ur_y,
+                             map_lr_x, map_lr_y,
+                             map_ll_x, map_ll_y,
+                             map_center_x, map_center_y):
+        """Verify that the input data is covered by the RAMP DEM
+
+        Args:
+            ramp_lines <int>:
+            ramp_samples <int>:
+            ramp_transform <2x3:float>: GDAL Affine transformation matrix
+                                        [0] - Map X of upper left corner
+                                        [1] - Pixel size in X direction
+                                        [2] - Y rotation
+                                        [3] - Map Y of upper left corner
+                                        [4] - X rotation
+                                        [5] - Pixel size in Y direction
+            map_ul_x <float>: Upper left image X in projection coordinates
+            map_ul_y <float>: Upper left iMage Y in projection coordinates
+            map_ur_x <float>: Upper right image X in projection coordinates
+            map_ur_y <float>: Upper right image Y in projection coordinates
+            map_lr_x <float>: Lower right image X in projection coordinates
+            map_lr_y <float>: Lower right image Y in projection coordinates
+            map_ll_x <float>: Lower left image X in projection coordinates
+            map_ll_y <float>: Lower left image Y in projection coordinates
+            map_center_x <float>: Center image X in projection coordinates
+            map_center_y <float>: Center image Y in projection coordinates
+
+        Returns:
+            Generates RAMPCoverageError exception if image is not contained
+            enough by the RAMP DEM.
+        """
+
+        logger = logging.getLogger(__name__)
+
+        # Setup the X and Y polygons values
+        vertices = list()
+
+        # UL (X, Y)
+        (ramp_x, ramp_y) = Geo.convert_imageXY_to_mapXY(0.0, 0.0,
+                                                        ramp_transform)
+        vertices.append([ramp_x, ramp_y])
+
+        # UR (X, Y)
+        (ramp_x, ramp_y) = Geo.convert_imageXY_to_mapXY(ramp_samples-1, 0.0,
+                                                        ramp_transform)
+        vertices.append([ramp_x, ramp_y])
+
+        # LR (X, Y)
+        (ramp_x, ramp_y) = Geo.convert_imageXY_to_mapXY(ramp_samples-1,
+                                                        ramp_lines-1,
+                                                        ramp_transform)
+        vertices.append([ramp_x, ramp_y])
+
+        # LL (X, Y)
+        (ramp_x, ramp_y) = Geo.convert_imageXY_to_mapXY(0.0, ramp_lines-1,
+                                                        ramp_transform)
+        vertices.append([ramp_x, ramp_y])
+
+        # Close the polygon
+        vertices.append(vertices[0])
+
+        logger.debug('Vertices: {0}'.format(str(vertices)))
+
+        # No longer needed
+        del ramp_transform
+
+        # Determine how many points are within the RAMP DEM and error
+        # accordingly
+        points_in_polygon = 0
+        if Math.point_in_polygon(vertices, map_ul_x, map_ul_y):
+            points_in_polygon += 1
+
+        if Math.point_in_polygon(vertices, map_ur_x, map_ur_y):
+            points_in_polygon += 1
+
+        if Math.point_in_polygon(vertices, map_lr_x, map_lr_y):
+            points_in_polygon += 1
+
+        if Math.point_in_polygon(vertices, map_ll_x, map_ll_y):
+            points_in_polygon += 1
+
+        if Math.point_in_polygon(vertices, map_center_x, map_center_y):
+            points_in_polygon += 1
+
+        if points_in_polygon < 3:
+            raise RAMPCoverageError('Insufficient overlap:'
+                                    ' Only found {0} points within'
+                                    ' data when at least 3 are'
+                                    ' required'.format(points_in_polygon))
+
+    def get_ramp_window(self, ll_to_ramp, ramp_transform,
+                        ramp_lines, ramp_samples):
+        """Determine the RAMP pixel window covering the max box
+
+        The edges of the max box are densified before transforming them, as
+        the parallels are curved in the RAMP projection.
+
+        Args:
+            ll_to_ramp <osr.CoordinateTransformation>: Geographic to RAMP
+            ramp_transform <2x3:float>: GDAL Affine transformation matrix
+            ramp_lines <int>: Number of lines in the RAMP DEM
+            ramp_samples <int>: Number of samples in the RAMP DEM
+
+        Returns:
+            <list:int>: X offset, Y offset, X size, and Y size of the window
+        """
+
+        west = self.bounding_west_longitude
+        east = self.bounding_east_longitude
+        if east < west:
+            # Crosses the 180 meridian
+            east += 360.0
+        north = self.bounding_north_latitude
+        south = self.bounding_south_latitude
+
+        points = list()
+        for step in xrange(self.ramp_edge_points + 1):
+            fraction = float(step) / self.ramp_edge_points
+            longitude = west + (east - west) * fraction
+            latitude = south + (north - south) * fraction
+
+            points.append((longitude, north))
+            points.append((longitude, south))
+            points.append((west, latitude))
+            points.append((east, latitude))
+
+        map_points = ll_to_ramp.TransformPoints(points)
+
+        # Convert to pixel coordinates, assuming no rotation
+        pixels_x = [(map_x - ramp_transform[0]) / ramp_transform[1]
+                    for (map_x, map_y, height) in map_points]
+        pixels_y = [(map_y - ramp_transform[3]) / ramp_transform[5]
+                    for (map_x, map_y, height) in map_points]
+
+        start_x = max(int(math.floor(min(pixels_x))) -
+                      self.ramp_window_margin, 0)
+        start_y = max(int(math.floor(min(pixels_y))) -
+                      self.ramp_window_margin, 0)
+        end_x = min(int(math.ceil(max(pixels_x))) +
+                    self.ramp_window_margin, ramp_samples)
+        end_y = min(int(math.ceil(max(pixels_y))) +
+                    self.ramp_window_margin, ramp_lines)
+
+        return [start_x, start_y, end_x - start_x, end_y - start_y]
+
+    def locate_ramp_window(self, ramp_ds):
+        """Determine the window of the RAMP DEM covering the max box
+
+        Only the georeferencing of the RAMP DEM is read.
+
+        Args:
+            ramp_ds <gdal.Dataset>: The open RAMP DEM
+
+        Returns:
+            <tuple>: The window (X offset, Y offset, X size, Y size)
+
+        Raises:
+            RAMPCoverageError: When the RAMP DEM does not cover the max box
+        """
+
+        logger = logging.getLogger(__name__)
+
+        ramp_wkt = ramp_ds.GetProjection()
+        logger.debug('RAMP WKT: {0}'.format(ramp_wkt))
+
+        def create_transformation():
+            """Create the geographic to RAMP coordinate transformation"""
+
+            # Create the RAMP SRS
+            ramp_srs = osr.SpatialReference()
+            ramp_srs.ImportFromWkt(ramp_wkt)
+
+            # Create the Geographic SRS
+            latlon_srs = ramp_srs.CloneGeogCS()
+
+            # Create the coordinate transformation
+            return osr.CoordinateTransformation(latlon_srs, ramp_srs)
+
+        ll_to_ramp = ResidentSources.get(('ll_to_ramp', ramp_wkt),
+                                         create_transformation)
+
+        # Find the center of the max box
+        center_latitude = ((self.bounding_north_latitude +
+                            self.bounding_south_latitude) / 2.0)
+        center_longitude = ((self.bounding_east_longitude +
+                             self.bounding_west_longitude) / 2.0)
+
+        # Find the max box and center in map coordinates
+        (map_ul_x, map_ul_y, height) = (
+            ll_to_ramp.TransformPoint(self.bounding_west_longitude,
+                                      self.bounding_north_latitude))
+        (map_ur_x, map_ur_y, height) = (
+            ll_to_ramp.TransformPoint(self.bounding_east_longitude,
+                                      self.bounding_north_latitude))
+        (map_lr_x, map_lr_y, height) = (
+            ll_to_ramp.TransformPoint(self.bounding_east_longitude,
+                                      self.bounding_south_latitude))
+        (map_ll_x, map_ll_y, height) = (
+            ll_to_ramp.TransformPoint(self.bounding_west_longitude,
+                                      self.bounding_south_latitude))
+        (map_center_x, map_center_y, height) = (
+            ll_to_ramp.TransformPoint(center_longitude, center_latitude))
+        logger.debug('map_ul_x, map_ul_y: {0}, {1}'
+                     .format(map_ul_x, map_ul_y))
+        logger.debug('map_ur_x, map_ur_y: {0}, {1}'
+                     .format(map_ur_x, map_ur_y))
+        logger.debug('map_lr_x, map_lr_y: {0}, {1}'
+                     .format(map_lr_x, map_lr_y))
+        logger.debug('map_ll_x, map_ll_y: {0}, {1}'
+                     .format(map_ll_x, map_ll_y))
+        logger.debug('map_center_x, map_center_y: {0}, {1}'
+                     .format(map_center_x, map_center_y))
+
+        # Get the RAMP transform
+        ramp_transform = ramp_ds.GetGeoTransform()
+
+        # Get the lines and samples from the RAMP band data
+        ramp_band = ramp_ds.GetRasterBand(1)
+        logger.debug('Lines, Samples: {0}, {1}'
+                     .format(ramp_band.YSize, ramp_band.XSize))
+
+        # This causes an exception if they do not overlap
+        self._verify_ramp_overlap(ramp_band.YSize, ramp_band.XSize,
+                                  ramp_transform,
+                                  map_ul_x, map_ul_y,
+                                  map_ur_x, map_ur_y,
+                                  map_lr_x, map_lr_y,
+                                  map_ll_x, map_ll_y,
+                                  map_center_x, map_center_y)
+
+        # Only the window of the RAMP DEM covering the data is warped
+        ramp_window = self.get_ramp_window(ll_to_ramp, ramp_transform,
+                                           ramp_band.YSize, ramp_band.XSize)
+        logger.info('RAMP Window (X offset, Y offset, X size, Y size):'
+                    ' {0}'.format(ramp_window))
+
+        return ramp_window
+
+    @measured_stage
+    def generate_using_ramp(self):
+        """Retrieve the RAMP DEM data"""
+
+        # The header must be available beside the image
+        self.get_source_path(self.ramp_header_path)
+
+        # Open the RAMP dataset, which stays open in the worker daemon
+        ramp_ds = ResidentSources.open_dataset(
+            self.get_source_path(self.ramp_image_path))
+        if ramp_ds is None:
+            raise RuntimeError('GDAL failed to open ({0})'
+                               .format(self.ramp_image_path))
+
+        # Only the window of the RAMP DEM covering the data is warped
+        ramp_window = self.locate_ramp_window(ramp_ds)
+
+        # Reference the window, sharing the already open dataset
+        ramp_window_name = self.intermediate_path(self.ramp_window_name)
+        Geo.translate(ramp_ds, ramp_window_name,
+                      output_format='VRT',
+                      window=ramp_window,
+                      engine=self.warp_engine)
+        del ramp_ds
+
+        # Warp to the source data
+        self.warp_to_source_data(ramp_window_name)
+
+        # Remove the window
+        Geo.remove_file(ramp_window_name)
+
+    @measured_stage
+    def stage_tiles(self, stage_tile, tiles):
+        """Stages the tiles concurrently with a bounded pool of workers
+
+        Staging is dominated by storage latency, so it is performed by
+        threads.  The time to stage each tile is logged.
+
+        Args:
+            stage_tile <function>: Called with a tile to stage it
+            tiles <list>: The tiles to stage
+
+        Returns:
+            <list>: The results of staging each tile, in the order of the
+                    tiles
+        """
+
+        logger = logging.getLogger(__name__)
+
+        def timed_stage_tile(tile):
+            """Stage a tile and log the time it took"""
+
+            start_time = time.time()
+            result = stage_tile(tile)
+            logger.info('Staged tile {0} in {1:.3f} seconds'
+                        .format(tile, time.time() - start_time))
+
+            return result
+
+        workers = min(self.staging_workers, len(tiles))
+        if workers <= 1:
+            return [timed_stage_tile(tile) for tile in tiles]
+
+        # The workers record to the metrics of this run, within the stages
+        # in progress here
+        stage_names = list(self.metrics.get_stage_names())
+
+        def worker_stage_tile(tile):
+            """Stage a tile in a worker thread"""
+
+            with self.metrics.activate(stage_names):
+                return timed_stage_tile(tile)
+
+        pool = ThreadPool(workers)
+        try:
+            return pool.map(worker_stage_tile, tiles)
+        finally:
+            pool.close()
+            pool.join()
+
+    def get_gtopo30_tile_list(self):
+        """Generate the list of GTOPO30 DEM tiles"""
+
+        logger = logging.getLogger(__name__)
+
+        # GTOPO30 tile information
+        NORTH_LON_LOCATIONS = np.array([-180.0, -140.0, -100.0, -60.0, -20.0,
+                                        20.0, 60.0, 100.0, 140.0])
+
+        SOUTH_LON_LOCATIONS = np.array([-180.0, -120.0, -60.0,
+                                        0.0, 60.0, 120.0])
+
+        LAT_LOCATIONS = np.array([90.0, 40.0, -10.0, -60.0])
+
+        GTOPO30_TILE_SET_CUTOFF_LATITUDE = -60.0
+
+        '''
+        The tiles do not necessarily go all the way to the boundary.  For
+        example, the w100n90 tile only goes to -99.995833333334 longitude.
+        Thus, if our UL longitude falls between -99.995833333334 and -100.0
+        then we will need to use w140n90 to get the far left edge.  To
+        account for this we'll artificially pad the East and West boundaries
+        by 1 degree.
+
+        Note: this does not seem to cause problems on the North and South
+        borders, so we will no worry about them.
+        '''
+        ul_lon = Math.longitude_norm(self.bounding_west_longitude -
+                                     self.gtopo30_padding)
+        lr_lon = Math.longitude_norm(self.bounding_east_longitude +
+                                     self.gtopo30_padding)
+        logger.debug('ul_lon = {0}'.format(ul_lon))
+        logger.debug('lr_lon = {0}'.format(lr_lon))
+
+        '''
+        There is a condition which could cause problems on the North and South
+        boundaries as well.  This is if a scene comes very near the edge, but
+        does not quite get there.  It could be that adding 1.5 to nrows before
+        taking the ceiling (see calculation of nrows in get_gtopo30_data.c)
+        causes the nrows to be large enough that we need data from the tile to
+        the South, even though the scene stopped just before that tile.  To
+        address this we will grow North and South by 1 degree as we did in the
+        East and West directions above.  Note, the same problem can occur in
+        the East and West directions, but was already addressed when adding
+        one to the longitudes above.
+        '''
+        ul_lat = min((self.bounding_north_latitude + self.gtopo30_padding),
+                     self.north_latitude_limit)
+        lr_lat = max((self.bounding_south_latitude - self.gtopo30_padding),
+                     self.south_latitude_limit)
+        logger.debug('ul_lat = {0}'.format(ul_lat))
+        logger.debug('lr_lat = {0}'.format(lr_lat))
+
+        # Determine the unique latitudes where the input data resides
+        lat_list = list(set([min(LAT_LOCATIONS[np.where(ul_lat < LAT_LOCATIONS)]),
+                             min(LAT_LOCATIONS[np.where(lr_lat < LAT_LOCATIONS)])]))
+        logger.debug('lat_list = {0}'.format(lat_list))
+
+        tile_list = list()
+        # Determine the unique longitudes where the input data resides
+        for lat in lat_list:
+            lon_list = list()
+            if lat > GTOPO30_TILE_SET_CUTOFF_LATITUDE:
+                lon_list.append(
+                    max(NORTH_LON_LOCATIONS[
+                        np.where(ul_lon > NORTH_LON_LOCATIONS)]))
+                lon_list.append(
+                    max(NORTH_LON_LOCATIONS[
+                        np.where(lr_lon > NORTH_LON_LOCATIONS)]))
+            else:
+                lon_list.append(
+                    max(SOUTH_LON_LOCATIONS[
+                        np.where(ul_lon > SOUTH_LON_LOCATIONS)]))
+                lon_list.append(
+                    max(SOUTH_LON_LOCATIONS[
+                        np.where(lr_lon > SOUTH_LON_LOCATIONS)]))
+            lon_list = list(set(lon_list))
+            logger.debug('lon_list = {0}'.format(lon_list))
+
+            n_s = 'n'
+            if lat < 0:
+                n_s = 's'
+
+            for lon in lon_list:
+                e_w = 'e'
+                if lon <= 0:
+                    e_w = 'w'
+
+                # Already know if north/south, east/west so we just need
+                # the positive value for the filename
+                abs_lat = abs(lat)
+                abs_lon = abs(lon)
+
+                tile_list.append('{0}{1:03}{2}{3:02}'
+                                 .format(e_w, int(abs_lon), n_s, int(abs_lat)))
+
+        return tile_list
+
+    def get_gtopo30_archive_dem(self, tile_path):
+        """Determine the GDAL path to the DEM inside a GTOPO30 archive
+
+        The archive is read in place through the GDAL /vsitar/ virtual file
+        system, so nothing is copied or extracted.
+
+        Args:
+            tile_path <str>: Path to the GTOPO30 tile archive
+
+        Returns:
+            <str>: The /vsitar/ path to the DEM member of the archive
+        """
+
+        archive_dir = '/vsitar/{0}'.format(tile_path)
+
+        members = gdal.ReadDir(archive_dir)
+        if members is None:
+            raise RuntimeError('Unable to read GTOPO30 archive ({0})'
+                               .format(tile_path))
+
+        for member in members:
+            if fnmatch.fnmatch(member, self.gtopo30_dems_regexp):
+                return '/'.join([archive_dir, member])
+
+        raise RuntimeError('GTOPO30 DEM not found in archive ({0})'
+                           .format(tile_path))
+
+    def get_gtopo30_dems(self, shift_west=False):
+        """Locates the GTOPO30 DEMs within their archives
+
+        Args:
+            shift_west <bool>: Shift the western hemisphere DEMs to use the
+                               0..360 longitude range
+
+        Returns:
+            <list>: The paths to the DEMs, in the order of the tiles
+        """
+
+        logger = logging.getLogger(__name__)
+
+        elevation_dir = os.path.join(self.espa_elevation_dir, self.gtopo30_dir)
+
+        # Determine the GTOPO30 tiles
+        tile_list = self.get_gtopo30_tile_list()
+        logger.info('GTOPO30 Tile Names: {0}'.format(', '.join(tile_list)))
+
+        def stage_tile(tile):
+            """Locate the DEM of a tile, shifting it when requested"""
+
+            tile_arch = '{0}.tar.gz'.format(tile)
+            tile_path = self.get_source_path(os.path.join(elevation_dir,
+                                                          tile_arch))
+
+            dem_path = self.get_gtopo30_archive_dem(tile_path)
+
+            dem_name = os.path.basename(dem_path)
+            if shift_west and dem_name[:1] == 'W':
+
+                # Name the shifted output file, which is written to the
+                # intermediates since the archives are read-only
+                shifted_path = self.intermediate_path(
+                    '{0}_shifted.vrt'.format(dem_name))
+
+                # Shift the longitude values
+                self.shift_longitude(dem_path, shifted_path, 360,
+                                     config_options=GTOPO30_CONFIG_OPTIONS)
+
+                # Use the shifted tile in place of the archived tile
+                logger.info('Shifted GTOPO30 DEM: {0}'.format(shifted_path))
+                dem_path = shifted_path
+
+            return dem_path
+
+        tile_elevation_list = self.stage_tiles(stage_tile, tile_list)
+
+        logger.info('GTOPO30 DEM Files: {0}'
+                    .format(', '.join(tile_elevation_list)))
+
+        return tile_elevation_list
+
+    @measured_stage
+    def generate_using_gtopo30(self):
+        """Generate the DEM using GTOPO30 data"""
+
+        # If the image crosses the 180 meridian, shift the west tile
+        # longitudes to use the 0..360 range so the mosaic is not confused
+        start_longitude = int(math.floor(self.bounding_west_longitude))
+        end_longitude = int(math.floor(self.bounding_east_longitude))
+        shift_west = start_longitude > 0 and end_longitude < 0
+
+        # The configuration options apply for as long as the archives are
+        # read, and are also passed to the GDAL command line tools
+        with Geo.config_options(GTOPO30_CONFIG_OPTIONS):
+            # Retrieve the GTOPO30 tiles
+            tile_elevation_list = self.get_gtopo30_dems(shift_west=shift_west)
+
+            # MOSAIC the tiles together
+            mosaic_name = self.mosaic_tiles(
+                tile_elevation_list, config_options=GTOPO30_CONFIG_OPTIONS)
+
+            # Warp to the source data
+            self.warp_to_source_data(mosaic_name,
+                                     config_options=GTOPO30_CONFIG_OPTIONS)
+
+        # Cleanup intermediate data
+        self.mosaic_cleanup()
+
+        # Remove any shifted tiles
+        for file_name in tile_elevation_list:
+            if file_name.endswith('_shifted.vrt'):
+                Geo.remove_file(file_name)
+
+    @staticmethod
+    def get_gls_srs(prj_path):
+        """Provides the projection of the GLS tiles
+
+        Args:
+            prj_path <str>: Path to the ESRI projection file for the tiles
+
+        Returns:
+            <str>: PROJ.4 projection of the GLS tiles
+        """
+
+        with open(prj_path, 'r') as prj_fd:
+            prj_lines = prj_fd.readlines()
+
+        srs = osr.SpatialReference()
+        if srs.ImportFromESRI(prj_lines) != 0:
+            raise RuntimeError('Unable to read the GLS projection from {0}'
+                               .format(prj_path))
+
+        return srs.ExportToProj4()
+
+    def get_gls_tiles(self):
+        """Determine the available GLS tiles covering the max box
+
+        Returns:
+            <list>: Names of the available tiles, in mosaic order
+            <dict>: (BIL path, HDR path) of the available tiles, by name
+
+        Raises:
+            GLSOverWaterError: When none of the tiles are available
+        """
+
+        logger = logging.getLogger(__name__)
+
+        elevation_dir = os.path.join(self.espa_elevation_dir, self.gls_dir)
+
+        '''
+        GLS tiles are named with a format like n47w118 where the lat/long
+        in the file name are the lower-left corner of the tile.  Each tile
+        covers a 1-degree by 1-degree area. */
+        '''
+        start_latitude = int(math.floor(self.bounding_north_latitude))
+        end_latitude = int(math.floor(self.bounding_south_latitude))
+        start_longitude = int(math.floor(self.bounding_west_longitude))
+        end_longitude = int(math.floor(self.bounding_east_longitude))
+        logger.debug('Start Latitude: {0}'.format(start_latitude))
+        logger.debug('End Latitude: {0}'.format(end_latitude))
+        logger.debug('Start Longitude: {0}'.format(start_longitude))
+        logger.debug('End Longitude: {0}'.format(end_longitude))
+
+        tile_list = list()
+
+        # Build the list of longitudes to process, taking into account that
+        # there could be a 180 meridian crossing.
+        longitude_list = list()
+        if start_longitude > 0 and end_longitude < 0:
+            # The start and end longitudes are on different sides of the
+            # antimeridian.  Note: there are no e180 GLS tiles, only some
+            # w180 tiles, so don't look for e180.
+            for lon in xrange(start_longitude, 179 + 1):
+                longitude_list.append(lon)
+            for lon in xrange(-180, end_longitude + 1):
+                longitude_list.append(lon)
+        else:
+            for lon in xrange(start_longitude, end_longitude + 1):
+                longitude_list.append(lon)
+
+        for lat in xrange(end_latitude, start_latitude + 1):
+            logger.debug('Latitude: {0}'.format(lat))
+            n_s = 'n'
+            if lat < 0:
+                n_s = 's'
+
+            for lon in longitude_list:
+                logger.debug('Longitude: {0}'.format(lon))
+
+                e_w = 'e'
+                if lon < 0:
+                    e_w = 'w'
+
+                # Already know if north/south, east/west so we just need
+                # the positive value for the filename
+                abs_lat = abs(lat)
+                abs_lon = abs(lon)
+
+                tile_list.append('{0}{1:02}{2}{3:03}'
+                                 .format(n_s, abs_lat, e_w, abs_lon))
+
+        tile_count = len(tile_list)
+        if tile_count == 0:
+            raise RuntimeError('Unable to determine tiles while retrieving'
+                               ' required GLS DEM tile list')
+
+        '''
+        Find the available tiles with one index query, and determine any
+        missing tiles.  The tiles are referenced where they are, so no
+        links are needed, and the projection the links to the PRJ provided
+        is given to the MOSAIC instead.
+        '''
+        if start_longitude > 0 and end_longitude < 0:
+            longitude_ranges = [(start_longitude, 179),
+                                (-180, end_longitude)]
+        else:
+            longitude_ranges = [(start_longitude, end_longitude)]
+
+        gls_index = GLSTileIndex(elevation_dir, self.gls_index_filename)
+        available_tiles = gls_index.find_tiles(end_latitude, start_latitude,
+                                               longitude_ranges)
+
+        present_list = list()
+        for tile in tile_list:
+            if tile in available_tiles:
+                present_list.append(tile)
+            else:
+                logger.debug('Missing Tile: {0}.bil'.format(tile))
+
+        missing_count = tile_count - len(present_list)
+        logger.debug('Expected Tile Count: {0}'.format(tile_count))
+        logger.debug('Missing Tile Count: {0}'.format(missing_count))
+
+        # Check if we are missing all the tiles, which indicates over water
+        if missing_count >= tile_count:
+            raise GLSOverWaterError('GLS DEM is over water')
+
+        return (present_list, available_tiles)
+
+    @measured_stage
+    def generate_using_gls(self):
+        """Retrieve the GLS DEM data"""
+
+        logger = logging.getLogger(__name__)
+
+        elevation_dir = os.path.join(self.espa_elevation_dir, self.gls_dir)
+
+        (present_list, available_tiles) = self.get_gls_tiles()
+
+        # If the image crosses the 180 meridian, shift the west tile
+        # longitudes to use the 0..360 range so the mosaic is not confused
+        start_longitude = int(math.floor(self.bounding_west_longitude))
+        end_longitude = int(math.floor(self.bounding_east_longitude))
+        shift_west = start_longitude > 0 and end_longitude < 0
+
+        def stage_tile(tile):
+            """Provide the path to a tile, shifting it when required
+
+            Returns:
+                <str>: Path to the tile
+                <bool>: True if the tile was shifted into the scratch
+                        directory
+            """
+
+            (bil_path, hdr_path) = available_tiles[tile]
+            logger.debug('BIL Path: {0}'.format(bil_path))
+            logger.debug('HDR Path: {0}'.format(hdr_path))
+
+            # The header is read through the same cache as the image,
+            # so GDAL finds it next to the image
+            self.get_source_path(hdr_path)
+            bil_path = self.get_source_path(bil_path)
+
+            hemisphere = os.path.basename(bil_path)[3:4]
+            if shift_west and hemisphere == "w":
+
+                # Name the shifted output file
+                shifted_path = self.intermediate_path(
+                    '{0}_shifted.vrt'.format(os.path.basename(bil_path)))
+
+                # Shift the longitude values
+                self.shift_longitude(bil_path, shifted_path, 360)
+
+                return (shifted_path, True)
+
+            return (bil_path, False)
+
+        staged_list = self.stage_tiles(stage_tile, present_list)
+
+        bil_list = [bil_path for (bil_path, shifted) in staged_list]
+        shifted_list = [bil_path for (bil_path, shifted) in staged_list
+                        if shifted]
+
+        logger.info('GLS DEM Files: {0}'.format(', '.join(bil_list)))
+
+        prj_path = os.path.join(elevation_dir, self.gls_projection_template)
+        logger.debug('PRJ Path: {0}'.format(prj_path))
+        gls_srs = self.get_gls_srs(self.get_source_path(prj_path))
+
+        # MOSAIC the tiles together
+        mosaic_name = self.mosaic_tiles(bil_list, source_srs=gls_srs)
+
+        # Warp to the source data
+        self.warp_to_source_data(mosaic_name)
+
+        # Cleanup intermediate data
+        self.mosaic_cleanup()
+
+        for file_name in shifted_list:
+            Geo.remove_file(file_name)
+
+    def add_geoid_to_elevation(self, read_geoid_block, lines, samples):
+        """Adds the GEOID adjustments to the elevation in blocks of lines
+
+        The elevation file is updated in place through a memory map, so peak
+        memory is bounded by the block size rather than the image size.
+
+        Args:
+            read_geoid_block <function>: Called with the start line, number
+                                         of lines, and number of samples to
+                                         provide an Int16 block of the GEOID
+            lines <int>: Number of lines in the elevation
+            samples <int>: Number of samples in the elevation
+        """
+
+        logger = logging.getLogger(__name__)
+
+        logger.debug('Adjusting elevation to WGS84 in blocks of {0} lines'
+                     .format(self.geoid_block_lines))
+
+        elevation_data = np.memmap(self.elevation_image_name,
+                                   dtype=np.int16,
+                                   mode='r+',
+                                   shape=(lines, samples))
+
+        for start_line in xrange(0, lines, self.geoid_block_lines):
+            block_lines = min(self.geoid_block_lines, lines - start_line)
+            end_line = start_line + block_lines
+
+            # Use numpy math to add the datasets together in place
+            elevation_data[start_line:end_line] += (
+                read_geoid_block(start_line, block_lines, samples))
+
+        # Write the updated data to the elevation filename
+        elevation_data.flush()
+        del elevation_data
+
+    def get_output_grid_key(self):
+        """Describes everything which determines a warp to the output grid
+
+        Returns:
+            <dict>: The output grid, warp accuracy, and software version
+        """
+
+        return {'target_srs': self.target_srs,
+               'extents': [repr(float(self.min_x_extent)),
+                           repr(float(self.min_y_extent)),
+                           repr(float(self.max_x_extent)),
+                           repr(float(self.max_y_extent))],
+               'resolution': [repr(float(self.pixel_resolution_x)),
+                              repr(float(self.pixel_resolution_y))],
+               'resampling_method': self.elevation_resampling_method,
+               'error_threshold': self.warp_profile['error_threshold'],
+               'working_type': self.warp_profile['working_type'],
+               'software_version': SOFTWARE_VERSION}
+
+    def get_geoid_cache_key(self):
+        """Provides the key for the warped GEOID of the output grid
+
+        The key is a digest of everything which determines the warped GEOID.
+
+        Returns:
+            <str>: Hexadecimal digest identifying the warped GEOID
+        """
+
+        key = self.get_output_grid_key()
+
+        return hashlib.sha1(json.dumps(key, sort_keys=True)).hexdigest()
+
+    def get_product_cache_key(self):
+        """Provides the key for the elevation product of the output grid
+
+        The key is a digest of everything which determines the product: the
+        output grid, the elevation source selected for the max box, how the
+        GEOID adjustment is determined, and the output format.
+
+        Returns:
+            <str>: Hexadecimal digest identifying the elevation product
+        """
+
+        key = self.get_output_grid_key()
+        key['elevation_source'] = self.select_elevation_source()
+        key['geoid_mode'] = self.geoid_mode
+        if self.geoid_mode == GEOID_MODE_GRID:
+            key['geoid_grid_step'] = self.geoid_grid_step
+        key['output_format'] = self.output_format
+        (store, window) = self.find_grid_store()
+        if store is not None:
+            key['grid_store'] = store['name']
+
+        return hashlib.sha1(json.dumps(key, sort_keys=True)).hexdigest()
+
+    @measured_stage
+    def warp_geoid(self, output_filename, output_format):
+        """Warps the WGS84 GEOID to the elevation/product grid
+
+        Args:
+            output_filename <str>: Path to the output filename
+            output_format <str>: GDAL format for the output
+        """
+
+        # The header must be available beside the image
+        self.get_source_path(self.wgs84_header_path)
+
+        # Open the WGS84 GEOID, which stays open in the worker daemon
+        geoid_ds = ResidentSources.open_dataset(
+            self.get_source_path(self.wgs84_image_path))
+        if geoid_ds is None:
+            raise RuntimeError('GDAL failed to open ({0})'
+                               .format(self.wgs84_image_path))
+
+        image_extents = {'min_x': self.min_x_extent,
+                         'min_y': self.min_y_extent,
+                         'max_x': self.max_x_extent,
+                         'max_y': self.max_y_extent}
+
+        # Warp the GEOID to the elevation/product projection
+        Geo.warp(resampling_method=self.elevation_resampling_method,
+                 resolution_x=self.pixel_resolution_x,
+                 resolution_y=self.pixel_resolution_y,
+                 target_srs=self.target_srs,
+                 image_extents=image_extents,
+                 output_data_type=self.elevation_type_int16,
+                 output_format=output_format,
+                 source_data=geoid_ds,
+                 output_filename=output_filename,
+                 engine=self.warp_engine,
+                 profile=self.warp_profile)
+
+        del geoid_ds
+
+    def evaluate_geoid_grid(self, lines, samples):
+        """Evaluates the WGS84 GEOID on a sparse grid of output pixels
+
+        Every geoid_grid_step'th line and sample of the output, plus the
+        position one beyond the last, is transformed to geographic
+        coordinates and the GEOID is bilinearly interpolated there.
+
+        Args:
+            lines <int>: Number of lines in the output
+            samples <int>: Number of samples in the output
+
+        Returns:
+            <ndarray:int>: Output lines of the grid
+            <ndarray:int>: Output samples of the grid
+            <ndarray:float32>: GEOID values on the grid
+        """
+
+        logger = logging.getLogger(__name__)
+
+        grid_lines = np.unique(np.append(
+            np.arange(0, lines, self.geoid_grid_step), lines))
+        grid_samples = np.unique(np.append(
+            np.arange(0, samples, self.geoid_grid_step), samples))
+        logger.debug('Evaluating the GEOID on a {0} x {1} grid'
+                     .format(len(grid_lines), len(grid_samples)))
+
+        # The header must be available beside the image
+        self.get_source_path(self.wgs84_header_path)
+        geoid_path = self.get_source_path(self.wgs84_image_path)
+        geoid_ds = ResidentSources.open_dataset(geoid_path)
+        if geoid_ds is None:
+            raise RuntimeError('GDAL failed to open ({0})'
+                               .format(self.wgs84_image_path))
+
+        geoid_transform = geoid_ds.GetGeoTransform()
+        geoid_data = ResidentSources.get(
+            ('geoid_data', geoid_path),
+            lambda: geoid_ds.GetRasterBand(1).ReadAsArray()
+            .astype(np.float64))
+        geoid_wkt = geoid_ds.GetProjection()
+
+        def create_transformation():
+            """Create the coordinate transformation to the GEOID"""
+
+            target_srs = osr.SpatialReference()
+            target_srs.ImportFromProj4(self.target_srs)
+            geoid_srs = osr.SpatialReference()
+            geoid_srs.ImportFromWkt(geoid_wkt)
+            for srs in (target_srs, geoid_srs):
+                # GDAL 3 would otherwise use latitude, longitude order
+                if hasattr(srs, 'SetAxisMappingStrategy'):
+                    srs.SetAxisMappingStrategy(
+                        osr.OAMS_TRADITIONAL_GIS_ORDER)
+            return osr.CoordinateTransformation(target_srs, geoid_srs)
+
+        to_geoid = ResidentSources.get(('to_geoid', self.target_srs,
+                                        geoid_wkt),
+                                       create_transformation)
+
+        # Map coordinates of the pixel centers
+        map_x = (self.min_x_extent +
+                 (grid_samples + 0.5) * self.pixel_resolution_x)
+        map_y = (self.max_y_extent -
+                 (grid_lines + 0.5) * self.pixel_resolution_y)
+
+        points = [(float(x), float(y)) for y in map_y for x in map_x]
+        coordinates = np.array(to_geoid.TransformPoints(points))
+
+        longitudes = (coordinates[:, 0] + 180.0) % 360.0 - 180.0
+        latitudes = coordinates[:, 1]
+
+        grid_values = Math.bilinear_sample(geoid_data, geoid_transform,
+                                           longitudes, latitudes)
+
+        del to_geoid
+        del geoid_data
+        geoid_ds = None
+
+        return (grid_lines, grid_samples,
+                grid_values.reshape(len(grid_lines),
+                                    len(grid_samples)).astype(np.float32))
+
+    def adjust_elevation_to_wgs84_using_grid(self):
+        """Adjusts the elevation to the WGS84 GEOID evaluated on a grid
+
+        The GEOID is smooth at the scale of an output pixel, so instead of
+        warping it to the full output grid it is evaluated on a sparse grid
+        (see evaluate_geoid_grid) and bilinearly upsampled with numpy.
+
+        Accuracy:
+            The warped GEOID is the bilinear interpolation of 0.5 degree
+            integer meter values, so it is linear between the GEOID samples
+            and only bends where it crosses them.  With the default step of
+            64 pixels at 30 meters (1.92 km), an upsampled cell spans about
+            4% of a GEOID sample spacing at the equator (about 8% at 60
+            degrees of latitude), so the interpolated separation
+            differs from the warped separation by a few centimeters.  After
+            rounding to Int16, output pixels match the warp mode except for
+            a difference of 1 meter where the separation lies within those
+            few centimeters of a half meter.
+        """
+
+        logger = logging.getLogger(__name__)
+
+        elevation_ds = gdal.Open(self.elevation_image_name)
+        lines = elevation_ds.RasterYSize
+        samples = elevation_ds.RasterXSize
+        del elevation_ds
+
+        (grid_lines, grid_samples, grid_values) = (
+            self.evaluate_geoid_grid(lines, samples))
+
+        (line_indexes, line_weights) = (
+            Math.linear_interpolation_weights(grid_lines, lines))
+        (sample_indexes, sample_weights) = (
+            Math.linear_interpolation_weights(grid_samples, samples))
+
+        def read_geoid_block(start_line, block_lines, samples):
+            """Upsample a block of lines of the GEOID from the grid"""
+
+            end_line = start_line + block_lines
+            indexes = line_indexes[start_line:end_line]
+            weights = line_weights[start_line:end_line, np.newaxis]
+
+            # Interpolate the grid to the lines, then to the samples
+            rows = (grid_values[indexes] * (1.0 - weights) +
+                    grid_values[indexes + 1] * weights)
+            block = (rows[:, sample_indexes] * (1.0 - sample_weights) +
+                     rows[:, sample_indexes + 1] * sample_weights)
+
+            return np.rint(block).astype(np.int16)
+
+        logger.info('Adjusting elevation to WGS84 using a GEOID grid with'
+                    ' a step of {0} pixels'.format(self.geoid_grid_step))
+        self.add_geoid_to_elevation(read_geoid_block, lines, samples)
+
+    @measured_stage
+    def adjust_elevation_to_wgs84(self):
+        """Adjusts the warped elevation to the WGS84 GEOID"""
+
+        logger = logging.getLogger(__name__)
+
+        if self.geoid_mode == GEOID_MODE_GRID:
+            self.adjust_elevation_to_wgs84_using_grid()
+            return
+
+        geoid_header_name = self.intermediate_path('espa-geoid.hdr')
+        geoid_image_name = self.intermediate_path('espa-geoid.img')
+
+        if self.geoid_cache is None:
+            self.warp_geoid(geoid_image_name, self.elevation_format)
+            geoid_path = geoid_image_name
+        else:
+            # Warped GEOIDs are cached as single file GeoTIFFs
+            geoid_cache_name = '{0}.tif'.format(self.get_geoid_cache_key())
+            geoid_path = self.geoid_cache.get_or_create(
+                geoid_cache_name,
+                lambda temp_path: self.warp_geoid(temp_path, 'GTiff'))
+            logger.info('Using cached GEOID grid: {0}'.format(geoid_path))
+
+        # Open the WGS84 and elevation datasets
+        geoid_ds = gdal.Open(geoid_path)
+        elevation_ds = gdal.Open(self.elevation_image_name)
+
+        # Get the WGS84 and elevation band information
+        geoid_band = geoid_ds.GetRasterBand(1)
+        elevation_band = elevation_ds.GetRasterBand(1)
+
+        # Verify they are the same size, otherwise something broke
+        if (geoid_band.XSize != elevation_band.XSize or
+                geoid_band.YSize != elevation_band.YSize):
+            raise Exception('The size of the GEOID and elevation do not match')
+
+        # Close the elevation before updating it in place
+        del elevation_band
+        del elevation_ds
+
+        def read_geoid_block(start_line, block_lines, samples):
+            """Read a block of lines from the warped GEOID"""
+
+            return geoid_band.ReadAsArray(0, start_line,
+                                          samples,
+                                          block_lines).astype(np.int16)
+
+        self.add_geoid_to_elevation(read_geoid_block,
+                                    geoid_band.YSize, geoid_band.XSize)
+
+        # Cleanup memory
+        del read_geoid_block
+        geoid_band = None
+        geoid_ds = None
+
+        # Remove the warped GEOID data
+        if self.geoid_cache is None:
+            Geo.remove_file(geoid_header_name)
+            Geo.remove_file(geoid_image_name)
+
+    def append_band(self, metadata, band):
+        """Implement this to add the band object to the metadata object"""
+        raise NotImplementedError('Please Implement Me In {0}'
+                                  .format(str(type(self))))
+
+    @measured_stage
+    def add_elevation_band_to_xml(self, elevation_source):
+        """Adds the elevation band to the ESPA Metadata XML file"""
+
+        metadata = self.get_metadata()
+
+        # Create an element maker
+        em = objectify.ElementMaker(annotate=False,
+                                    namespace=None,
+                                    nsmap=None)
+
+        # Create a band element
+        band = em.band()
+
+        # Set attributes for the band element
+        band.set('product', 'elevation')
+        band.set('source', elevation_source)
+        band.set('name', 'elevation')
+        band.set('category', 'image')
+        band.set('data_type', 'INT16')
+        band.set('nlines', str(self.number_of_lines))
+        band.set('nsamps', str(self.number_of_samples))
+        # Our current sources for elevation do not contain fill and we
+        # populate the entire bounds of the image with elevation values
+        # Setting to -9999 for consistency with our other INT16 products
+        band.set('fill_value', '-9999')
+
+        # Add elements to the band object
+        band.short_name = em.element('ELEVATION')
+        band.long_name = em.element('elevation')
+        band.file_name = em.element(self.elevation_image_name)
+
+        # Create a pixel size element
+        band.pixel_size = em.element()
+        # Add attrbutes to the pixel size object
+        band.pixel_size.set('x', str(self.pixel_resolution_x))
+        band.pixel_size.set('y', str(self.pixel_resolution_x))
+        band.pixel_size.set('units', self.pixel_units)
+
+        band.resample_method = em.element('bilinear')
+        band.data_units = em.element('meters')
+
+        # Set the software version
+        band.app_version = em.element(SOFTWARE_VERSION)
+
+        # Get the production date and time in string format
+        # Strip the microseconds and add a Z
+        date_now = ('{0}Z'.format(datetime.datetime.now()
+                                  .strftime('%Y-%m-%dT%H:%M:%S')))
+        band.production_date = em.element(date_now)
+
+        # Append the band to the XML, in the namespace of the XML
+        self.append_band(metadata, band)
+        MetadataSchemas.qualify(metadata.xml_object, band)
+
+        # Validate the XML, or only the band when the input XML is known to
+        # be valid
+        if self.xml_validation == XML_VALIDATION_BAND:
+            MetadataSchemas.validate_band(metadata, band)
+        else:
+            MetadataSchemas.validate(metadata)
+
+        # Write it to the XML file
+        metadata.write(xml_filename=self.xml_filename)
+
+        # Memory cleanup
+        del metadata
+        self.metadata = None
+
+    def get_output_dimensions(self):
+        """Determine the dimensions of the elevation from the extents
+
+        Returns:
+            <int>: Number of lines
+            <int>: Number of samples
+        """
+
+        samples = int(round((self.max_x_extent - self.min_x_extent) /
+                            self.pixel_resolution_x))
+        lines = int(round((self.max_y_extent - self.min_y_extent) /
+                          self.pixel_resolution_y))
+
+        return (lines, samples)
+
+    def estimate_intermediate_bytes(self):
+        """Estimate the scratch space needed for the intermediate files
+
+        Returns:
+            <int>: Estimated bytes, as a multiple of the Int16 output size
+        """
+
+        (lines, samples) = self.get_output_dimensions()
+
+        return lines * samples * 2 * SCRATCH_SIZE_FACTOR
+
+    def get_product_image_name(self):
+        """Determine the filename of the elevation product
+
+        The ENVI naming is used for a cloud optimized GeoTIFF, with the .img
+        extension replaced by .tif.
+
+        Returns:
+            <str>: Filename of the elevation product
+        """
+
+        if (self.output_format == OUTPUT_FORMAT_COG and
+                self.elevation_image_name.endswith('.img')):
+            return self.elevation_image_name[:-len('.img')] + '.tif'
+
+        return self.elevation_image_name
+
+    @measured_stage
+    def write_cloud_optimized_geotiff(self, output_filename):
+        """Write the elevation as a tiled GeoTIFF with internal overviews
+
+        The overviews are built externally from the elevation first, so
+        COPY_SRC_OVERVIEWS can place them after the full resolution tiles,
+        which is the layout of a cloud optimized GeoTIFF.  GDAL only writes
+        that layout by copying a complete raster, so this single copy is
+        needed whatever format the elevation was warped to.
+
+        Args:
+            output_filename <str>: Path to the GeoTIFF
+        """
+
+        logger = logging.getLogger(__name__)
+
+        (lines, samples) = self.get_output_dimensions()
+        levels = Geo.get_overview_levels(lines, samples, COG_BLOCK_SIZE)
+        if len(levels) > 0:
+            Geo.build_overviews(self.elevation_image_name, levels,
+                                'average', engine=self.warp_engine)
+
+        Geo.translate(self.elevation_image_name, output_filename,
+                      output_format='GTiff',
+                      creation_options=[
+                          'TILED=YES',
+                          'BLOCKXSIZE={0}'.format(COG_BLOCK_SIZE),
+                          'BLOCKYSIZE={0}'.format(COG_BLOCK_SIZE),
+                          'COMPRESS=DEFLATE',
+                          'PREDICTOR=2',
+                          'COPY_SRC_OVERVIEWS=YES',
+                          'BIGTIFF=IF_SAFER'],
+                      no_data=-9999,
+                      engine=self.warp_engine)
+
+        logger.info('Wrote cloud optimized GeoTIFF {0} with overviews {1}'
+                    .format(output_filename, levels))
+
+    def select_scratch_root(self):
+        """Determine the directory to create the scratch directory in
+
+        For SCRATCH_ROOT_AUTO, tmpfs is used when the estimated intermediate
+        size fits within its free space, otherwise the current directory.
+
+        Returns:
+            <str>: The scratch root directory
+        """
+
+        logger = logging.getLogger(__name__)
+
+        if self.scratch_root != SCRATCH_ROOT_AUTO:
+            return self.scratch_root
+
+        if os.path.isdir(TMPFS_DIR):
+            required_bytes = self.estimate_intermediate_bytes()
+            stats = os.statvfs(TMPFS_DIR)
+            available_bytes = stats.f_bavail * stats.f_frsize
+            logger.debug('Scratch estimate {0} bytes, {1} has {2} bytes'
+                         ' available'.format(required_bytes, TMPFS_DIR,
+                                             available_bytes))
+            if required_bytes < available_bytes:
+                return TMPFS_DIR
+
+        return os.curdir
+
+    def select_intermediate_storage(self):
+        """Determine where to keep the intermediate rasters
+
+        For INTERMEDIATE_STORAGE_AUTO, memory is used when the estimated
+        intermediate size fits within the memory limit.  The GDAL in-memory
+        filesystem is private to this process, so the command line engine
+        always uses the disk.
+
+        Returns:
+            <str>: INTERMEDIATE_STORAGE_DISK or INTERMEDIATE_STORAGE_MEMORY
+        """
+
+        logger = logging.getLogger(__name__)
+
+        if self.intermediate_storage == INTERMEDIATE_STORAGE_DISK:
+            return INTERMEDIATE_STORAGE_DISK
+
+        if self.warp_engine != WARP_ENGINE_API:
+            logger.warning('In-memory intermediates require the GDAL API'
+                           ' engine, using the scratch directory')
+            return INTERMEDIATE_STORAGE_DISK
+
+        if self.intermediate_storage == INTERMEDIATE_STORAGE_MEMORY:
+            return INTERMEDIATE_STORAGE_MEMORY
+
+        required_bytes = self.estimate_intermediate_bytes()
+        logger.debug('Intermediate estimate {0} bytes, memory limit {1}'
+                     ' bytes'.format(required_bytes,
+                                     self.intermediate_memory_limit))
+        if required_bytes <= self.intermediate_memory_limit:
+            return INTERMEDIATE_STORAGE_MEMORY
+
+        return INTERMEDIATE_STORAGE_DISK
+
+    def create_scratch_dir(self):
+        """Create the unique scratch directory for this job"""
+
+        logger = logging.getLogger(__name__)
+
+        scratch_root = self.select_scratch_root()
+        FileCache.make_dirs(scratch_root)
+
+        # Absolute, so VRTs in the scratch directory resolve their sources
+        self.scratch_dir = os.path.abspath(
+            tempfile.mkdtemp(prefix='espa-elevation-', dir=scratch_root))
+        logger.info('Using scratch directory: {0}'.format(self.scratch_dir))
+
+        if self.select_intermediate_storage() == INTERMEDIATE_STORAGE_MEMORY:
+            # Named after the scratch directory, so it is unique as well
+            self.memory_dir = '/vsimem/{0}'.format(
+                os.path.basename(self.scratch_dir))
+            logger.info('Using in-memory intermediates: {0}'
+                        .format(self.memory_dir))
+
+    def remove_scratch_dir(self):
+        """Remove the scratch directory and everything left in it"""
+
+        if self.memory_dir is not None:
+            for name in gdal.ReadDir(self.memory_dir) or list():
+                gdal.Unlink('{0}/{1}'.format(self.memory_dir, name))
+            self.memory_dir = None
+
+        if self.scratch_dir is not None:
+            shutil.rmtree(self.scratch_dir, ignore_errors=True)
+            self.scratch_dir = None
+
+    def scratch_path(self, name):
+        """Provides the path for an intermediate file in the scratch directory
+        """
+
+        if self.scratch_dir is None:
+            return name
+
+        return os.path.join(self.scratch_dir, name)
+
+    def intermediate_path(self, name):
+        """Provides the path for an intermediate raster
+
+        The raster is kept in memory when selected, otherwise in the scratch
+        directory.
+        """
+
+        if self.memory_dir is None:
+            return self.scratch_path(name)
+
+        return '{0}/{1}'.format(self.memory_dir, name)
+
+    def generate(self):
+        """Generates the elevation"""
+
+        with self.metrics.activate(), self.metrics.stage('generate'):
+            try:
+                with self.metrics.stage('parse_metadata'):
+                    self.parse_metadata()
+                self.create_scratch_dir()
+                self._generate()
+            finally:
+                with self.metrics.stage('cleanup'):
+                    self.remove_scratch_dir()
+
+                    for cache in (self.source_cache, self.geoid_cache,
+                                  self.product_cache):
+                        if cache is not None:
+                            cache.release()
+
+    @staticmethod
+    def plan_source_file(path, read_bytes=None):
+        """Describe a source file which would be read
+
+        Args:
+            path <str>: Path to the source file
+            read_bytes <int>: Bytes which would be read, if None the size of
+                              the file
+
+        Returns:
+            <dict>: The path, whether it exists, and the bytes to read
+        """
+
+        exists = os.path.isfile(path)
+        if read_bytes is None and exists:
+            read_bytes = os.path.getsize(path)
+
+        return {'path': path,
+                'exists': exists,
+                'bytes': read_bytes}
+
+    def plan(self):
+        """Determine how the elevation would be generated
+
+        The metadata is parsed, and the source, tiles, output grid, and any
+        fallback are determined the same as generate() would, but no raster
+        data is read or written.  Only the georeferencing of the RAMP DEM is
+        read, to predict whether it covers the data.
+
+        Returns:
+            <dict>: The processing plan
+        """
+
+        logger = logging.getLogger(__name__)
+
+        self.parse_metadata()
+        self.pad_bounding_box()
+
+        primary_source = self.select_elevation_source()
+        elevation_source = primary_source
+        fallback = None
+        tiles = list()
+        source_files = list()
+        ramp_window = None
+        grid_store = None
+
+        (store, window) = self.find_grid_store()
+        if store is not None:
+            elevation_source = store['elevation_source']
+            if elevation_source != primary_source:
+                fallback = {'from': primary_source,
+                            'to': elevation_source,
+                            'reason': 'Grid store {0} was built from {1}'
+                                      .format(store['name'],
+                                              elevation_source)}
+            grid_store = {'name': store['name'], 'window': window}
+            source_files.append(self.plan_source_file(
+                self.grid_stores.get_path(store['header'])))
+            source_files.append(self.plan_source_file(
+                self.grid_stores.get_path(store['image']),
+                window[2] * window[3] * 2))
+
+        elif primary_source == 'ramp':
+            ramp_ds = ResidentSources.open_dataset(self.ramp_image_path)
+            if ramp_ds is None:
+                raise RuntimeError('Unable to open the RAMP DEM ({0})'
+                                   .format(self.ramp_image_path))
+            try:
+                ramp_window = self.locate_ramp_window(ramp_ds)
+            except RAMPCoverageError as error:
+                elevation_source = 'gtopo30'
+                fallback = {'from': primary_source,
+                            'to': elevation_source,
+                            'reason': str(error)}
+            else:
+                ramp_band = ramp_ds.GetRasterBand(1)
+                pixel_bytes = gdal.GetDataTypeSize(ramp_band.DataType) // 8
+                ramp_bytes = ramp_window[2] * ramp_window[3] * pixel_bytes
+                source_files.append(
+                    self.plan_source_file(self.ramp_header_path))
+                source_files.append(
+                    self.plan_source_file(self.ramp_image_path, ramp_bytes))
+                del ramp_band
+            del ramp_ds
+
+        elif primary_source == 'gls':
+            try:
+                (tiles, available_tiles) = self.get_gls_tiles()
+            except GLSOverWaterError as error:
+                elevation_source = 'gtopo30'
+                fallback = {'from': primary_source,
+                            'to': elevation_source,
+                            'reason': str(error)}
+            else:
+                for tile in tiles:
+                    (bil_path, hdr_path) = available_tiles[tile]
+                    source_files.append(self.plan_source_file(hdr_path))
+                    source_files.append(self.plan_source_file(bil_path))
+                source_files.append(self.plan_source_file(
+                    os.path.join(self.espa_elevation_dir, self.gls_dir,
+                                 self.gls_projection_template)))
+
+        if elevation_source == 'gtopo30' and store is None:
+            tiles = self.get_gtopo30_tile_list()
+            for tile in tiles:
+                source_files.append(self.plan_source_file(
+                    os.path.join(self.espa_elevation_dir, self.gtopo30_dir,
+                                 '{0}.tar.gz'.format(tile))))
+
+        # Only the RAMP DEM does not need adjusting to the WGS84 GEOID, and
+        # the grid stores are already adjusted
+        adjust_to_wgs84 = elevation_source != 'ramp' and store is None
+        if adjust_to_wgs84:
+            source_files.append(self.plan_source_file(self.wgs84_header_path))
+            source_files.append(self.plan_source_file(self.wgs84_image_path))
+
+        (lines, samples) = self.get_output_dimensions()
+
+        elevation_plan = {
+            'elevation_filename': self.get_product_image_name(),
+            'output_format': self.output_format,
+            'bounding_box': {'north': self.bounding_north_latitude,
+                             'south': self.bounding_south_latitude,
+                             'east': self.bounding_east_longitude,
+                             'west': self.bounding_west_longitude},
+            'output_grid': {'target_srs': self.target_srs,
+                            'extents': {'min_x': self.min_x_extent,
+                                        'min_y': self.min_y_extent,
+                                        'max_x': self.max_x_extent,
+                                        'max_y': self.max_y_extent},
+                            'resolution_x': self.pixel_resolution_x,
+                            'resolution_y': self.pixel_resolution_y,
+                            'lines': lines,
+                            'samples': samples,
+                            'resampling_method':
+                                self.elevation_resampling_method,
+                            'warp_profile': self.warp_profile['name']},
+            'elevation_source': elevation_source,
+            'fallback': fallback,
+            'tiles': tiles,
+            'ramp_window': ramp_window,
+            'wgs84_adjustment': {'adjust': adjust_to_wgs84,
+                                 'mode': self.geoid_mode},
+            'source_files': source_files,
+            'estimated_bytes_read': sum([source_file['bytes']
+                                         for source_file in source_files
+                                         if source_file['bytes'] is not None]),
+            'estimated_scratch_bytes': self.estimate_intermediate_bytes(),
+            'intermediate_storage': self.select_intermediate_storage(),
+            'grid_store': grid_store,
+            'product_cache_key': (self.get_product_cache_key()
+                                  if self.product_cache is not None
+                                  else None)}
+
+        logger.info('Planned {0} elevation with {1} source files'
+                    .format(elevation_source, len(source_files)))
+
+        return elevation_plan
+
+    def pad_bounding_box(self):
+        """Pad the max box coordinate values"""
+
+        self.bounding_north_latitude += self.maxbox_padding
+        self.bounding_south_latitude -= self.maxbox_padding
+
+        self.bounding_east_longitude += self.maxbox_padding
+        self.bounding_west_longitude -= self.maxbox_padding
+
+    def select_elevation_source(self):
+        """Determine the elevation source to attempt first for the max box
+
+        Returns:
+            <str>: 'ramp', 'gtopo30', or 'gls'
+        """
+
+        if self.bounding_north_latitude <= self.ramp_south_limit:
+            return 'ramp'
+
+        if ((self.bounding_north_latitude <= self.glsdem_south_limit and
+             self.bounding_north_latitude > self.ramp_south_limit and
+             self.bounding_south_latitude <= self.glsdem_south_limit and
+             self.bounding_south_latitude > self.ramp_south_limit) or
+                (self.bounding_north_latitude >= self.glsdem_north_limit and
+                 self.bounding_south_latitude >= self.glsdem_north_limit)):
+            return 'gtopo30'
+
+        return 'gls'
+
+    def find_grid_store(self):
+        """Find a grid store which the output grid can be cut from
+
+        Returns:
+            <dict>: The store, or None
+            <list:int>: The window of the store, or None
+        """
+
+        if self.grid_stores is None:
+            return (None, None)
+
+        image_extents = {'min_x': self.min_x_extent,
+                         'min_y': self.min_y_extent,
+                         'max_x': self.max_x_extent,
+                         'max_y': self.max_y_extent}
+
+        return self.grid_stores.find(self.target_srs, image_extents,
+                                     self.pixel_resolution_x,
+                                     self.pixel_resolution_y,
+                                     self.select_elevation_source(),
+                                     self.geoid_mode)
+
+    @measured_stage
+    def generate_using_grid_store(self, store, window):
+        """Cut the elevation from a grid store
+
+        The store is already adjusted to the WGS84 GEOID, so only the window
+        covering the output grid is copied.
+
+        Args:
+            store <dict>: The store description
+            window <list:int>: X offset, Y offset, X size, and Y size of the
+                               window of the store
+        """
+
+        logger = logging.getLogger(__name__)
+
+        logger.info('Using grid store {0} window (X offset, Y offset,'
+                    ' X size, Y size): {1}'.format(store['name'], window))
+
+        Geo.translate(self.grid_stores.get_path(store['image']),
+                      self.elevation_image_name,
+                      output_format=self.elevation_format,
+                      window=window,
+                      engine=self.warp_engine)
+
+    def get_product_filenames(self, product_image_name):
+        """Provides the files making up the elevation product
+
+        Args:
+            product_image_name <str>: Filename of the elevation product
+
+        Returns:
+            <list:str>: The product filenames
+        """
+
+        if self.output_format == OUTPUT_FORMAT_COG:
+            return [product_image_name]
+
+        return [product_image_name, self.elevation_header_name]
+
+    @staticmethod
+    def get_product_cache_name(key, product_filename):
+        """Provides the cache entry name of a product file
+
+        Args:
+            key <str>: The product cache key
+            product_filename <str>: Filename of the product file
+
+        Returns:
+            <str>: The key with the extension of the product file
+        """
+
+        return key + os.path.splitext(product_filename)[1]
+
+    @measured_stage
+    def restore_cached_product(self, key, product_filenames):
+        """Copies a cached elevation product into place
+
+        The product is copied rather than linked, so changes to the product
+        never reach the cached copy.
+
+        Args:
+            key <str>: The product cache key
+            product_filenames <list:str>: Filenames of the product files
+
+        Returns:
+            <str>: The elevation source of the product, or None if the
+                   product is not cached
+        """
+
+        logger = logging.getLogger(__name__)
+
+        # The source is cached last, so it marks a complete product
+        source_path = self.product_cache.lookup('{0}.json'.format(key))
+        if source_path is None:
+            return None
+
+        cached_paths = list()
+        for product_filename in product_filenames:
+            cached_path = self.product_cache.lookup(
+                self.get_product_cache_name(key, product_filename))
+            if cached_path is None:
+                return None
+            cached_paths.append(cached_path)
+
+        with open(source_path, 'r') as source_fd:
+            elevation_source = json.load(source_fd)['elevation_source']
+
+        for (cached_path, product_filename) in zip(cached_paths,
+                                                   product_filenames):
+            # Never write through an existing link to a cached file
+            if os.path.exists(product_filename):
+                os.unlink(product_filename)
+            shutil.copyfile(cached_path, product_filename)
+
+        if self.output_format == OUTPUT_FORMAT_COG:
+            self.elevation_header_name = None
+            self.elevation_image_name = product_filenames[0]
+
+        logger.info('Using cached {0} elevation product: {1}'
+                    .format(elevation_source, key))
+
+        return elevation_source
+
+    @measured_stage
+    def cache_product(self, key, product_filenames, elevation_source):
+        """Adds the generated elevation product to the product cache
+
+        The product files are copied, so later changes to the product never
+        reach the cached copy.
+
+        Args:
+            key <str>: The product cache key
+            product_filenames <list:str>: Filenames of the product files
+            elevation_source <str>: The elevation source used
+        """
+
+        for product_filename in product_filenames:
+            self.product_cache.add(
+                self.get_product_cache_name(key, product_filename),
+                product_filename, link=False)
+
+        source_name = self.scratch_path('espa-product-source.json')
+        with open(source_name, 'w') as source_fd:
+            json.dump({'elevation_source': elevation_source}, source_fd)
+        self.product_cache.add('{0}.json'.format(key), source_name)
+
+    def get_or_generate_product(self, product_image_name):
+        """Provides the elevation product from the product cache
+
+        The product is generated and cached on a miss.  Concurrent processes
+        missing on the same product wait for a single process to generate
+        it.
+
+        Args:
+            product_image_name <str>: Filename of the elevation product
+
+        Returns:
+            <str>: The elevation source of the product
+        """
+
+        key = self.get_product_cache_key()
+        product_filenames = self.get_product_filenames(product_image_name)
+
+        elevation_source = self.restore_cached_product(key,
+                                                       product_filenames)
+        if elevation_source is not None:
+            return elevation_source
+
+        with self.product_cache.lock(key):
+            # Another process may have generated it while we waited
+            elevation_source = self.restore_cached_product(key,
+                                                           product_filenames)
+            if elevation_source is not None:
+                return elevation_source
+
+            # A product linked from the cache by an earlier version must not
+            # be updated in place
+            for product_filename in product_filenames:
+                if os.path.exists(product_filename):
+                    os.unlink(product_filename)
+
+            elevation_source = self.generate_product(product_image_name)
+            self.cache_product(key, product_filenames, elevation_source)
+
+        return elevation_source
+
+    def _generate(self):
+        """Generates the elevation using the elevation sources"""
+
+        logger = logging.getLogger(__name__)
+
+        # Just a bunch of debug reporting follows
+        logger.debug('bounding_north_latitude = {0}'
+                     .format(self.bounding_north_latitude))
+        logger.debug('bounding_south_latitude = {0}'
+                     .format(self.bounding_south_latitude))
+        logger.debug('bounding_east_longitude = {0}'
+                     .format(self.bounding_east_longitude))
+        logger.debug('bounding_west_longitude = {0}'
+                     .format(self.bounding_west_longitude))
+
+        logger.debug('min_x_extent = {0}'.format(self.min_x_extent))
+        logger.debug('max_y_extent = {0}'.format(self.max_y_extent))
+        logger.debug('max_x_extent = {0}'.format(self.max_x_extent))
+        logger.debug('min_y_extent = {0}'.format(self.min_y_extent))
+
+        logger.debug('pixel_resolution_x = {0}'
+                     .format(self.pixel_resolution_x))
+        logger.debug('pixel_resolution_y = {0}'
+                     .format(self.pixel_resolution_y))
+
+        logger.debug('elevation_header_name = {0}'
+                     .format(self.elevation_header_name))
+        logger.debug('elevation_image_name = {0}'
+                     .format(self.elevation_image_name))
+
+        logger.debug('espa_elevation_dir = {0}'
+                     .format(self.espa_elevation_dir))
+
+        self.pad_bounding_box()
+
+        product_image_name = self.get_product_image_name()
+        if self.product_cache is None:
+            elevation_source = self.generate_product(product_image_name)
+        else:
+            elevation_source = self.get_or_generate_product(
+                product_image_name)
+
+        # Only add the elevation band to the XML file, when we are
+        # processing using the XML
+        if self.xml_filename is not None:
+            self.add_elevation_band_to_xml(elevation_source)
+
+    def generate_product(self, product_image_name):
+        """Generates the elevation product from the elevation sources
+
+        Args:
+            product_image_name <str>: Filename of the elevation product
+
+        Returns:
+            <str>: The elevation source used
+        """
+
+        logger = logging.getLogger(__name__)
+
+        # A cloud optimized GeoTIFF is written from an ENVI intermediate, so
+        # the WGS84 adjustment can still be applied in-place through a memory
+        # map of the raw image, which a tiled or compressed GeoTIFF does not
+        # allow
+        if self.output_format == OUTPUT_FORMAT_COG:
+            self.elevation_header_name = self.scratch_path(
+                self.cog_intermediate_header_name)
+            self.elevation_image_name = self.scratch_path(
+                self.cog_intermediate_image_name)
+
+        elevation_source = 'gtopo30'
+        # Retrieve the tiles, mosaic, and warp to the source data
+        primary_source = self.select_elevation_source()
+        (store, window) = self.find_grid_store()
+        if store is not None:
+            self.generate_using_grid_store(store, window)
+            elevation_source = store['elevation_source']
+
+        elif primary_source == 'ramp':
+            try:
+                logger.info('Attempting to use RAMP DEM')
+                self.generate_using_ramp()
+                '''
+                According to Landsat the RAMP DEM does not need adjusting to
+                the WGS84 GEOID
+                '''
+                elevation_source = 'ramp'
+            except RAMPCoverageError:
+                logger.exception('RAMP DEM failed to cover input data'
+                                 ' defaulting to GTOPO30')
+                self.generate_using_gtopo30()
+                self.adjust_elevation_to_wgs84()
+
+        elif primary_source == 'gtopo30':
+
+            logger.info('Using GTOPO30 DEM')
+            self.generate_using_gtopo30()
+            self.adjust_elevation_to_wgs84()
+
+        else:
+            print('nbound: ', self.bounding_north_latitude)
+            print('sbound: ', self.bounding_south_latitude)
+            print('wbound: ', self.bounding_west_longitude)
+            print('ebound: ', self.bounding_east_longitude)
+            try:
+                logger.info('Attempting to use GLS DEM')
+                self.generate_using_gls()
+                elevation_source = 'gls'
+            except GLSOverWaterError:
+                logger.exception('GLS DEM over water defaulting to GTOPO30')
+                self.generate_using_gtopo30()
+
+            self.adjust_elevation_to_wgs84()
+
+        # Cleanup the GDAL generated auxiliary file of the elevation, those
+        # of the intermediate files are removed with the scratch directory
+        aux_name = self.elevation_image_name + self.gdal_aux_extension
+        if os.path.exists(aux_name):
+            os.unlink(aux_name)
+
+        if self.output_format == OUTPUT_FORMAT_COG:
+            self.write_cloud_optimized_geotiff(product_image_name)
+            self.elevation_header_name = None
+            self.elevation_image_name = product_image_name
+        else:
+            # Update the ENVI header
+            # Specify the data type, because we were using Float32, but the
+            # final was written as Int16.
+            with self.metrics.stage('update_envi_header'):
+                envi_header = ENVIHeader(self.elevation_header_name)
+                envi_header.update_envi_header(
+                    band_names='band 1 - elevation',
+                    data_type=2,
+                    no_data_value=-9999)
+
+        return elevation_source
+
+
+class XMLElevation(BaseElevation):
+    """Defines the class object for XML based elevation generation
+
+       If user_extents is True, then the user-specified min/max x and y
+       geographic extents will be used, instead of the scene extents. However
+       the scene projection and resolution will be used.
+    """
+
+    def __init__(self, xml_filename, user_extents, minx, maxx, miny,
+                 maxy, nbound_lat, sbound_lat, wbound_lon, ebound_lon,
+                 elev_filename, metadata=None):
+        """Class initialization"""
+        super(XMLElevation, self).__init__(elev_filename)
+
+        self.xml_filename = xml_filename
+        # The parsed XML, shared from the input type detection through to
+        # writing the elevation band, so the XML is only parsed once
+        self.metadata = metadata
+        self.user_extents = user_extents
+        if user_extents:
+            self.min_x_extent = minx
+            self.max_x_extent = maxx
+            self.min_y_extent = miny
+            self.max_y_extent = maxy
+            self.bounding_north_latitude = nbound_lat
+            self.bounding_south_latitude = sbound_lat
+            self.bounding_west_longitude = wbound_lon
+            self.bounding_east_longitude = ebound_lon
+
+    def get_metadata(self):
+        """Retrieves the parsed XML, parsing the XML file on first use
+
+        Returns:
+            <Metadata>: The parsed XML
+        """
+
+        if self.metadata is None:
+            self.metadata = Metadata(xml_filename=self.xml_filename)
+
+        return self.metadata
+
+    def parse_metadata(self):
+        """Parse the input metadata file
+
+        Search for the desired fields in the metadata file, and set the
+        associated class variables with the values read for that field.
+
+        Notes:
+          It is expected the input metadata file is an ESPA *.xml file and
+          follows the format of those files.  Level-1, TOA reflectance, or
+          surface reflectance products are supported as input.  Band 1 from
+          those products will be used.
+        """
+
+        metadata = self.get_metadata()
+
+        # Fail before any processing, rather than after it
+        if self.validate_input:
+            MetadataSchemas.validate(metadata)
+
+        global_metadata = self.get_global_metadata(metadata)
+
+        # Read the scene extents if they weren't specified by the user
+        if not self.user_extents:
+            self.bounding_north_latitude = float(global_metadata
+                                                 .bounding_coordinates.north)
+            self.bounding_south_latitude = float(global_metadata
+                                                 .bounding_coordinates.south)
+            self.bounding_east_longitude = float(global_metadata
+                                                 .bounding_coordinates.east)
+            self.bounding_west_longitude = float(global_metadata
+                                                 .bounding_coordinates.west)
+
+            for corner_point in (global_metadata
+                                 .projection_information.corner_point):
+                if corner_point.attrib['location'] == 'UL':
+                    self.min_x_extent = float(corner_point.attrib['x'])
+                    self.max_y_extent = float(corner_point.attrib['y'])
+                if corner_point.attrib['location'] == 'LR':
+                    self.max_x_extent = float(corner_point.attrib['x'])
+                    self.min_y_extent = float(corner_point.attrib['y'])
+
+            self.grid_origin = global_metadata.projection_information.grid_origin
+
+        # Read the rest of the scene metadata
+        product_id = None
+        for element in global_metadata.getchildren():
+            if 'product_id' in element.tag:
+                product_id = element.text
+            elif 'scene_id' in element.tag:
+                product_id = element.text
+        if product_id is None:
+            raise RuntimeError('Un-Supported Metadata XML')
+
+        self.elevation_header_name = (self.elevation_header_name_fmt
+                                      .format(product_id))
+        self.elevation_image_name = (self.elevation_image_name_fmt
+                                     .format(product_id))
+
+        if str(metadata.xml_object.tag).endswith('espa_metadata'):
+            bands = metadata.xml_object.bands.band
+        elif str(metadata.xml_object.tag).endswith('ard_metadata'):
+            bands = metadata.xml_object.tile_metadata.bands.band
+
+        ref_band = self.get_reference_band(bands)
+        # Make sure an appropriate band was found in the XML file
+        if ref_band is None:
+            raise RuntimeError('Supported bands not found in XML file')
+
+        self.target_srs = Geo.get_proj4_projection_string(str(ref_band.file_name))
+        self.pixel_resolution_x = float(ref_band.pixel_size.attrib['x'])
+        self.pixel_resolution_y = float(ref_band.pixel_size.attrib['y'])
+        self.pixel_units = ref_band.pixel_size.attrib['units']
+        self.number_of_lines = ref_band.attrib['nlines']
+        self.number_of_samples = ref_band.attrib['nsamps']
+
+        # Adjust the coordinates for image extents from the XML if they are
+        # in center of pixel, as we need to supply the warping with actual
+        # extents
+        if not self.user_extents and self.grid_origin == 'CENTER':
+            self.min_x_extent = (self.min_x_extent -
+                                 self.pixel_resolution_x * 0.5)
+            self.max_x_extent = (self.max_x_extent +
+                                 self.pixel_resolution_x * 0.5)
+            self.min_y_extent = (self.min_y_extent -
+                                 self.pixel_resolution_y * 0.5)
+            self.max_y_extent = (self.max_y_extent +
+                                 self.pixel_resolution_y * 0.5)
+
+        # Determine the number of lines and samples for the user-specified
+        # extents, based on the pixel size
+        if not self.user_extents:
+            self.number_of_samples = int(round((self.max_x_extent - self.min_x_extent) / self.pixel_resolution_x))
+            self.number_of_lines = int(round((self.max_y_extent - self.min_y_extent) / self.pixel_resolution_y))
+
+        del metadata
+
+
+ESPA_PRODUCT_NAMES = ['L1T', 'L1G', 'L1TP', 'L1GT', 'L1GS', 'sr_refl']
+ESPA_BAND_NAMES = ['b1', 'sr_band1']
+
+
+class ESPAXMLElevation(XMLElevation):
+
+    def __init__(self, xml_filename, user_extents, minx, maxx, miny,
+                 maxy, nbound_lat, sbound_lat, wbound_lon, ebound_lon,
+                 elev_filename, metadata=None):
+        """Class initialization"""
+        super(ESPAXMLElevation, self).__init__(xml_filename, user_extents,
+                                               minx, maxx, miny, maxy,
+                                               nbound_lat, sbound_lat,
+                                               wbound_lon, ebound_lon,
+                                               elev_filename, metadata)
+
+    def get_global_metadata(self, metadata):
+        """Retrieves the global metadata for ESPA
+        """
+
+        return metadata.xml_object.global_metadata
+
+    def append_band(self, metadata, band):
+        """Appends the band to the correct location for ESPA
+        """
+
+        metadata.xml_object.bands.append(band)
+
+    def get_reference_band(self, bands):
+        """Determines the correct reference band for ESPA
+        """
+
+        reference_band = None
+
+        for band in bands:
+            if (band.attrib['name'] in ESPA_BAND_NAMES and
+                    band.attrib['product'] in ESPA_PRODUCT_NAMES):
+                if os.path.isfile(str(band.file_name)):
+                    reference_band = band
+                    break
+
+        return reference_band
+
+
+# The PIXELQA band is present in all ARD Tile products
+ARD_PRODUCT_NAMES = ['level2_qa']
+ARD_BAND_NAMES = ['PIXELQA']
+
+
+class ARDXMLElevation(XMLElevation):
+
+    def __init__(self, xml_filename, user_extents, minx, maxx, miny,
+                 maxy, nbound_lat, sbound_lat, wbound_lon, ebound_lon,
+                 elev_filename, metadata=None):
+        """Class initialization"""
+        super(ARDXMLElevation, self).__init__(xml_filename, user_extents,
+                                              minx, maxx, miny, maxy,
+                                              nbound_lat, sbound_lat,
+                                              wbound_lon, ebound_lon,
+                                              elev_filename, metadata)
+
+    def get_global_metadata(self, metadata):
+        """Retrieves the global metadata for ARD
+        """
+
+        return metadata.xml_object.tile_metadata.global_metadata
+
+    def append_band(self, metadata, band):
+        """Appends the band to the correct location for ARD
+        """
+
+        metadata.xml_object.tile_metadata.bands.append(band)
+
+    def get_reference_band(self, bands):
+        """Determines the correct reference band for ARD
+        """
+
+        reference_band = None
+
+        for band in bands:
+            if (band.attrib['name'] in ARD_BAND_NAMES and
+                    band.attrib['product'] in ARD_PRODUCT_NAMES):
+                if os.path.isfile(str(band.file_name)):
+                    reference_band = band
+                    break
+
+        return reference_band
+
+
+class MTLElevation(BaseElevation):
+    """Defines the class object for MTL based elevation generation
+
+       If user_extents is True, then the user-specified min/max x and y
+       geographic extents will be used, instead of the scene extents. However
+       the scene projection and resolution will be used.
+    """
+
+    def __init__(self, mtl_filename, user_extents, minx, maxx, miny,
+                 maxy, nbound_lat, sbound_lat, wbound_lon, ebound_lon,
+                 elev_filename):
+        """Class initialization"""
+        super(MTLElevation, self).__init__(elev_filename)
+
+        self.mtl_filename = mtl_filename
+        self.user_extents = user_extents
+        if user_extents:
+            self.min_x_extent = minx
+            self.max_x_extent = maxx
+            self.min_y_extent = miny
+            self.max_y_extent = maxy
+            self.bounding_north_latitude = nbound_lat
+            self.bounding_south_latitude = sbound_lat
+            self.bounding_west_longitude = wbound_lon
+            self.bounding_east_longitude = ebound_lon
+
+    def parse_metadata(self):
+        """Parse the input metadata file
+
+        Search for the desired fields in the metadata file, and set the
+        associated class variables with the values read for that field.
+
+        Notes:
+          1. It is expected the input metadata file is an LPGS _MTL.txt file and
+             follows the format (contains the same fields) of those files.
+          2. Number of lines and samples is not needed since the DEM is only
+             written to the XML file if an XML file is being processed.
+        """
+
+        # Get the logger
+        logger = logging.getLogger(__name__)
+
+        file_name_band_1 = None
+        product_id = None
+
+        # open the metadata file for reading
+        with open(self.mtl_filename, 'r') as mtl_fd:
+
+            # read and process one line at a time, using the = sign as the
+            # deliminator for the desired parameters.  remove the trailing
+            # end of line and leading/trailing white space
+            for line in mtl_fd:
+                myline = line.rstrip('\r\n').strip()
+                # logger.debug('DEBUG: [{0}]'.format(myline))
+                # break out if at the end of the metadata in the metadata file
+                if myline == 'END':
+                    break
+
+                # process the myline which should be parameter = value strings
+                # some strings may need the "s stripped from the value itself
+                (param, value) = myline.split('=', 1)
+                param = param.strip()
+                value = value.strip()
+                try:
+                    f_value = float(value)
+                except ValueError:
+                    pass
+                # logger.debug('    DEBUG: param [{0}]'.format(param))
+                # logger.debug('    DEBUG: value [{0}]'
+                #              .format(value.strip('\"')))
+                # Read the extents only if the user-specified extents were
+                # not provided
+                if param == 'CORNER_UL_LAT_PRODUCT' and not self.user_extents:
+                    if f_value > self.bounding_north_latitude:
+                        self.bounding_north_latitude = f_value
+                elif param == 'CORNER_UR_LAT_PRODUCT' and not self.user_extents:
+                    if f_value > self.bounding_north_latitude:
+                        self.bounding_north_latitude = f_value
+                elif param == 'CORNER_LL_LAT_PRODUCT' and not self.user_extents:
+                    if f_value < self.bounding_south_latitude:
+                        self.bounding_south_latitude = f_value
+                elif param == 'CORNER_LR_LAT_PRODUCT' and not self.user_extents:
+                    if f_value < self.bounding_south_latitude:
+                        self.bounding_south_latitude = f_value
+                elif param == 'CORNER_UL_LON_PRODUCT' and not self.user_extents:
+                    if f_value < self.bounding_west_longitude:
+                        self.bounding_west_longitude = f_value
+                elif param == 'CORNER_UR_LON_PRODUCT' and not self.user_extents:
+                    if f_value > self.bounding_east_longitude:
+                        self.bounding_east_longitude = f_value
+                elif param == 'CORNER_LL_LON_PRODUCT' and not self.user_extents:
+                    if f_value < self.bounding_west_longitude:
+                        self.bounding_west_longitude = f_value
+                elif param == 'CORNER_LR_LON_PRODUCT' and not self.user_extents:
+                    if f_value > self.bounding_east_longitude:
+                        self.bounding_east_longitude = f_value
+                elif param == 'CORNER_UL_PROJECTION_X_PRODUCT' and    \
+                     not self.user_extents:
+                    self.min_x_extent = f_value
+                elif param == 'CORNER_UL_PROJECTION_Y_PRODUCT' and    \
+                     not self.user_extents:
+                    self.max_y_extent = f_value
+                elif param == 'CORNER_LR_PROJECTION_X_PRODUCT' and    \
+                     not self.user_extents:
+                    self.max_x_extent = f_value
+                elif param == 'CORNER_LR_PROJECTION_Y_PRODUCT' and    \
+                     not self.user_extents:
+                    self.min_y_extent = f_value
+                elif param == 'GRID_CELL_SIZE_REFLECTIVE':
+                    self.pixel_resolution_x = f_value
+                    self.pixel_resolution_y = f_value
+                elif param == 'LANDSAT_SCENE_ID':
+                    product_id = value.strip('\"')
+                elif param == 'FILE_NAME_BAND_1':
+                    file_name_band_1 = value.strip('\"')
+
+        # validate retrieval of parameters
+        if self.bounding_north_latitude == -9999.0:
+            raise RuntimeError('Obtaining north bounding metadata field from:'
+                               ' [{0}]'.format(self.mtl_filename))
+
+        if self.bounding_south_latitude == 9999.0:
+            raise RuntimeError('Obtaining south bounding metadata field from:'
+                               ' [{0}]'.format(self.mtl_filename))
+
+        if self.bounding_east_longitude == -9999.0:
+            raise RuntimeError('Obtaining east bounding metadata field from:'
+                               ' [{0}]'.format(self.mtl_filename))
+
+        if self.bounding_west_longitude == 9999.0:
+            raise RuntimeError('Obtaining west bounding metadata field from:'
+                               ' [{0}]'.format(self.mtl_filename))
+
+        if self.min_x_extent is None:
+            raise RuntimeError('Obtaining UL Map X field from: [{0}]'
+                               .format(self.mtl_filename))
+
+        if self.max_y_extent is None:
+            raise RuntimeError('Obtaining UL Map Y field from: [{0}]'
+                               .format(self.mtl_filename))
+
+        if self.max_x_extent is None:
+            raise RuntimeError('Obtaining LR Map X field from: [{0}]'
+                               .format(self.mtl_filename))
+
+        if self.min_y_extent is None:
+            raise RuntimeError('Obtaining LR Map Y field from: [{0}]'
+                               .format(self.mtl_filename))
+
+        if self.pixel_resolution_x is None:
+            raise RuntimeError('Obtaining reflective grid cell size field'
+                               ' from: [{0}]'.format(self.mtl_filename))
+
+        if self.pixel_resolution_y is None:
+            raise RuntimeError('Obtaining reflective grid cell size field'
+                               ' from: [{0}]'.format(self.mtl_filename))
+
+        if file_name_band_1 is None:
+            raise RuntimeError('Obtaining FILE_NAME_BAND_1 field from: [{0}]'
+                               .format(self.mtl_filename))
+
+        if product_id is None:
+            raise RuntimeError('Obtaining LANDSAT_SCENE_ID field from: [{0}]'
+                               .format(self.mtl_filename))
+
+        self.elevation_header_name = (self.elevation_header_name_fmt
+                                      .format(product_id))
+        self.elevation_image_name = (self.elevation_image_name_fmt
+                                     .format(product_id))
+
+        self.target_srs = Geo.get_proj4_projection_string(file_name_band_1)
+
+        # Adjust the coordinates for image extents from the MTL because they
+        # are in center of pixel, and we need to supply the warping with actual
+        # extents
+        if not self.user_extents:
+            self.min_x_extent = (self.min_x_extent -
+                                 self.pixel_resolution_x * 0.5)
             self.max_x_extent = (self.max_x_extent +
                                  self.pixel_resolution_x * 0.5)
             self.min_y_extent = (self.min_y_extent -
@@ -1410,345 +5019,877 @@ class XMLElevation(BaseElevation):
             self.max_y_extent = (self.max_y_extent +
                                  self.pixel_resolution_y * 0.5)
 
-        # Determine the number of lines and samples for the user-specified
-        # extents, based on the pixel size
-        if not self.user_extents:
-            self.number_of_samples = int(round((self.max_x_extent - self.min_x_extent) / self.pixel_resolution_x))
-            self.number_of_lines = int(round((self.max_y_extent - self.min_y_extent) / self.pixel_resolution_y))
 
-        del metadata
+class GridStoreElevation(BaseElevation):
+    """Defines the class object for building a grid store
+
+    The elevation is generated, the same as for a scene, for the output grid
+    and max box of a store definition, and added to the grid store catalog.
+    """
+
+    def __init__(self, definition, grid_stores):
+        """Class initialization
+
+        Args:
+            definition <dict>: The name, target_srs, extents, resolution, and
+                               bounding_box of the store
+            grid_stores <GridStores>: The grid stores to add the store to
+        """
+        super(GridStoreElevation, self).__init__(
+            grid_stores.get_path('{0}.img'.format(definition['name'])))
+
+        self.definition = definition
+
+        # The store is built from the elevation sources
+        self.grid_stores = None
+        self.product_cache = None
+        self.store_catalog = grid_stores
+
+    def parse_metadata(self):
+        """Set the output grid and max box from the store definition"""
+
+        self.target_srs = str(self.definition['target_srs'])
+
+        extents = self.definition['extents']
+        self.min_x_extent = float(extents['min_x'])
+        self.min_y_extent = float(extents['min_y'])
+        self.max_x_extent = float(extents['max_x'])
+        self.max_y_extent = float(extents['max_y'])
+
+        (self.pixel_resolution_x,
+         self.pixel_resolution_y) = [float(resolution) for resolution
+                                     in self.definition['resolution']]
+
+        bounding_box = self.definition['bounding_box']
+        self.bounding_north_latitude = float(bounding_box['north'])
+        self.bounding_south_latitude = float(bounding_box['south'])
+        self.bounding_east_longitude = float(bounding_box['east'])
+        self.bounding_west_longitude = float(bounding_box['west'])
+
+        (self.number_of_lines,
+         self.number_of_samples) = self.get_output_dimensions()
+
+        self.elevation_image_name = self.elevation_image_name_fmt
+        self.elevation_header_name = self.elevation_header_name_fmt
+
+    def generate_product(self, product_image_name):
+        """Generates the store and adds it to the catalog
+
+        Args:
+            product_image_name <str>: Filename of the store
+
+        Returns:
+            <str>: The elevation source used
+        """
+
+        logger = logging.getLogger(__name__)
+
+        elevation_source = super(GridStoreElevation, self).generate_product(
+            product_image_name)
+
+        # The source used is not known until the store is generated, and
+        # outputs are matched with the store by the source selected first
+        primary_source = self.select_elevation_source()
+        if elevation_source != primary_source:
+            logger.warning('Grid store {0} fell back from {1} to {2}'
+                           .format(self.definition['name'], primary_source,
+                                   elevation_source))
+
+        self.store_catalog.add({
+            'name': self.definition['name'],
+            'image': os.path.basename(self.elevation_image_name),
+            'header': os.path.basename(self.elevation_header_name),
+            'target_srs': self.target_srs,
+            'extents': {'min_x': self.min_x_extent,
+                        'min_y': self.min_y_extent,
+                        'max_x': self.max_x_extent,
+                        'max_y': self.max_y_extent},
+            'resolution': [self.pixel_resolution_x,
+                           self.pixel_resolution_y],
+            'lines': self.number_of_lines,
+            'samples': self.number_of_samples,
+            'primary_source': primary_source,
+            'elevation_source': elevation_source,
+            'geoid_mode': self.geoid_mode,
+            'software_version': SOFTWARE_VERSION})
+
+        return elevation_source
+
+
+def check_for_extents(args):
+    """Were custom extents specified?  If so, all extents must be specified.
+    Args:
+        args <args>: Command line arguments
+
+    Returns:
+        <bool>: True if cusom extents were specified, and False if not
+    """
+
+    if (args.extent_minx is not None or args.extent_maxx is not None or
+            args.extent_miny is not None or args.extent_maxy is not None or
+            args.nbound_lat is not None or args.sbound_lat is not None or
+            args.wbound_lon is not None or args.ebound_lon is not None):
+
+        # One of the user-specified extents was specified, so make sure all
+        # were specified
+        if args.extent_minx is None:
+            raise RuntimeError('Must specify --extent-minx when specifying '
+                               'custom extents')
+
+        if args.extent_maxx is None:
+            raise RuntimeError('Must specify --extent-maxx when specifying '
+                               'custom extents')
+
+        if args.extent_miny is None:
+            raise RuntimeError('Must specify --extent-miny when specifying '
+                               'custom extents')
+
+        if args.extent_maxy is None:
+            raise RuntimeError('Must specify --extent-maxy when specifying '
+                               'custom extents')
+
+        if args.nbound_lat is None:
+            raise RuntimeError('Must specify --nbound-lat when specifying '
+                               'custom extents')
+
+        if args.sbound_lat is None:
+            raise RuntimeError('Must specify --sbound-lat when specifying '
+                               'custom extents')
+
+        if args.wbound_lon is None:
+            raise RuntimeError('Must specify --wbound-lon when specifying '
+                               'custom extents')
+
+        if args.ebound_lon is None:
+            raise RuntimeError('Must specify --ebound-lon when specifying '
+                               'custom extents')
+
+        return True
+
+    return False
+
+
+def configure_elevation(elevation, args):
+    """Apply the processing options to the elevation object
+    Args:
+        elevation <BaseElevation>: The elevation object to configure
+        args <args>: Command line arguments
+    """
+
+    if args.geoid_block_lines < 1:
+        raise RuntimeError('--geoid-block-lines must be at least 1')
+    elevation.geoid_block_lines = args.geoid_block_lines
+
+    if args.geoid_grid_step < 1:
+        raise RuntimeError('--geoid-grid-step must be at least 1')
+    elevation.geoid_mode = args.geoid_mode
+    elevation.geoid_grid_step = args.geoid_grid_step
+
+    elevation.scratch_root = args.scratch_root
+
+    elevation.intermediate_storage = args.intermediate_storage
+    elevation.intermediate_memory_limit = parse_byte_size(
+        args.intermediate_memory_limit)
+
+    if args.staging_workers < 1:
+        raise RuntimeError('--staging-workers must be at least 1')
+    elevation.staging_workers = args.staging_workers
+
+    elevation.output_format = args.output_format
+
+    if args.warp_profile is not None:
+        elevation.warp_profile = Geo.get_warp_profile(args.warp_profile)
+
+    elevation.validate_input = args.validate_input
+    if args.xml_validation is not None:
+        elevation.xml_validation = args.xml_validation
+
+
+def create_elevation(args):
+    """Create the elevation object for one input
+    Args:
+        args <args>: Command line arguments for the input
+
+    Returns:
+        <BaseElevation>: The elevation object for the input
+    """
+
+    logger = logging.getLogger(__name__)
+
+    # Initialize
+    minx = None
+    miny = None
+    maxx = None
+    maxy = None
+    nbound_lat = None
+    sbound_lat = None
+    wbound_lon = None
+    ebound_lon = None
+    elev_filename = args.elevation_filename
+
+    # Grab the user-specified extents if they exist
+    user_extents = check_for_extents(args)
+    if user_extents:
+        minx = float(args.extent_minx)
+        miny = float(args.extent_miny)
+        maxx = float(args.extent_maxx)
+        maxy = float(args.extent_maxy)
+        nbound_lat = float(args.nbound_lat)
+        sbound_lat = float(args.sbound_lat)
+        wbound_lon = float(args.wbound_lon)
+        ebound_lon = float(args.ebound_lon)
+        logger.info('User-specified geographic extents will be used: '
+                    'extent-minx: {0}  '
+                    'extent-maxx: {1}  '
+                    'extent-miny: {2}  '
+                    'extent-maxy: {3}  '
+                    'nbound-lat: {4}  '
+                    'sbound-lat: {5}  '
+                    'ebound-lon: {6}  '
+                    'wbound-lon: {7}'.format(minx, maxx, miny, maxy, nbound_lat,
+                                             sbound_lat, wbound_lon, ebound_lon))
+
+    # Create the elevation object for the input type
+    elevation = None
+    if args.xml_filename is not None:
+        logger.info('Processing XML file: {0}'.format(args.xml_filename))
+
+        # Parsed once here, and passed on to the elevation object
+        metadata = Metadata(xml_filename=args.xml_filename)
+        is_espa = False
+        if str(metadata.xml_object.tag).endswith('espa_metadata'):
+            is_espa = True
+        elif str(metadata.xml_object.tag).endswith('ard_metadata'):
+            is_espa = False
+        else:
+            raise RuntimeError('Unsupported Metadata XML --> {}'
+                               .format(str(metadata.xml_object.tag)))
+
+        if is_espa:
+            elevation = ESPAXMLElevation(args.xml_filename, user_extents,
+                                         minx, maxx, miny, maxy,
+                                         nbound_lat, sbound_lat, wbound_lon,
+                                         ebound_lon, elev_filename, metadata)
+        else:
+            elevation = ARDXMLElevation(args.xml_filename, user_extents,
+                                        minx, maxx, miny, maxy,
+                                        nbound_lat, sbound_lat, wbound_lon,
+                                        ebound_lon, elev_filename, metadata)
+    else:
+        logger.info('Processing MTL file: {0}'.format(args.mtl_filename))
+
+        elevation = MTLElevation(args.mtl_filename, user_extents, minx, maxx,
+                                 miny, maxy, nbound_lat, sbound_lat, wbound_lon,
+                                 ebound_lon, elev_filename)
+
+    return elevation
+
+
+class BatchArgumentParser(ArgumentParser):
+    """Argument parser for batch manifest items
+
+    Raises an exception for invalid items, rather than exiting, so that the
+    remaining items in the batch are still processed.
+    """
+
+    def error(self, message):
+        """Report an invalid manifest item"""
+        raise RuntimeError('Invalid batch item: {0}'.format(message))
+
+
+def add_input_arguments(parser, input_group):
+    """Add the arguments which describe one input to the parser
+    Args:
+        parser <ArgumentParser>: The parser to add the arguments to
+        input_group <group>: Mutually exclusive group for the input file
+    """
+
+    parser.add_argument('--elevation',
+                        action='store',
+                        dest='elevation_filename',
+                        default=None,
+                        help='optional name of output elevation file (.img); '
+                             'default is {scene_name}_elevation.img',
+                        metavar='FILE',
+                        required=False)
+
+    input_group.add_argument('--mtl', '--mtl_filename',
+                             action='store',
+                             dest='mtl_filename',
+                             default=None,
+                             help='name of Landsat MTL file',
+                             metavar='FILE')
+
+    input_group.add_argument('--xml', '--xml_filename',
+                             action='store',
+                             dest='xml_filename',
+                             default=None,
+                             help='name of XML Metadata file',
+                             metavar='FILE')
+
+    # Look for user-specified min/max extents, which would then override the
+    # scene extents
+    geo_extents = parser.add_argument_group('geo_extents',
+        'User-specified geographic extents to override the scene extents. '
+        'The scene projection and reflectance band resolution are used. '
+        'If one of the following parameters is specified they all must be '
+        'specified.')
+
+    geo_extents.add_argument('--extent-minx',
+                             action='store',
+                             dest='extent_minx',
+                             default=None,
+                             metavar='FLOAT',
+                             help='Minimum X direction extent value',
+                             required=False)
+
+    geo_extents.add_argument('--extent-maxx',
+                             action='store',
+                             dest='extent_maxx',
+                             default=None,
+                             metavar='FLOAT',
+                             help='Maximum X direction extent value',
+                             required=False)
+
+    geo_extents.add_argument('--extent-miny',
+                             action='store',
+                             dest='extent_miny',
+                             default=None,
+                             metavar='FLOAT',
+                             help='Minimum Y direction extent value',
+                             required=False)
+
+    geo_extents.add_argument('--extent-maxy',
+                             action='store',
+                             dest='extent_maxy',
+                             default=None,
+                             metavar='FLOAT',
+                             help='Maximum Y direction extent value',
+                             required=False)
+
+    geo_extents.add_argument('--nbound-lat',
+                             action='store',
+                             dest='nbound_lat',
+                             default=None,
+                             metavar='FLOAT',
+                             help='North-bounding latitude associated with '
+                                  'extent-maxy',
+                             required=False)
+
+    geo_extents.add_argument('--sbound-lat',
+                             action='store',
+                             dest='sbound_lat',
+                             default=None,
+                             metavar='FLOAT',
+                             help='South-bounding latitude associated with '
+                                  'extent-miny',
+                             required=False)
+
+    geo_extents.add_argument('--wbound-lon',
+                             action='store',
+                             dest='wbound_lon',
+                             default=None,
+                             metavar='FLOAT',
+                             help='West-bounding longitude associated with '
+                                  'extent-minx',
+                             required=False)
+
+    geo_extents.add_argument('--ebound-lon',
+                             action='store',
+                             dest='ebound_lon',
+                             default=None,
+                             metavar='FLOAT',
+                             help='East-bounding longitude associated with '
+                                  'extent-maxx',
+                             required=False)
+
+
+def read_batch_manifest(manifest_filename):
+    """Read the items of a batch manifest
+
+    Each non-blank line of the manifest describes one input using the same
+    options as a single run, e.g.
+        --xml LC08_L1TP_047027_20170701_20170715_01_T1.xml
+        --mtl LE07_L1TP_047027_20170709_20170804_01_T1_MTL.txt --elevation e.img
+    Lines starting with # are ignored.
+
+    Args:
+        manifest_filename <str>: Manifest filename, or - for stdin
+
+    Returns:
+        <list:(int, str)>: The line number and text of each item
+    """
+
+    if manifest_filename == '-':
+        lines = sys.stdin.readlines()
+    else:
+        with open(manifest_filename, 'r') as manifest_fd:
+            lines = manifest_fd.readlines()
+
+    items = list()
+    for (index, line) in enumerate(lines):
+        text = line.strip()
+        if len(text) == 0 or text.startswith('#'):
+            continue
+        items.append((index + 1, text))
+
+    return items
+
+
+def write_plans(plans, plan_filename):
+    """Write the processing plans as JSON
+
+    Args:
+        plans <list>: The processing plan of each input
+        plan_filename <str>: Path to the JSON file, or '-' for stdout
+    """
+
+    document = {'software_version': SOFTWARE_VERSION,
+                'plans': plans}
+
+    if plan_filename == '-':
+        json.dump(document, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write('\n')
+        return
+
+    with open(plan_filename, 'w') as plan_fd:
+        json.dump(document, plan_fd, indent=2, sort_keys=True)
+        plan_fd.write('\n')
+
+
+def write_metrics(runs, metrics_filename):
+    """Write the timing metrics of the runs as JSON
+
+    Args:
+        runs <list>: The metrics of each input
+        metrics_filename <str>: Path to the JSON file
+    """
+
+    document = {'software_version': SOFTWARE_VERSION,
+                'runs': runs}
+
+    with open(metrics_filename, 'w') as metrics_fd:
+        json.dump(document, metrics_fd, indent=2, sort_keys=True)
+        metrics_fd.write('\n')
+
+
+def run_metrics(input_name, elevation, error=None):
+    """Provides the timing metrics of the run of one input
+
+    Args:
+        input_name <str>: Identifies the input
+        elevation <BaseElevation>: The elevation object of the input, or
+                                   None if it was not created
+        error <Exception>: The error which failed the run, if any
+
+    Returns:
+        <dict>: The metrics of the run
+    """
+
+    metrics = {'input': input_name,
+               'status': 'success',
+               'stages': list(),
+               'commands': list()}
+
+    if elevation is not None:
+        metrics.update(elevation.metrics.report())
+
+    if error is not None:
+        metrics['status'] = 'failure'
+        metrics['error'] = str(error)
+
+    return metrics
+
+
+def run_batch(args, plans=None, metrics_runs=None):
+    """Generate elevation for every input of a batch manifest
+
+    All of the items are processed in this process, back to back, with the
+    processing options of the batch applied to each.
+
+    Args:
+        args <args>: Command line arguments for the batch
+        plans <list>: If provided, the plan of each item is appended instead
+                      of generating the elevation
+        metrics_runs <list>: If provided, the timing metrics of each item
+                             are appended
+
+    Returns:
+        <bool>: True if every item succeeded
+    """
+
+    logger = logging.getLogger(__name__)
+
+    item_parser = BatchArgumentParser(prog='batch item')
+    input_group = item_parser.add_mutually_exclusive_group(required=True)
+    add_input_arguments(item_parser, input_group)
+
+    items = read_batch_manifest(args.batch_filename)
+    logger.info('Processing {0} batch items from {1}'
+                .format(len(items), args.batch_filename))
+
+    failures = list()
+    for (line_number, text) in items:
+        logger.info('BATCH ITEM [{0}] {1}'.format(line_number, text))
+
+        elevation = None
+        try:
+            item_args = item_parser.parse_args(shlex.split(text))
+            elevation = create_elevation(item_args)
+            configure_elevation(elevation, args)
+            if plans is None:
+                elevation.generate()
+            else:
+                elevation_plan = elevation.plan()
+                elevation_plan['input'] = text
+                plans.append(elevation_plan)
+        except Exception as error:
+            logger.exception('BATCH ITEM [{0}] FAILURE'.format(line_number))
+            failures.append(line_number)
+            if plans is not None:
+                plans.append({'input': text, 'error': str(error)})
+            if metrics_runs is not None:
+                metrics_runs.append(run_metrics(text, elevation, error))
+        else:
+            logger.info('BATCH ITEM [{0}] SUCCESS'.format(line_number))
+            if metrics_runs is not None:
+                metrics_runs.append(run_metrics(text, elevation))
+
+    logger.info('Batch complete: {0} succeeded, {1} failed'
+                .format(len(items) - len(failures), len(failures)))
+    if len(failures) > 0:
+        logger.error('Failed batch items on manifest lines: {0}'
+                     .format(', '.join([str(line_number)
+                                        for line_number in failures])))
+
+    return len(failures) == 0
+
+
+def build_grid_stores(args, metrics_runs=None):
+    """Build the grid stores of a definitions file
+
+    Args:
+        args <args>: Command line arguments
+        metrics_runs <list>: If provided, the timing metrics of each store
+                             are appended
+
+    Returns:
+        <bool>: True if every store was built
+    """
+
+    logger = logging.getLogger(__name__)
+
+    store_dir = os.environ.get(ESPA_ELEVATION_GRID_STORE_DIR)
+    if not store_dir:
+        raise RuntimeError('{0} environment variable must be defined to'
+                           ' build grid stores'
+                           .format(ESPA_ELEVATION_GRID_STORE_DIR))
+    grid_stores = GridStores(store_dir)
+
+    with open(args.grid_store_definitions, 'r') as definitions_fd:
+        definitions = json.load(definitions_fd)['stores']
 
+    failures = list()
+    for definition in definitions:
+        logger.info('BUILDING GRID STORE {0}'.format(definition['name']))
 
-ESPA_PRODUCT_NAMES = ['L1T', 'L1G', 'L1TP', 'L1GT', 'L1GS', 'sr_refl']
-ESPA_BAND_NAMES = ['b1', 'sr_band1']
+        elevation = None
+        try:
+            elevation = GridStoreElevation(definition, grid_stores)
+            configure_elevation(elevation, args)
+            # Stores are cut with window reads, which needs a raw format
+            elevation.output_format = OUTPUT_FORMAT_ENVI
+            elevation.generate()
+        except Exception as error:
+            logger.exception('GRID STORE {0} FAILURE'
+                             .format(definition['name']))
+            failures.append(definition['name'])
+            if metrics_runs is not None:
+                metrics_runs.append(run_metrics(definition['name'],
+                                                elevation, error))
+        else:
+            logger.info('GRID STORE {0} SUCCESS'.format(definition['name']))
+            if metrics_runs is not None:
+                metrics_runs.append(run_metrics(definition['name'],
+                                                elevation))
 
+    if len(failures) > 0:
+        logger.error('Failed grid stores: {0}'.format(', '.join(failures)))
 
-class ESPAXMLElevation(XMLElevation):
+    return len(failures) == 0
 
-    def __init__(self, xml_filename, user_extents, minx, maxx, miny,
-                 maxy, nbound_lat, sbound_lat, wbound_lon, ebound_lon,
-                 elev_filename):
-        """Class initialization"""
-        super(ESPAXMLElevation, self).__init__(xml_filename, user_extents,
-                                               minx, maxx, miny, maxy,
-                                               nbound_lat, sbound_lat,
-                                               wbound_lon, ebound_lon,
-                                               elev_filename)
 
-    def get_global_metadata(self, metadata):
-        """Retrieves the global metadata for ESPA
-        """
+class JobStream(object):
+    """File-like object relaying the text written to it to a client"""
 
-        return metadata.xml_object.global_metadata
+    def __init__(self, client_file, stream_name):
+        """Class initialization
 
-    def append_band(self, metadata, band):
-        """Appends the band to the correct location for ESPA
+        Args:
+            client_file <file>: The connection to the client
+            stream_name <str>: 'stdout' or 'stderr' of the client
         """
+        super(JobStream, self).__init__()
 
-        metadata.xml_object.bands.append(band)
+        self.client_file = client_file
+        self.stream_name = stream_name
 
-    def get_reference_band(self, bands):
-        """Determines the correct reference band for ESPA
-        """
+    def write(self, text):
+        """Relay the text to the client"""
 
-        reference_band = None
+        if len(text) > 0:
+            self.client_file.write(json.dumps({'stream': self.stream_name,
+                                               'text': text}) + '\n')
+            self.client_file.flush()
 
-        for band in bands:
-            if (band.attrib['name'] in ESPA_BAND_NAMES and
-                    band.attrib['product'] in ESPA_PRODUCT_NAMES):
-                if os.path.isfile(str(band.file_name)):
-                    reference_band = band
-                    break
+    def flush(self):
+        """Flush the connection to the client"""
 
-        return reference_band
+        self.client_file.flush()
 
 
-# The PIXELQA band is present in all ARD Tile products
-ARD_PRODUCT_NAMES = ['level2_qa']
-ARD_BAND_NAMES = ['PIXELQA']
+def get_job_environment():
+    """Provides the environment variables sent with a job
 
+    Returns:
+        <dict>: The variables named with JOB_ENVIRONMENT_PREFIX
+    """
 
-class ARDXMLElevation(XMLElevation):
+    return dict((name, value) for (name, value) in os.environ.items()
+                if name.startswith(JOB_ENVIRONMENT_PREFIX))
 
-    def __init__(self, xml_filename, user_extents, minx, maxx, miny,
-                 maxy, nbound_lat, sbound_lat, wbound_lon, ebound_lon,
-                 elev_filename):
-        """Class initialization"""
-        super(ARDXMLElevation, self).__init__(xml_filename, user_extents,
-                                              minx, maxx, miny, maxy,
-                                              nbound_lat, sbound_lat,
-                                              wbound_lon, ebound_lon,
-                                              elev_filename)
 
-    def get_global_metadata(self, metadata):
-        """Retrieves the global metadata for ARD
-        """
+def set_job_environment(environment):
+    """Replaces the environment variables sent with a job
 
-        return metadata.xml_object.tile_metadata.global_metadata
+    Args:
+        environment <dict>: The variables named with JOB_ENVIRONMENT_PREFIX
+    """
 
-    def append_band(self, metadata, band):
-        """Appends the band to the correct location for ARD
-        """
+    for name in get_job_environment():
+        if name not in environment:
+            del os.environ[name]
 
-        metadata.xml_object.tile_metadata.bands.append(band)
+    os.environ.update(environment)
 
-    def get_reference_band(self, bands):
-        """Determines the correct reference band for ARD
-        """
 
-        reference_band = None
+class ElevationJobHandler(SocketServer.StreamRequestHandler):
+    """Runs a job received by the worker daemon
 
-        for band in bands:
-            if (band.attrib['name'] in ARD_BAND_NAMES and
-                    band.attrib['product'] in ARD_PRODUCT_NAMES):
-                if os.path.isfile(str(band.file_name)):
-                    reference_band = band
-                    break
+    The request is a JSON line with the command line arguments, working
+    directory, and ESPA environment variables of the client.  The output of the job is relayed as JSON lines
+    naming the client stream, followed by a line with the exit status.
+    """
 
-        return reference_band
+    def handle(self):
+        """Runs the job and reports its exit status"""
 
+        logger = logging.getLogger(__name__)
 
-class MTLElevation(BaseElevation):
-    """Defines the class object for MTL based elevation generation
+        request = json.loads(self.rfile.readline())
+        argv = [arg.encode('utf-8') for arg in request['argv']]
+        environment = dict((name.encode('utf-8'), value.encode('utf-8'))
+                           for (name, value)
+                           in request['environment'].items())
+        logger.info('JOB [{0}] {1}'.format(request['cwd'], ' '.join(argv)))
 
-       If user_extents is True, then the user-specified min/max x and y
-       geographic extents will be used, instead of the scene extents. However
-       the scene projection and resolution will be used.
-    """
+        start_time = time.time()
+        exit_status = self.run_job(argv, request['cwd'], environment)
+        logger.info('JOB exit status {0} in {1:.3f} seconds'
+                    .format(exit_status, time.time() - start_time))
 
-    def __init__(self, mtl_filename, user_extents, minx, maxx, miny,
-                 maxy, nbound_lat, sbound_lat, wbound_lon, ebound_lon,
-                 elev_filename):
-        """Class initialization"""
-        super(MTLElevation, self).__init__(elev_filename)
+        self.wfile.write(json.dumps({'exit_status': exit_status}) + '\n')
 
-        self.mtl_filename = mtl_filename
-        self.user_extents = user_extents
-        if user_extents:
-            self.min_x_extent = minx
-            self.max_x_extent = maxx
-            self.min_y_extent = miny
-            self.max_y_extent = maxy
-            self.bounding_north_latitude = nbound_lat
-            self.bounding_south_latitude = sbound_lat
-            self.bounding_west_longitude = wbound_lon
-            self.bounding_east_longitude = ebound_lon
+    def run_job(self, argv, cwd, environment):
+        """Runs the job in the working directory of the client
 
-    def parse_metadata(self):
-        """Parse the input metadata file
+        The ESPA environment variables of the client replace those of the
+        daemon for the job.  The output and logging of the job are relayed
+        to the client.
 
-        Search for the desired fields in the metadata file, and set the
-        associated class variables with the values read for that field.
+        Args:
+            argv <list:str>: Command line arguments of the client
+            cwd <str>: Working directory of the client
+            environment <dict>: ESPA environment variables of the client
 
-        Notes:
-          1. It is expected the input metadata file is an LPGS _MTL.txt file and
-             follows the format (contains the same fields) of those files.
-          2. Number of lines and samples is not needed since the DEM is only
-             written to the XML file if an XML file is being processed.
+        Returns:
+            <int>: The exit status
         """
 
-        # Get the logger
         logger = logging.getLogger(__name__)
+        root_logger = logging.getLogger()
 
-        file_name_band_1 = None
-        product_id = None
+        saved_cwd = os.getcwd()
+        saved_environment = get_job_environment()
+        saved_level = root_logger.level
+        (saved_stdout, saved_stderr) = (sys.stdout, sys.stderr)
 
-        # open the metadata file for reading
-        with open(self.mtl_filename, 'r') as mtl_fd:
+        stdout_stream = JobStream(self.wfile, 'stdout')
+        stderr_stream = JobStream(self.wfile, 'stderr')
+        handler = None
+        try:
+            sys.stdout = stdout_stream
+            sys.stderr = stderr_stream
+            os.chdir(cwd)
+            set_job_environment(environment)
 
-            # read and process one line at a time, using the = sign as the
-            # deliminator for the desired parameters.  remove the trailing
-            # end of line and leading/trailing white space
-            for line in mtl_fd:
-                myline = line.rstrip('\r\n').strip()
-                # logger.debug('DEBUG: [{0}]'.format(myline))
-                # break out if at the end of the metadata in the metadata file
-                if myline == 'END':
-                    break
+            try:
+                args = build_parser().parse_args(argv)
+            except SystemExit as error:
+                # Raised by the parser for --help and invalid arguments
+                if isinstance(error.code, int):
+                    return error.code
+                return 1
+            if args.serve_socket is not None:
+                raise RuntimeError('--serve is not supported for a job')
+
+            # Log to the client the same as a local run would
+            handler = logging.StreamHandler(
+                stderr_stream if args.plan_filename == '-'
+                else stdout_stream)
+            handler.setFormatter(self.server.log_formatter)
+            root_logger.addHandler(handler)
+            root_logger.setLevel(logging.DEBUG if args.debug
+                                 else logging.INFO)
+
+            return run(args)
+        except Exception:
+            logger.exception('Job failed')
+            return 1
+        finally:
+            if handler is not None:
+                root_logger.removeHandler(handler)
+            root_logger.setLevel(saved_level)
+            set_job_environment(saved_environment)
+            os.chdir(saved_cwd)
+            (sys.stdout, sys.stderr) = (saved_stdout, saved_stderr)
 
-                # process the myline which should be parameter = value strings
-                # some strings may need the "s stripped from the value itself
-                (param, value) = myline.split('=', 1)
-                param = param.strip()
-                value = value.strip()
-                try:
-                    f_value = float(value)
-                except ValueError:
-                    pass
-                # logger.debug('    DEBUG: param [{0}]'.format(param))
-                # logger.debug('    DEBUG: value [{0}]'
-                #              .format(value.strip('\"')))
-                # Read the extents only if the user-specified extents were
-                # not provided
-                if param == 'CORNER_UL_LAT_PRODUCT' and not self.user_extents:
-                    if f_value > self.bounding_north_latitude:
-                        self.bounding_north_latitude = f_value
-                elif param == 'CORNER_UR_LAT_PRODUCT' and not self.user_extents:
-                    if f_value > self.bounding_north_latitude:
-                        self.bounding_north_latitude = f_value
-                elif param == 'CORNER_LL_LAT_PRODUCT' and not self.user_extents:
-                    if f_value < self.bounding_south_latitude:
-                        self.bounding_south_latitude = f_value
-                elif param == 'CORNER_LR_LAT_PRODUCT' and not self.user_extents:
-                    if f_value < self.bounding_south_latitude:
-                        self.bounding_south_latitude = f_value
-                elif param == 'CORNER_UL_LON_PRODUCT' and not self.user_extents:
-                    if f_value < self.bounding_west_longitude:
-                        self.bounding_west_longitude = f_value
-                elif param == 'CORNER_UR_LON_PRODUCT' and not self.user_extents:
-                    if f_value > self.bounding_east_longitude:
-                        self.bounding_east_longitude = f_value
-                elif param == 'CORNER_LL_LON_PRODUCT' and not self.user_extents:
-                    if f_value < self.bounding_west_longitude:
-                        self.bounding_west_longitude = f_value
-                elif param == 'CORNER_LR_LON_PRODUCT' and not self.user_extents:
-                    if f_value > self.bounding_east_longitude:
-                        self.bounding_east_longitude = f_value
-                elif param == 'CORNER_UL_PROJECTION_X_PRODUCT' and    \
-                     not self.user_extents:
-                    self.min_x_extent = f_value
-                elif param == 'CORNER_UL_PROJECTION_Y_PRODUCT' and    \
-                     not self.user_extents:
-                    self.max_y_extent = f_value
-                elif param == 'CORNER_LR_PROJECTION_X_PRODUCT' and    \
-                     not self.user_extents:
-                    self.max_x_extent = f_value
-                elif param == 'CORNER_LR_PROJECTION_Y_PRODUCT' and    \
-                     not self.user_extents:
-                    self.min_y_extent = f_value
-                elif param == 'GRID_CELL_SIZE_REFLECTIVE':
-                    self.pixel_resolution_x = f_value
-                    self.pixel_resolution_y = f_value
-                elif param == 'LANDSAT_SCENE_ID':
-                    product_id = value.strip('\"')
-                elif param == 'FILE_NAME_BAND_1':
-                    file_name_band_1 = value.strip('\"')
 
-        # validate retrieval of parameters
-        if self.bounding_north_latitude == -9999.0:
-            raise RuntimeError('Obtaining north bounding metadata field from:'
-                               ' [{0}]'.format(self.mtl_filename))
+def connect_to_server(socket_filename):
+    """Connects to a worker daemon
 
-        if self.bounding_south_latitude == 9999.0:
-            raise RuntimeError('Obtaining south bounding metadata field from:'
-                               ' [{0}]'.format(self.mtl_filename))
+    Args:
+        socket_filename <str>: The Unix socket of the daemon
 
-        if self.bounding_east_longitude == -9999.0:
-            raise RuntimeError('Obtaining east bounding metadata field from:'
-                               ' [{0}]'.format(self.mtl_filename))
+    Returns:
+        <socket.socket>: The connection, or None if no daemon is listening
+    """
 
-        if self.bounding_west_longitude == 9999.0:
-            raise RuntimeError('Obtaining west bounding metadata field from:'
-                               ' [{0}]'.format(self.mtl_filename))
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socket_filename)
+    except socket.error:
+        client.close()
+        return None
 
-        if self.min_x_extent is None:
-            raise RuntimeError('Obtaining UL Map X field from: [{0}]'
-                               .format(self.mtl_filename))
+    return client
 
-        if self.max_y_extent is None:
-            raise RuntimeError('Obtaining UL Map Y field from: [{0}]'
-                               .format(self.mtl_filename))
 
-        if self.max_x_extent is None:
-            raise RuntimeError('Obtaining LR Map X field from: [{0}]'
-                               .format(self.mtl_filename))
+def serve(socket_filename):
+    """Runs the worker daemon until terminated
 
-        if self.min_y_extent is None:
-            raise RuntimeError('Obtaining LR Map Y field from: [{0}]'
-                               .format(self.mtl_filename))
+    Jobs are run one at a time, in this process, so the elevation sources,
+    caches, and GDAL state stay resident between jobs.
 
-        if self.pixel_resolution_x is None:
-            raise RuntimeError('Obtaining reflective grid cell size field'
-                               ' from: [{0}]'.format(self.mtl_filename))
+    Args:
+        socket_filename <str>: The Unix socket to accept jobs on
 
-        if self.pixel_resolution_y is None:
-            raise RuntimeError('Obtaining reflective grid cell size field'
-                               ' from: [{0}]'.format(self.mtl_filename))
+    Returns:
+        <int>: The exit status
+    """
 
-        if file_name_band_1 is None:
-            raise RuntimeError('Obtaining FILE_NAME_BAND_1 field from: [{0}]'
-                               .format(self.mtl_filename))
+    logger = logging.getLogger(__name__)
 
-        if product_id is None:
-            raise RuntimeError('Obtaining LANDSAT_SCENE_ID field from: [{0}]'
-                               .format(self.mtl_filename))
+    if os.path.exists(socket_filename):
+        client = connect_to_server(socket_filename)
+        if client is not None:
+            client.close()
+            logger.error('A worker daemon is already listening on {0}'
+                         .format(socket_filename))
+            return 1  # EXIT_FAILURE
 
-        self.elevation_header_name = (self.elevation_header_name_fmt
-                                      .format(product_id))
-        self.elevation_image_name = (self.elevation_image_name_fmt
-                                     .format(product_id))
+        # Left behind by a daemon which did not shut down
+        os.unlink(socket_filename)
 
-        self.target_srs = Geo.get_proj4_projection_string(file_name_band_1)
+    ResidentSources.enabled = True
 
-        # Adjust the coordinates for image extents from the MTL because they
-        # are in center of pixel, and we need to supply the warping with actual
-        # extents
-        if not self.user_extents:
-            self.min_x_extent = (self.min_x_extent -
-                                 self.pixel_resolution_x * 0.5)
-            self.max_x_extent = (self.max_x_extent +
-                                 self.pixel_resolution_x * 0.5)
-            self.min_y_extent = (self.min_y_extent -
-                                 self.pixel_resolution_y * 0.5)
-            self.max_y_extent = (self.max_y_extent +
-                                 self.pixel_resolution_y * 0.5)
+    server = SocketServer.UnixStreamServer(socket_filename,
+                                           ElevationJobHandler)
+    server.log_formatter = logging.getLogger().handlers[0].formatter
 
+    # Wait this long for a job before checking whether terminated
+    server.timeout = SERVER_POLL_SECONDS
+    server.terminated = False
 
-def check_for_extents(args):
-    """Were custom extents specified?  If so, all extents must be specified.
-    Args:
-        args <args>: Command line arguments
+    def terminate(signal_number, frame):
+        """Shut down when terminated, once any running job completes"""
 
-    Returns:
-        <bool>: True if cusom extents were specified, and False if not
-    """
+        server.terminated = True
+
+    signal.signal(signal.SIGTERM, terminate)
+
+    logger.info('Serving elevation jobs on {0}'.format(socket_filename))
+    try:
+        while not server.terminated:
+            server.handle_request()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        logger.info('Worker daemon shutting down')
+        server.server_close()
+        os.unlink(socket_filename)
+        ResidentSources.clear()
 
-    if (args.extent_minx is not None or args.extent_maxx is not None or
-            args.extent_miny is not None or args.extent_maxy is not None or
-            args.nbound_lat is not None or args.sbound_lat is not None or
-            args.wbound_lon is not None or args.ebound_lon is not None):
+    return 0  # EXIT_SUCCESS
 
-        # One of the user-specified extents was specified, so make sure all
-        # were specified
-        if args.extent_minx is None:
-            raise RuntimeError('Must specify --extent-minx when specifying '
-                               'custom extents')
 
-        if args.extent_maxx is None:
-            raise RuntimeError('Must specify --extent-maxx when specifying '
-                               'custom extents')
+def dispatch_job(socket_filename, argv):
+    """Runs the job on a worker daemon, relaying its output
 
-        if args.extent_miny is None:
-            raise RuntimeError('Must specify --extent-miny when specifying '
-                               'custom extents')
+    Args:
+        socket_filename <str>: The Unix socket of the daemon
+        argv <list:str>: Command line arguments of the job
 
-        if args.extent_maxy is None:
-            raise RuntimeError('Must specify --extent-maxy when specifying '
-                               'custom extents')
+    Returns:
+        <int>: The exit status, or None if no daemon is listening
+    """
 
-        if args.nbound_lat is None:
-            raise RuntimeError('Must specify --nbound-lat when specifying '
-                               'custom extents')
+    logger = logging.getLogger(__name__)
 
-        if args.sbound_lat is None:
-            raise RuntimeError('Must specify --sbound-lat when specifying '
-                               'custom extents')
+    client = connect_to_server(socket_filename)
+    if client is None:
+        return None
 
-        if args.wbound_lon is None:
-            raise RuntimeError('Must specify --wbound-lon when specifying '
-                               'custom extents')
+    try:
+        request = {'argv': argv,
+                   'cwd': os.getcwd(),
+                   'environment': get_job_environment()}
+        client.sendall(json.dumps(request) + '\n')
 
-        if args.ebound_lon is None:
-            raise RuntimeError('Must specify --ebound-lon when specifying '
-                               'custom extents')
+        for line in client.makefile('rb'):
+            message = json.loads(line)
+            if 'exit_status' in message:
+                return message['exit_status']
 
-        return True
+            stream = sys.stdout
+            if message['stream'] == 'stderr':
+                stream = sys.stderr
+            stream.write(message['text'].encode('utf-8'))
+            stream.flush()
+    finally:
+        client.close()
 
-    return False
+    logger.error('The worker daemon on {0} closed the connection'
+                 .format(socket_filename))
+    return 1  # EXIT_FAILURE
 
 
-def main():
-    """Provides the main processing for the script"""
+def build_parser():
+    """Builds the command line parser
+
+    Returns:
+        <ArgumentParser>: The parser
+    """
 
     # get the command line argument for the metadata file
     description = ('Create an elevation band using either the MTL or XML '
@@ -1756,113 +5897,294 @@ def main():
                    'extents can be overriden with user-specified extents.')
     parser = ArgumentParser(description=description)
 
+    parser.add_argument('--server',
+                        action='store',
+                        dest='server_socket',
+                        default=os.environ.get(ESPA_ELEVATION_SERVER),
+                        help='run the job on the worker daemon listening on'
+                             ' the Unix socket; default is {0}'
+                             .format(ESPA_ELEVATION_SERVER),
+                        metavar='SOCKET',
+                        required=False)
+
     parser.add_argument('--debug',
                         action='store_true',
                         dest='debug',
                         default=False,
                         help='turn debug logging on')
 
-    parser.add_argument('--elevation',
+    parser.add_argument('--geoid-block-lines',
                         action='store',
-                        dest='elevation_filename',
+                        dest='geoid_block_lines',
+                        type=int,
+                        default=DEFAULT_GEOID_BLOCK_LINES,
+                        help='number of lines processed at a time when'
+                             ' adjusting to the WGS84 GEOID, which bounds'
+                             ' memory use; default is {0}'
+                             .format(DEFAULT_GEOID_BLOCK_LINES),
+                        metavar='LINES',
+                        required=False)
+
+    parser.add_argument('--geoid-mode',
+                        action='store',
+                        dest='geoid_mode',
+                        choices=GEOID_MODES,
+                        default=GEOID_MODE_WARP,
+                        help='warp the WGS84 GEOID to every output pixel, or'
+                             ' evaluate it on a sparse grid of output pixels'
+                             ' and upsample; default is {0}'
+                             .format(GEOID_MODE_WARP),
+                        required=False)
+
+    parser.add_argument('--geoid-grid-step',
+                        action='store',
+                        dest='geoid_grid_step',
+                        type=int,
+                        default=DEFAULT_GEOID_GRID_STEP,
+                        help='spacing in output pixels of the GEOID grid'
+                             ' for --geoid-mode grid; default is {0}'
+                             .format(DEFAULT_GEOID_GRID_STEP),
+                        metavar='PIXELS',
+                        required=False)
+
+    parser.add_argument('--plan',
+                        action='store',
+                        dest='plan_filename',
                         default=None,
-                        help='optional name of output elevation file (.img); '
-                             'default is {scene_name}_elevation.img',
+                        help='write the processing plan of each input as'
+                             ' JSON to FILE (- for stdout) without'
+                             ' generating any elevation',
+                        metavar='FILE',
+                        required=False)
+
+    parser.add_argument('--metrics',
+                        action='store',
+                        dest='metrics_filename',
+                        default=None,
+                        help='write the wall and CPU time of each processing'
+                             ' stage and executed command as JSON to FILE',
                         metavar='FILE',
                         required=False)
 
+    parser.add_argument('--intermediate-storage',
+                        action='store',
+                        dest='intermediate_storage',
+                        choices=INTERMEDIATE_STORAGES,
+                        default=os.environ.get(
+                            ESPA_ELEVATION_INTERMEDIATE_STORAGE,
+                            INTERMEDIATE_STORAGE_DISK),
+                        help='keep the intermediate rasters in the scratch'
+                             ' directory, in memory, or in memory when they'
+                             ' are estimated to fit within'
+                             ' --intermediate-memory-limit; default is {0}'
+                             ' or {1}'
+                             .format(ESPA_ELEVATION_INTERMEDIATE_STORAGE,
+                                     INTERMEDIATE_STORAGE_DISK),
+                        required=False)
+
+    parser.add_argument('--intermediate-memory-limit',
+                        action='store',
+                        dest='intermediate_memory_limit',
+                        default=DEFAULT_INTERMEDIATE_MEMORY_LIMIT,
+                        help='largest estimated intermediate size kept in'
+                             ' memory by --intermediate-storage auto;'
+                             ' default is {0}'
+                             .format(DEFAULT_INTERMEDIATE_MEMORY_LIMIT),
+                        metavar='SIZE',
+                        required=False)
+
+    parser.add_argument('--staging-workers',
+                        action='store',
+                        dest='staging_workers',
+                        type=int,
+                        default=DEFAULT_STAGING_WORKERS,
+                        help='maximum number of elevation tiles staged'
+                             ' concurrently; default is {0}'
+                             .format(DEFAULT_STAGING_WORKERS),
+                        metavar='COUNT',
+                        required=False)
+
+    parser.add_argument('--warp-profile',
+                        action='store',
+                        dest='warp_profile',
+                        choices=sorted(WARP_PROFILES.keys()),
+                        default=None,
+                        help='memory, threads, cache, and accuracy used for'
+                             ' every warp; default is taken from {0}, or'
+                             ' is {1}'.format(ESPA_ELEVATION_WARP_PROFILE,
+                                              WARP_PROFILE_DEFAULT),
+                        required=False)
+
+    parser.add_argument('--output-format',
+                        action='store',
+                        dest='output_format',
+                        choices=OUTPUT_FORMATS,
+                        default=OUTPUT_FORMAT_ENVI,
+                        help='write the elevation as ENVI, or as a cloud'
+                             ' optimized GeoTIFF; default is {0}'
+                             .format(OUTPUT_FORMAT_ENVI),
+                        required=False)
+
+    parser.add_argument('--validate-input',
+                        action='store_true',
+                        dest='validate_input',
+                        default=False,
+                        help='validate the input XML against its schema'
+                             ' before any processing')
+
+    parser.add_argument('--xml-validation',
+                        action='store',
+                        dest='xml_validation',
+                        choices=XML_VALIDATIONS,
+                        default=None,
+                        help='validate the whole XML, or only the appended'
+                             ' elevation band, once the band is appended;'
+                             ' default is taken from {0}, or is {1}'
+                             .format(ESPA_ELEVATION_XML_VALIDATION,
+                                     XML_VALIDATION_FULL),
+                        required=False)
+
+    parser.add_argument('--scratch-root',
+                        action='store',
+                        dest='scratch_root',
+                        default=os.environ.get(ESPA_ELEVATION_SCRATCH_ROOT,
+                                               os.curdir),
+                        help='directory in which a unique scratch directory'
+                             ' is created for the intermediate files of each'
+                             ' job, or {0} to use {1} when the intermediate'
+                             ' files are estimated to fit; default is {2} or'
+                             ' the current directory'
+                             .format(SCRATCH_ROOT_AUTO, TMPFS_DIR,
+                                     ESPA_ELEVATION_SCRATCH_ROOT),
+                        metavar='DIR',
+                        required=False)
+
     group = parser.add_mutually_exclusive_group(required=True)
 
-    group.add_argument('--mtl', '--mtl_filename',
+    group.add_argument('--serve',
+                       action='store',
+                       dest='serve_socket',
+                       default=None,
+                       help='run as a worker daemon accepting the jobs of'
+                            ' this command on the Unix socket, keeping the'
+                            ' elevation sources and caches resident between'
+                            ' jobs',
+                       metavar='SOCKET')
+
+    group.add_argument('--batch',
                        action='store',
-                       dest='mtl_filename',
+                       dest='batch_filename',
                        default=None,
-                       help='name of Landsat MTL file',
+                       help='name of a manifest file (or - for stdin) with'
+                            ' one input per line, each specified with the'
+                            ' --mtl or --xml, --elevation, and extent'
+                            ' options',
                        metavar='FILE')
 
-    group.add_argument('--xml', '--xml_filename',
+    group.add_argument('--build-grid-stores',
                        action='store',
-                       dest='xml_filename',
+                       dest='grid_store_definitions',
                        default=None,
-                       help='name of XML Metadata file',
+                       help='name of a JSON file defining elevation stores'
+                            ' to pre-warp to standard output grids, which'
+                            ' are built in {0}'
+                            .format(ESPA_ELEVATION_GRID_STORE_DIR),
                        metavar='FILE')
 
-    # Look for user-specified min/max extents, which would then override the
-    # scene extents
-    geo_extents = parser.add_argument_group('geo_extents',
-        'User-specified geographic extents to override the scene extents. '
-        'The scene projection and reflectance band resolution are used. '
-        'If one of the following parameters is specified they all must be '
-        'specified.')
+    add_input_arguments(parser, group)
 
-    geo_extents.add_argument('--extent-minx',
-                             action='store',
-                             dest='extent_minx',
-                             default=None,
-                             metavar='FLOAT',
-                             help='Minimum X direction extent value',
-                             required=False)
+    return parser
 
-    geo_extents.add_argument('--extent-maxx',
-                             action='store',
-                             dest='extent_maxx',
-                             default=None,
-                             metavar='FLOAT',
-                             help='Maximum X direction extent value',
-                             required=False)
 
-    geo_extents.add_argument('--extent-miny',
-                             action='store',
-                             dest='extent_miny',
-                             default=None,
-                             metavar='FLOAT',
-                             help='Minimum Y direction extent value',
-                             required=False)
+def run(args):
+    """Runs the job described by the command line arguments
 
-    geo_extents.add_argument('--extent-maxy',
-                             action='store',
-                             dest='extent_maxy',
-                             default=None,
-                             metavar='FLOAT',
-                             help='Maximum Y direction extent value',
-                             required=False)
+    Args:
+        args <args>: Command line arguments
 
-    geo_extents.add_argument('--nbound-lat',
-                             action='store',
-                             dest='nbound_lat',
-                             default=None,
-                             metavar='FLOAT',
-                             help='North-bounding latitude associated with '
-                                  'extent-maxy',
-                             required=False)
+    Returns:
+        <int>: The exit status
+    """
 
-    geo_extents.add_argument('--sbound-lat',
-                             action='store',
-                             dest='sbound_lat',
-                             default=None,
-                             metavar='FLOAT',
-                             help='South-bounding latitude associated with '
-                                  'extent-miny',
-                             required=False)
+    logger = logging.getLogger(__name__)
 
-    geo_extents.add_argument('--wbound-lon',
-                             action='store',
-                             dest='wbound_lon',
-                             default=None,
-                             metavar='FLOAT',
-                             help='West-bounding longitude associated with '
-                                  'extent-minx',
-                             required=False)
+    # Get the environment variable for the elevation data directory
+    if ESPA_ELEVATION_DIR not in os.environ:
+        logger.info('{0} environment variable not defined'
+                    .format(ESPA_ELEVATION_DIR))
+        return 1  # EXIT_FAILURE
 
-    geo_extents.add_argument('--ebound-lon',
-                             action='store',
-                             dest='ebound_lon',
-                             default=None,
-                             metavar='FLOAT',
-                             help='East-bounding longitude associated with '
-                                  'extent-maxx',
-                             required=False)
+    plans = None
+    if args.plan_filename is not None:
+        plans = list()
+
+    metrics_runs = None
+    if args.metrics_filename is not None:
+        metrics_runs = list()
+
+    if args.grid_store_definitions is not None:
+        if plans is not None:
+            logger.error('--plan is not supported when building grid stores')
+            return 1  # EXIT_FAILURE
+
+        try:
+            success = build_grid_stores(args, metrics_runs)
+        except Exception:
+            logger.exception('Grid store build failed')
+            return 1  # EXIT_FAILURE
+
+    elif args.batch_filename is not None:
+        if args.elevation_filename is not None or check_for_extents(args):
+            logger.error('--elevation and extents must be specified for'
+                         ' each item of the batch manifest')
+            return 1  # EXIT_FAILURE
+
+        try:
+            success = run_batch(args, plans, metrics_runs)
+        except Exception:
+            logger.exception('Batch elevation generation failed')
+            return 1  # EXIT_FAILURE
+
+    else:
+        # Call the core processing
+        success = True
+        input_name = args.xml_filename or args.mtl_filename
+        elevation = None
+        try:
+            elevation = create_elevation(args)
+            configure_elevation(elevation, args)
+            if plans is None:
+                elevation.generate()
+            else:
+                elevation_plan = elevation.plan()
+                elevation_plan['input'] = input_name
+                plans.append(elevation_plan)
+        except Exception as error:
+            logger.exception('Elevation generation failed')
+            if metrics_runs is not None:
+                write_metrics([run_metrics(input_name, elevation, error)],
+                              args.metrics_filename)
+            return 1  # EXIT_FAILURE
+
+        if metrics_runs is not None:
+            metrics_runs.append(run_metrics(input_name, elevation))
+
+    if metrics_runs is not None:
+        write_metrics(metrics_runs, args.metrics_filename)
+
+    if plans is not None:
+        write_plans(plans, args.plan_filename)
+
+    if not success:
+        return 1  # EXIT_FAILURE
+
+    return 0  # EXIT_SUCCESS
 
+
+def main():
+    """Provides the main processing for the script"""
+
+    parser = build_parser()
     args = parser.parse_args()
 
     # Check logging level
@@ -1870,96 +6192,34 @@ def main():
     if args.debug:
         logging_level = logging.DEBUG
 
-    # Setup the default logger format and level.  Log to STDOUT.
+    # Setup the default logger format and level.  Log to STDOUT, unless the
+    # plan is written there.
+    log_stream = sys.stdout
+    if args.plan_filename == '-':
+        log_stream = sys.stderr
     logging.basicConfig(format=('%(asctime)s.%(msecs)03d %(process)d'
                                 ' %(levelname)-8s'
                                 ' %(filename)s:%(lineno)d:'
                                 '%(funcName)s -- %(message)s'),
                         datefmt='%Y-%m-%d %H:%M:%S',
                         level=logging_level,
-                        stream=sys.stdout)
+                        stream=log_stream)
 
     logger = logging.getLogger(__name__)
 
-    # Get the environment variable for the elevation data directory
-    if ESPA_ELEVATION_DIR not in os.environ:
-        logger.info('{0} environment variable not defined'
-                    .format(ESPA_ELEVATION_DIR))
-        sys.exit(1)  # EXIT_FAILURE
-
-    # Initialize
-    minx = None
-    miny = None
-    maxx = None
-    maxy = None
-    nbound_lat = None
-    sbound_lat = None
-    wbound_lon = None
-    ebound_lon = None
-    elev_filename = args.elevation_filename
-
-    # Grab the user-specified extents if they exist
-    user_extents = check_for_extents(args)
-    if user_extents:
-        minx = float(args.extent_minx)
-        miny = float(args.extent_miny)
-        maxx = float(args.extent_maxx)
-        maxy = float(args.extent_maxy)
-        nbound_lat = float(args.nbound_lat)
-        sbound_lat = float(args.sbound_lat)
-        wbound_lon = float(args.wbound_lon)
-        ebound_lon = float(args.ebound_lon)
-        logger.info('User-specified geographic extents will be used: '
-                    'extent-minx: {0}  '
-                    'extent-maxx: {1}  '
-                    'extent-miny: {2}  '
-                    'extent-maxy: {3}  '
-                    'nbound-lat: {4}  '
-                    'sbound-lat: {5}  '
-                    'ebound-lon: {6}  '
-                    'wbound-lon: {7}'.format(minx, maxx, miny, maxy, nbound_lat,
-                                             sbound_lat, wbound_lon, ebound_lon))
-
-    # Call the core processing
-    elevation = None
-    if args.xml_filename is not None:
-        logger.info('Processing XML file: {0}'.format(args.xml_filename))
-
-        metadata = Metadata(xml_filename=args.xml_filename)
-        is_espa = False
-        if str(metadata.xml_object.tag).endswith('espa_metadata'):
-            is_espa = True
-        elif str(metadata.xml_object.tag).endswith('ard_metadata'):
-            is_espa = False
-        else:
-            raise RuntimeError('Unsupported Metadata XML --> {}'
-                               .format(str(metadata.xml_object.tag)))
-        del metadata
-
-        if is_espa:
-            elevation = ESPAXMLElevation(args.xml_filename, user_extents,
-                                         minx, maxx, miny, maxy,
-                                         nbound_lat, sbound_lat, wbound_lon,
-                                         ebound_lon, elev_filename)
-        else:
-            elevation = ARDXMLElevation(args.xml_filename, user_extents,
-                                        minx, maxx, miny, maxy,
-                                        nbound_lat, sbound_lat, wbound_lon,
-                                        ebound_lon, elev_filename)
-    else:
-        logger.info('Processing MTL file: {0}'.format(args.mtl_filename))
-
-        elevation = MTLElevation(args.mtl_filename, user_extents, minx, maxx,
-                                 miny, maxy, nbound_lat, sbound_lat, wbound_lon,
-                                 ebound_lon, elev_filename)
+    # Run as the worker daemon
+    if args.serve_socket is not None:
+        sys.exit(serve(args.serve_socket))
 
-    try:
-        elevation.generate()
-    except Exception:
-        logger.exception('Elevation generation failed')
-        sys.exit(1)  # EXIT_FAILURE
+    # Run the job on a worker daemon, when one is listening
+    if args.server_socket is not None:
+        exit_status = dispatch_job(args.server_socket, sys.argv[1:])
+        if exit_status is not None:
+            sys.exit(exit_status)
+        logger.warning('No worker daemon is listening on {0}, running the'
+                       ' job locally'.format(args.server_socket))
 
-    sys.exit(0)  # EXIT_SUCCESS
+    sys.exit(run(args))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,617 @@
+"""
+License:
+    NASA Open Source Agreement 1.3
+
+Description:
+    Generates small synthetic stand-ins for the elevation sources below
+    ESPA_ELEVATION_DIR, and for the ESPA XML, ARD XML, and MTL inputs, so
+    the elevation generation can be tested and benchmarked without the real
+    data.
+"""
+
+import os
+import re
+import math
+import json
+import shutil
+import tarfile
+
+import numpy as np
+from osgeo import gdal, osr
+
+
+# The real headers of the elevation sources
+HEADER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          os.pardir, 'scripts', 'projection_headers')
+
+# Name of the file recording how the fixtures were generated
+FIXTURE_PARAMETERS_NAME = 'fixture-parameters.json'
+
+# Factors the RAMP DEM dimensions (28680 x 24580) can be divided by
+RAMP_SCALES = [1, 2, 4, 5, 10, 20]
+
+# West longitudes and north latitudes of the GTOPO30 tiles
+GTOPO30_NORTH_LONGITUDES = [-180, -140, -100, -60, -20, 20, 60, 100, 140]
+GTOPO30_NORTH_LATITUDES = [90, 40, -10]
+GTOPO30_SOUTH_LONGITUDES = [-180, -120, -60, 0, 60, 120]
+GTOPO30_SOUTH_LATITUDE = -60
+
+GTOPO30_PRJ = '\n'.join(['PROJECTION GEOGRAPHIC',
+                         'DATUM WGS84',
+                         'ZUNITS METERS',
+                         'UNITS DD',
+                         'SPHEROID WGS84',
+                         'XSHIFT 0.0000000000',
+                         'YSHIFT 0.0000000000',
+                         'PARAMETERS', ''])
+
+
+def synthetic_elevation(longitudes, latitudes):
+    """Smooth synthetic land elevation (meters) at the coordinates
+
+    Args:
+        longitudes <numpy.ndarray>: Longitudes of the pixel centers
+        latitudes <numpy.ndarray>: Latitudes of the pixel centers
+
+    Returns:
+        <numpy.ndarray>: Int16 elevation
+    """
+
+    elevation = (1500.0 +
+                 1000.0 * np.sin(np.radians(latitudes * 7.0)) *
+                 np.cos(np.radians(longitudes * 5.0)))
+
+    return elevation.astype(np.int16)
+
+
+def pixel_centers(west, north, samples, lines, pixel_size):
+    """Longitude and latitude grids of the pixel centers of a tile"""
+
+    longitudes = west + (np.arange(samples) + 0.5) * pixel_size
+    latitudes = north - (np.arange(lines) + 0.5) * pixel_size
+
+    return np.meshgrid(longitudes, latitudes)
+
+
+def make_dirs(path):
+    """Create the directory if it does not exist"""
+
+    if not os.path.isdir(path):
+        os.makedirs(path)
+
+
+def write_ehdr_header(filename, samples, lines, ul_x, ul_y, pixel_size,
+                      byte_order):
+    """Write an ESRI BIL header for an Int16 band"""
+
+    with open(filename, 'w') as hdr_fd:
+        hdr_fd.write('BYTEORDER      {0}\n'.format(byte_order))
+        hdr_fd.write('LAYOUT         BIL\n')
+        hdr_fd.write('NROWS          {0}\n'.format(lines))
+        hdr_fd.write('NCOLS          {0}\n'.format(samples))
+        hdr_fd.write('NBANDS         1\n')
+        hdr_fd.write('NBITS          16\n')
+        hdr_fd.write('BANDROWBYTES   {0}\n'.format(samples * 2))
+        hdr_fd.write('TOTALROWBYTES  {0}\n'.format(samples * 2))
+        hdr_fd.write('BANDGAPBYTES   0\n')
+        hdr_fd.write('NODATA         -9999\n')
+        hdr_fd.write('ULXMAP         {0:.12f}\n'.format(ul_x))
+        hdr_fd.write('ULYMAP         {0:.12f}\n'.format(ul_y))
+        hdr_fd.write('XDIM           {0:.12f}\n'.format(pixel_size))
+        hdr_fd.write('YDIM           {0:.12f}\n'.format(pixel_size))
+
+
+def gls_tile_name(latitude, longitude):
+    """GLS tile name for the lower-left corner of a tile"""
+
+    n_s = 'n'
+    if latitude < 0:
+        n_s = 's'
+    e_w = 'e'
+    if longitude < 0:
+        e_w = 'w'
+
+    return '{0}{1:02}{2}{3:03}'.format(n_s, abs(latitude),
+                                       e_w, abs(longitude))
+
+
+def write_gls_tiles(gls_dir, boxes, samples):
+    """Write the GLS tiles covering the boxes
+
+    Args:
+        gls_dir <str>: The GLS directory
+        boxes <list>: (south, north, west, east) boxes of land, where the
+                      west longitude is greater than the east longitude for
+                      boxes crossing the antimeridian
+        samples <int>: Samples and lines of each 1 degree tile
+
+    Returns:
+        <int>: The number of tiles written
+    """
+
+    make_dirs(gls_dir)
+    shutil.copyfile(os.path.join(HEADER_DIR, 'gls_projection.prj'),
+                    os.path.join(gls_dir, 'gls_projection.prj'))
+
+    tiles = set()
+    for (south, north, west, east) in boxes:
+        west = int(math.floor(west))
+        east = int(math.floor(east))
+        if west > east:
+            longitude_ranges = [(west, 179), (-180, east)]
+        else:
+            longitude_ranges = [(west, east)]
+
+        for latitude in range(int(math.floor(south)),
+                              int(math.floor(north)) + 1):
+            for (first, last) in longitude_ranges:
+                for longitude in range(first, last + 1):
+                    tiles.add((latitude, longitude))
+
+    pixel_size = 1.0 / samples
+    for (latitude, longitude) in sorted(tiles):
+        tile_name = gls_tile_name(latitude, longitude)
+
+        (longitudes, latitudes) = pixel_centers(longitude, latitude + 1,
+                                                samples, samples, pixel_size)
+        data = synthetic_elevation(longitudes, latitudes)
+        data.astype('<i2').tofile(os.path.join(gls_dir,
+                                               tile_name + '.bil'))
+
+        write_ehdr_header(os.path.join(gls_dir, tile_name + '.hdr'),
+                          samples, samples,
+                          longitude + pixel_size / 2.0,
+                          latitude + 1 - pixel_size / 2.0,
+                          pixel_size, 'I')
+
+    return len(tiles)
+
+
+def gtopo30_tiles():
+    """The GTOPO30 tiles
+
+    Returns:
+        <list>: (name, west, north, width, height, samples, lines) of the
+                full resolution tiles
+    """
+
+    tiles = list()
+    for north in GTOPO30_NORTH_LATITUDES:
+        for west in GTOPO30_NORTH_LONGITUDES:
+            tiles.append((west, north, 40, 50, 4800, 6000))
+    for west in GTOPO30_SOUTH_LONGITUDES:
+        tiles.append((west, GTOPO30_SOUTH_LATITUDE, 60, 30, 7200, 3600))
+
+    named_tiles = list()
+    for (west, north, width, height, samples, lines) in tiles:
+        e_w = 'e'
+        if west <= 0:
+            e_w = 'w'
+        n_s = 'n'
+        if north < 0:
+            n_s = 's'
+        name = '{0}{1:03}{2}{3:02}'.format(e_w, abs(west), n_s, abs(north))
+        named_tiles.append((name, west, north, width, height,
+                            samples, lines))
+
+    return named_tiles
+
+
+def write_gtopo30_tiles(gtopo30_dir, scale):
+    """Write every GTOPO30 tile archive, scaled down
+
+    Args:
+        gtopo30_dir <str>: The GTOPO30 directory
+        scale <int>: Factor to reduce the tile dimensions by
+    """
+
+    make_dirs(gtopo30_dir)
+
+    for (name, west, north, width, height,
+         samples, lines) in gtopo30_tiles():
+        samples = samples // scale
+        lines = lines // scale
+        pixel_size = float(width) / samples
+
+        member_base = os.path.join(gtopo30_dir, name.upper())
+
+        (longitudes, latitudes) = pixel_centers(west, north, samples, lines,
+                                                pixel_size)
+        data = synthetic_elevation(longitudes, latitudes)
+        data.astype('>i2').tofile(member_base + '.DEM')
+
+        write_ehdr_header(member_base + '.HDR', samples, lines,
+                          west + pixel_size / 2.0,
+                          north - pixel_size / 2.0,
+                          pixel_size, 'M')
+
+        with open(member_base + '.PRJ', 'w') as prj_fd:
+            prj_fd.write(GTOPO30_PRJ)
+
+        archive_name = os.path.join(gtopo30_dir, name + '.tar.gz')
+        with tarfile.open(archive_name, 'w:gz') as archive:
+            for extension in ('.DEM', '.HDR', '.PRJ'):
+                archive.add(member_base + extension,
+                            arcname=name.upper() + extension)
+
+        for extension in ('.DEM', '.HDR', '.PRJ'):
+            os.unlink(member_base + extension)
+
+
+def write_scaled_envi_header(source_header, output_header, scale):
+    """Copy a real ENVI header, dividing the dimensions by the scale
+
+    The pixel size is multiplied by the scale, so the extent is unchanged.
+
+    Returns:
+        <int>: Samples of the scaled image
+        <int>: Lines of the scaled image
+    """
+
+    with open(source_header, 'r') as header_fd:
+        text = header_fd.read()
+
+    samples = int(re.search(r'samples\s*=\s*(\d+)', text).group(1))
+    lines = int(re.search(r'lines\s*=\s*(\d+)', text).group(1))
+    if samples % scale != 0 or lines % scale != 0:
+        raise ValueError('Scale {0} does not divide {1} x {2}'
+                         .format(scale, samples, lines))
+    samples = samples // scale
+    lines = lines // scale
+
+    text = re.sub(r'(samples\s*=\s*)\d+', r'\g<1>{0}'.format(samples), text)
+    text = re.sub(r'(lines\s*=\s*)\d+', r'\g<1>{0}'.format(lines), text)
+
+    def scale_map_info(match):
+        """Multiply the pixel sizes of the map info by the scale"""
+
+        fields = [field.strip() for field in match.group(1).split(',')]
+        fields[5] = str(float(fields[5]) * scale)
+        fields[6] = str(float(fields[6]) * scale)
+        return 'map info = {{{0}}}'.format(', '.join(fields))
+
+    text = re.sub(r'map info\s*=\s*\{([^}]*)\}', scale_map_info, text)
+
+    with open(output_header, 'w') as header_fd:
+        header_fd.write(text)
+
+    return (samples, lines)
+
+
+def write_ramp(ramp_dir, scale):
+    """Write the RAMP DEM, scaled down
+
+    The elevation is a dome centered on the south pole.
+    """
+
+    make_dirs(ramp_dir)
+
+    (samples, lines) = write_scaled_envi_header(
+        os.path.join(HEADER_DIR, 'ramp200dem_wgs_v2.hdr'),
+        os.path.join(ramp_dir, 'ramp200dem_wgs_v2.hdr'),
+        scale)
+
+    pixel_size = 200.0 * scale
+    map_x = -2868000.0 + (np.arange(samples) + 0.5) * pixel_size
+    map_y = 2458000.0 - (np.arange(lines) + 0.5) * pixel_size
+    (map_x, map_y) = np.meshgrid(map_x, map_y)
+
+    radius = np.sqrt(map_x * map_x + map_y * map_y)
+    data = np.clip(4000.0 * (1.0 - radius / 2500000.0), 0.0, None)
+
+    data.astype('<i2').tofile(os.path.join(ramp_dir,
+                                           'ramp200dem_wgs_v2.img'))
+
+
+def write_geoid(geoid_dir):
+    """Write the WGS84 GEOID at its real size"""
+
+    make_dirs(geoid_dir)
+
+    shutil.copyfile(os.path.join(HEADER_DIR, 'geoid.hdr'),
+                    os.path.join(geoid_dir, 'geoid.hdr'))
+
+    longitudes = -180.0 + np.arange(721) * 0.5
+    latitudes = 90.0 - np.arange(361) * 0.5
+    (longitudes, latitudes) = np.meshgrid(longitudes, latitudes)
+
+    data = (60.0 * np.sin(np.radians(2.0 * latitudes)) *
+            np.cos(np.radians(longitudes)) +
+            20.0 * np.cos(np.radians(3.0 * longitudes)))
+
+    data.astype('<i2').tofile(os.path.join(geoid_dir, 'geoid.img'))
+
+
+def build_elevation_dir(elevation_dir, gls_boxes, gls_samples=360,
+                        gtopo30_scale=10, ramp_scale=20):
+    """Generate the synthetic elevation sources, unless already generated
+
+    Args:
+        elevation_dir <str>: Directory to use as ESPA_ELEVATION_DIR
+        gls_boxes <list>: (south, north, west, east) boxes to provide GLS
+                          tiles for, everything else is water
+        gls_samples <int>: Samples and lines of each GLS tile
+        gtopo30_scale <int>: Factor to reduce the GTOPO30 tiles by
+        ramp_scale <int>: Factor to reduce the RAMP DEM by
+
+    Returns:
+        <bool>: True if the sources were generated
+    """
+
+    parameters = {'gls_boxes': [list(box) for box in gls_boxes],
+                  'gls_samples': gls_samples,
+                  'gtopo30_scale': gtopo30_scale,
+                  'ramp_scale': ramp_scale}
+
+    parameters_name = os.path.join(elevation_dir, FIXTURE_PARAMETERS_NAME)
+    if os.path.isfile(parameters_name):
+        with open(parameters_name, 'r') as parameters_fd:
+            if json.load(parameters_fd) == parameters:
+                return False
+        shutil.rmtree(elevation_dir)
+
+    make_dirs(elevation_dir)
+
+    write_gls_tiles(os.path.join(elevation_dir, 'gls'), gls_boxes,
+                    gls_samples)
+    write_gtopo30_tiles(os.path.join(elevation_dir, 'gtopo30'),
+                        gtopo30_scale)
+    write_ramp(os.path.join(elevation_dir, 'ramp'), ramp_scale)
+    write_geoid(os.path.join(elevation_dir, 'geoid'))
+
+    # Written last, so an interrupted generation is redone
+    with open(parameters_name, 'w') as parameters_fd:
+        json.dump(parameters, parameters_fd, indent=2, sort_keys=True)
+
+    return True
+
+
+class Scene(object):
+    """A synthetic scene, a box of latitude and longitude on a map grid"""
+
+    def __init__(self, name, center_longitude, center_latitude, size,
+                 resolution=30.0, epsg=None):
+        """Class initialization
+
+        Args:
+            name <str>: Name of the scene
+            center_longitude <float>: Longitude of the center of the box
+            center_latitude <float>: Latitude of the center of the box
+            size <float>: Width and height of the box (degrees)
+            resolution <float>: Pixel size of the map grid (meters)
+            epsg <int>: EPSG code of the map grid, if None UTM is used
+        """
+        super(Scene, self).__init__()
+
+        self.name = name
+        self.resolution = resolution
+
+        half_size = size / 2.0
+        self.north = center_latitude + half_size
+        self.south = center_latitude - half_size
+        self.west = normalize_longitude(center_longitude - half_size)
+        self.east = normalize_longitude(center_longitude + half_size)
+
+        self.srs = osr.SpatialReference()
+        if epsg is not None:
+            self.srs.ImportFromEPSG(epsg)
+        else:
+            zone = min(int((normalize_longitude(center_longitude) + 180.0) /
+                           6.0) + 1, 60)
+            self.srs.SetWellKnownGeogCS('WGS84')
+            self.srs.SetUTM(zone, center_latitude >= 0)
+            self.utm_zone = zone
+
+        self.epsg = epsg
+        (self.min_x, self.min_y,
+         self.max_x, self.max_y) = self.map_extents()
+
+    def map_extents(self):
+        """Determine the map extents covering the box, snapped to the grid"""
+
+        latlon_srs = self.srs.CloneGeogCS()
+        for srs in (latlon_srs, self.srs):
+            if hasattr(srs, 'SetAxisMappingStrategy'):
+                srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+        to_map = osr.CoordinateTransformation(latlon_srs, self.srs)
+
+        # Densify the edges, which are curved on the map grid
+        west = self.west
+        east = self.east
+        if east < west:
+            east += 360.0
+        points = list()
+        for step in range(33):
+            fraction = step / 32.0
+            longitude = normalize_longitude(west + (east - west) * fraction)
+            latitude = self.south + (self.north - self.south) * fraction
+            points.extend([(longitude, self.north), (longitude, self.south),
+                           (self.west, latitude), (self.east, latitude)])
+
+        map_points = [to_map.TransformPoint(longitude, latitude)[:2]
+                      for (longitude, latitude) in points]
+        map_x = [point[0] for point in map_points]
+        map_y = [point[1] for point in map_points]
+
+        resolution = self.resolution
+        return (math.floor(min(map_x) / resolution) * resolution,
+                math.floor(min(map_y) / resolution) * resolution,
+                math.ceil(max(map_x) / resolution) * resolution,
+                math.ceil(max(map_y) / resolution) * resolution)
+
+    def dimensions(self):
+        """Lines and samples of the map grid"""
+
+        return (int(round((self.max_y - self.min_y) / self.resolution)),
+                int(round((self.max_x - self.min_x) / self.resolution)))
+
+    def write_reference_band(self, filename):
+        """Write a stand-in band 1 image providing the projection
+
+        Only the projection of the band is read, so the image is a single
+        pixel.
+        """
+
+        driver = gdal.GetDriverByName('GTiff')
+        band_ds = driver.Create(filename, 1, 1, 1, gdal.GDT_Int16)
+        band_ds.SetProjection(self.srs.ExportToWkt())
+        band_ds.SetGeoTransform([self.min_x, self.max_x - self.min_x, 0.0,
+                                 self.max_y, 0.0,
+                                 self.min_y - self.max_y])
+        band_ds = None
+
+    def write_mtl(self, filename, band_filename):
+        """Write an MTL input for the scene"""
+
+        half = self.resolution / 2.0
+        values = [
+            ('LANDSAT_SCENE_ID', '"{0}"'.format(self.product_id())),
+            ('FILE_NAME_BAND_1', '"{0}"'.format(band_filename)),
+            ('CORNER_UL_LAT_PRODUCT', self.north),
+            ('CORNER_UL_LON_PRODUCT', self.west),
+            ('CORNER_UR_LAT_PRODUCT', self.north),
+            ('CORNER_UR_LON_PRODUCT', self.east),
+            ('CORNER_LL_LAT_PRODUCT', self.south),
+            ('CORNER_LL_LON_PRODUCT', self.west),
+            ('CORNER_LR_LAT_PRODUCT', self.south),
+            ('CORNER_LR_LON_PRODUCT', self.east),
+            ('CORNER_UL_PROJECTION_X_PRODUCT', self.min_x + half),
+            ('CORNER_UL_PROJECTION_Y_PRODUCT', self.max_y - half),
+            ('CORNER_LR_PROJECTION_X_PRODUCT', self.max_x - half),
+            ('CORNER_LR_PROJECTION_Y_PRODUCT', self.min_y + half),
+            ('GRID_CELL_SIZE_REFLECTIVE', self.resolution)]
+
+        with open(filename, 'w') as mtl_fd:
+            mtl_fd.write('GROUP = L1_METADATA_FILE\n')
+            for (name, value) in values:
+                mtl_fd.write('    {0} = {1}\n'.format(name, value))
+            mtl_fd.write('END_GROUP = L1_METADATA_FILE\n')
+            mtl_fd.write('END\n')
+
+    def product_id(self):
+        """Scene identifier used to name the outputs"""
+
+        return 'LC08SYN{0}'.format(self.name.upper().replace('_', ''))
+
+    def projection_xml(self):
+        """The projection_information element of the ESPA schema"""
+
+        half = self.resolution / 2.0
+        if self.epsg is None:
+            projection = 'UTM'
+            parameters = ('<utm_proj_params><zone_code>{0}</zone_code>'
+                          '</utm_proj_params>'
+                          .format(self.utm_zone if self.north >= 0
+                                  else -self.utm_zone))
+        else:
+            projection = 'PS'
+            parameters = ('<ps_proj_params>'
+                          '<longitude_pole>0.0</longitude_pole>'
+                          '<latitude_true_scale>-71.0</latitude_true_scale>'
+                          '<false_easting>0.0</false_easting>'
+                          '<false_northing>0.0</false_northing>'
+                          '</ps_proj_params>')
+
+        return ('<projection_information projection="{0}" datum="WGS84"'
+                ' units="meters">'
+                '<corner_point location="UL" x="{1}" y="{2}"/>'
+                '<corner_point location="LR" x="{3}" y="{4}"/>'
+                '<grid_origin>CENTER</grid_origin>'
+                '{5}'
+                '</projection_information>'
+                .format(projection,
+                        self.min_x + half, self.max_y - half,
+                        self.max_x - half, self.min_y + half,
+                        parameters))
+
+    def global_metadata_xml(self):
+        """The global_metadata element of the ESPA schema"""
+
+        return ('<global_metadata>'
+                '<data_provider>USGS/EROS</data_provider>'
+                '<satellite>LANDSAT_8</satellite>'
+                '<instrument>OLI_TIRS</instrument>'
+                '<acquisition_date>2017-07-01</acquisition_date>'
+                '<scene_center_time>18:00:00.0000000Z</scene_center_time>'
+                '<level1_production_date>2017-07-15T00:00:00Z'
+                '</level1_production_date>'
+                '<solar_angles zenith="30.0" azimuth="130.0"'
+                ' units="degrees"/>'
+                '<wrs system="2" path="1" row="1"/>'
+                '<product_id>{0}</product_id>'
+                '<lpgs_metadata_file>{0}_MTL.txt</lpgs_metadata_file>'
+                '<corner location="UL" latitude="{1}" longitude="{3}"/>'
+                '<corner location="LR" latitude="{2}" longitude="{4}"/>'
+                '<bounding_coordinates>'
+                '<west>{3}</west><east>{4}</east>'
+                '<north>{1}</north><south>{2}</south>'
+                '</bounding_coordinates>'
+                '{5}'
+                '<orientation_angle>0.0</orientation_angle>'
+                '</global_metadata>'
+                .format(self.product_id(), self.north, self.south,
+                        self.west, self.east, self.projection_xml()))
+
+    def band_xml(self, product, name, band_filename):
+        """A band element of the ESPA schema"""
+
+        (lines, samples) = self.dimensions()
+
+        return ('<band product="{0}" source="level1" name="{1}"'
+                ' category="image" data_type="INT16" nlines="{2}"'
+                ' nsamps="{3}" fill_value="0">'
+                '<short_name>{1}</short_name>'
+                '<long_name>synthetic reference band</long_name>'
+                '<file_name>{4}</file_name>'
+                '<pixel_size x="{5}" y="{5}" units="meters"/>'
+                '<resample_method>none</resample_method>'
+                '<data_units>digital numbers</data_units>'
+                '<app_version>synthetic</app_version>'
+                '<production_date>2017-07-15T00:00:00Z</production_date>'
+                '</band>'
+                .format(product, name, lines, samples, band_filename,
+                        self.resolution))
+
+    def write_espa_xml(self, filename, band_filename):
+        """Write an ESPA XML input for the scene"""
+
+        with open(filename, 'w') as xml_fd:
+            xml_fd.write(
+                '<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<espa_metadata version="2.0"'
+                ' xmlns="http://espa.cr.usgs.gov/v2"'
+                ' xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"'
+                ' xsi:schemaLocation="http://espa.cr.usgs.gov/v2'
+                ' http://espa.cr.usgs.gov/schema/'
+                'espa_internal_metadata_v2_0.xsd">'
+                '{0}<bands>{1}</bands></espa_metadata>\n'
+                .format(self.global_metadata_xml(),
+                        self.band_xml('L1TP', 'b1', band_filename)))
+
+    def write_ard_xml(self, filename, band_filename):
+        """Write an ARD XML input for the scene"""
+
+        with open(filename, 'w') as xml_fd:
+            xml_fd.write(
+                '<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<ard_metadata version="1.0"'
+                ' xmlns="http://ard.cr.usgs.gov/v1"'
+                ' xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"'
+                ' xsi:schemaLocation="http://ard.cr.usgs.gov/v1'
+                ' http://espa.cr.usgs.gov/schema/ard/ard_metadata_v1_0.xsd">'
+                '<tile_metadata>{0}<bands>{1}</bands></tile_metadata>'
+                '</ard_metadata>\n'
+                .format(self.global_metadata_xml(),
+                        self.band_xml('level2_qa', 'PIXELQA',
+                                      band_filename)))
+
+
+def normalize_longitude(longitude):
+    """Normalize the longitude to the -180..180 range"""
+
+    while longitude >= 180.0:
+        longitude -= 360.0
+    while longitude < -180.0:
+        longitude += 360.0
+
+    return longitude
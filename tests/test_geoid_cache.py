@@ -0,0 +1,131 @@
+#! /usr/bin/env python
+
+"""
+License:
+    NASA Open Source Agreement 1.3
+
+Description:
+    Generates the elevation twice with the cache of warped GEOID grids,
+    using the synthetic sources from fixtures.py, so the first run misses
+    and the second hits the cache.
+
+Usage:
+    python -m unittest discover tests
+"""
+
+import os
+import imp
+import json
+import shutil
+import tempfile
+import unittest
+
+from osgeo import gdal
+
+import fixtures
+
+
+SCRIPT_FILENAME = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               os.pardir, 'scripts', 'build_elevation_band.py')
+
+# A small scene within the GLS tiles, and the GLS tiles covering it
+SCENE = ('gls', -104.5, 40.5, 0.25)
+GLS_BOX = (39.0, 42.0, -106.0, -103.0)
+
+# Environment variables the tests define
+CACHE_VARIABLES = ['ESPA_ELEVATION_DIR', 'ESPA_ELEVATION_CACHE_DIR',
+                   'ESPA_ELEVATION_CACHE_SIZE',
+                   'ESPA_ELEVATION_GEOID_CACHE_SIZE']
+
+
+class GeoidCacheTest(unittest.TestCase):
+    """Generates the elevation with the GEOID cache missing, then hitting"""
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix='espa-elevation-test-')
+        self.cwd = os.getcwd()
+        self.environment = dict((name, os.environ.get(name))
+                                for name in CACHE_VARIABLES)
+
+        elevation_dir = os.path.join(self.work_dir, 'elevation')
+        fixtures.build_elevation_dir(elevation_dir, [GLS_BOX],
+                                     gls_samples=120)
+
+        self.cache_dir = os.path.join(self.work_dir, 'cache')
+        os.environ['ESPA_ELEVATION_DIR'] = elevation_dir
+        os.environ['ESPA_ELEVATION_CACHE_DIR'] = self.cache_dir
+        os.environ['ESPA_ELEVATION_CACHE_SIZE'] = '1G'
+        os.environ['ESPA_ELEVATION_GEOID_CACHE_SIZE'] = '1G'
+
+        self.script = imp.load_source('build_elevation_band',
+                                      SCRIPT_FILENAME)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        for (name, value) in self.environment.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        shutil.rmtree(self.work_dir)
+
+    def generate(self, run_name):
+        """Generate the elevation of the scene in its own directory
+
+        Returns:
+            <numpy.ndarray>: The elevation
+        """
+
+        run_dir = os.path.join(self.work_dir, run_name)
+        fixtures.make_dirs(run_dir)
+
+        scene = fixtures.Scene(*SCENE)
+        band_filename = os.path.join(run_dir, 'band1.tif')
+        scene.write_reference_band(band_filename)
+        mtl_filename = os.path.join(run_dir, 'scene_MTL.txt')
+        scene.write_mtl(mtl_filename, band_filename)
+
+        os.chdir(run_dir)
+        elevation = self.script.MTLElevation(mtl_filename, False,
+                                             *([None] * 9))
+        elevation.scratch_root = run_dir
+        elevation.generate()
+
+        elevation_ds = gdal.Open(elevation.elevation_image_name)
+        self.assertIsNotNone(elevation_ds)
+        return elevation_ds.GetRasterBand(1).ReadAsArray()
+
+    def statistics(self):
+        """Accumulated statistics of the GEOID cache"""
+
+        statistics_name = os.path.join(self.cache_dir, 'geoid-grids',
+                                       'cache-statistics.json')
+        with open(statistics_name, 'r') as statistics_fd:
+            return json.load(statistics_fd)
+
+    def test_miss_then_hit(self):
+        missed = self.generate('miss')
+        self.assertEqual(self.statistics()['misses'], 1)
+        self.assertEqual(self.statistics()['hits'], 0)
+
+        hit = self.generate('hit')
+        self.assertEqual(self.statistics()['misses'], 1)
+        self.assertEqual(self.statistics()['hits'], 1)
+
+        self.assertTrue((missed == hit).all())
+
+        # A single GeoTIFF is cached, without any sidecar files
+        cached = [file_name for file_name
+                  in os.listdir(os.path.join(self.cache_dir, 'geoid-grids'))
+                  if not file_name.endswith('.lock') and
+                  file_name != 'cache-statistics.json']
+        self.assertEqual(len(cached), 1)
+        self.assertTrue(cached[0].endswith('.tif'))
+
+        geoid_ds = gdal.Open(os.path.join(self.cache_dir, 'geoid-grids',
+                                          cached[0]))
+        self.assertEqual(geoid_ds.GetDriver().ShortName, 'GTiff')
+
+
+if __name__ == '__main__':
+    unittest.main()